@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BusinessElement, AccessRolesRules
+from .models import BusinessElement, AccessRolesRules, AccessDecisionLog
 
 
 @admin.register(BusinessElement)
@@ -63,4 +63,18 @@ class AccessRolesRulesAdmin(admin.ModelAdmin):
     permissions_summary.short_description = 'Краткое описание прав'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('role', 'element')
\ No newline at end of file
+        return super().get_queryset(request).select_related('role', 'element')
+
+
+@admin.register(AccessDecisionLog)
+class AccessDecisionLogAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'decision', 'action', 'element', 'user_id', 'method', 'path']
+    list_filter = ['decision', 'action', 'element']
+    search_fields = ['path', 'reason']
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
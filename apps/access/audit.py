@@ -0,0 +1,310 @@
+import atexit
+import datetime
+import glob
+import json
+import logging
+import os
+import queue
+import random
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.core.utils import pid_alive
+
+from .models import AccessDecisionLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIT_SETTINGS = {
+    'ENABLED': True,
+    # db - bulk_create в AccessDecisionLog, file - append-only NDJSON
+    'SINK': 'db',
+    'FILE_PATH': 'logs/access_audit.ndjson',
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'QUEUE_SIZE': 10000,
+    # Доля записываемых разрешающих решений (запреты пишутся всегда)
+    'ALLOW_SAMPLE_RATE': 0.01,
+    # drop - отбросить запись при переполнении очереди, spill - дописать в файл на диске
+    'OVERFLOW': 'spill',
+    'SPILL_PATH': 'logs/access_audit.spill.ndjson',
+    # False - без фонового потока, запись по заполнению пачки или по flush() (тесты, команды)
+    'BACKGROUND': True,
+}
+
+
+def get_audit_settings():
+    return {**DEFAULT_AUDIT_SETTINGS, **getattr(settings, 'ACCESS_AUDIT', {})}
+
+
+class AuditLogWriter:
+    """
+    Асинхронный писатель аудита: запрос кладёт запись в ограниченную очередь
+    (микросекунды), фоновый поток сбрасывает её пачками через bulk_create
+    или в NDJSON-файл. При переполнении очереди запись отбрасывается или
+    сбрасывается на диск и дочитывается позже.
+
+    Каждый процесс пишет переполнение в свой файл <SPILL_PATH>.<pid> и дочитывает
+    его сам; файлы завершившихся процессов дочитывает любой из оставшихся.
+    """
+
+    def __init__(self, config):
+        self.sink = config['SINK']
+        self.file_path = str(config['FILE_PATH'])
+        self.batch_size = config['BATCH_SIZE']
+        self.flush_interval = config['FLUSH_INTERVAL']
+        self.allow_sample_rate = config['ALLOW_SAMPLE_RATE']
+        self.overflow = config['OVERFLOW']
+        self.spill_path = str(config['SPILL_PATH'])
+        self.background = config['BACKGROUND']
+
+        self._queue = queue.Queue(maxsize=config['QUEUE_SIZE'])
+        self._write_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        # Счётчики меняют потоки запросов и поток писателя
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.sampled_out = 0
+        self.skipped = 0
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record(self, decision, action, user_id=None, element='', method='', path='', reason='', details=None):
+        if decision == AccessDecisionLog.DECISION_ALLOW and random.random() >= self.allow_sample_rate:
+            self._count('sampled_out')
+            return
+
+        entry = {
+            'created_at': timezone.now(),
+            'user_id': user_id,
+            'decision': decision,
+            'action': action,
+            'element': element or '',
+            'method': method or '',
+            'path': (path or '')[:255],
+            'reason': (reason or '')[:255],
+            'details': details or {},
+        }
+
+        try:
+            self._queue.put_nowait(entry)
+            self._count('enqueued')
+        except queue.Full:
+            self._handle_overflow(entry)
+
+        if self.background:
+            self._ensure_thread()
+        elif self._queue.qsize() >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        batch = self._drain(limit=None)
+        if batch:
+            self._write(batch)
+        self._replay_spill()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'sampled_out': self.sampled_out,
+                'skipped': self.skipped,
+            }
+
+    def _handle_overflow(self, entry):
+        if self.overflow != 'spill':
+            self._count('dropped')
+            return
+
+        try:
+            with self._spill_lock, open(self._own_spill_path(), 'a', encoding='utf-8') as spill:
+                spill.write(self._to_json(entry) + '\n')
+            self._count('spilled')
+        except OSError:
+            self._count('dropped')
+
+    def _drain(self, limit):
+        batch = []
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self._write_lock:
+            try:
+                if self.sink == 'file':
+                    with open(self.file_path, 'a', encoding='utf-8') as output:
+                        output.write(''.join(self._to_json(entry) + '\n' for entry in batch))
+                else:
+                    AccessDecisionLog.objects.bulk_create(
+                        [AccessDecisionLog(**entry) for entry in batch],
+                        batch_size=self.batch_size
+                    )
+                self._count('written', len(batch))
+            except Exception:
+                self._count('dropped', len(batch))
+                logger.exception("Failed to write %d access audit entries", len(batch))
+
+    def _own_spill_path(self):
+        # pid берём при каждом вызове: после fork у воркера свой файл
+        return f"{self.spill_path}.{os.getpid()}"
+
+    def _spill_files(self):
+        """
+        Свой файл переполнения и файлы завершившихся процессов (включая оборванное дочитывание).
+        Файлы живых воркеров не трогаем: они могут дописывать в них прямо сейчас.
+        """
+        own_pid = os.getpid()
+        paths = []
+        for path in glob.glob(f"{glob.escape(self.spill_path)}.*"):
+            pid, _, suffix = path[len(self.spill_path) + 1:].partition('.')
+            if not pid.isdigit() or suffix not in ('', 'replay'):
+                continue
+            if int(pid) == own_pid:
+                if not suffix:
+                    paths.append(path)
+            elif not pid_alive(int(pid)):
+                paths.append(path)
+        return paths
+
+    def _replay_spill(self):
+        if self.overflow != 'spill':
+            return
+
+        # Дочитывает один поток процесса: у всех потоков один и тот же файл .replay
+        if not self._replay_lock.acquire(blocking=False):
+            return
+        try:
+            for path in self._spill_files():
+                self._replay_file(path)
+        finally:
+            self._replay_lock.release()
+
+    def _replay_file(self, path):
+        replay_path = f"{self._own_spill_path()}.replay"
+        with self._spill_lock:
+            try:
+                os.replace(path, replay_path)
+            except OSError:
+                # Файл завершившегося процесса уже забрал другой воркер
+                return
+
+        skipped = 0
+        try:
+            with open(replay_path, encoding='utf-8') as spill:
+                batch = []
+                for line in spill:
+                    # Строка могла оборваться при падении процесса - пропускаем её, а не весь файл
+                    try:
+                        entry = json.loads(line)
+                        entry['created_at'] = datetime.datetime.fromisoformat(entry['created_at'])
+                    except (ValueError, TypeError, KeyError):
+                        skipped += 1
+                        continue
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        self._write(batch)
+                        batch = []
+                if batch:
+                    self._write(batch)
+        finally:
+            os.remove(replay_path)
+
+        if skipped:
+            self._count('skipped', skipped)
+            logger.warning("Skipped %d malformed access audit spill lines", skipped)
+
+    @staticmethod
+    def _to_json(entry):
+        return json.dumps({**entry, 'created_at': entry['created_at'].isoformat()}, ensure_ascii=False)
+
+    def _ensure_thread(self):
+        # После fork (gunicorn --preload) поток нужно запустить заново в каждом воркере
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._thread_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='access-audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                try:
+                    self._replay_spill()
+                except OSError:
+                    # Ошибка диска не должна останавливать поток: иначе очередь больше не разбирается
+                    logger.exception("Failed to replay access audit spill from %s", self.spill_path)
+                continue
+
+            batch = [first] + self._drain(limit=self.batch_size - 1)
+            close_old_connections()
+            self._write(batch)
+
+
+_writer = None
+_writer_configured = False
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    global _writer, _writer_configured
+    if not _writer_configured:
+        with _writer_lock:
+            if not _writer_configured:
+                config = get_audit_settings()
+                if config['ENABLED']:
+                    _writer = AuditLogWriter(config)
+                    atexit.register(_writer.flush)
+                _writer_configured = True
+    return _writer
+
+
+def reset_audit_writer():
+    global _writer, _writer_configured
+    with _writer_lock:
+        _writer = None
+        _writer_configured = False
+
+
+def audit(request, decision, action, element='', reason='', details=None):
+    writer = get_audit_writer()
+    if writer is None:
+        return
+
+    user = getattr(request, 'user', None)
+    writer.record(
+        decision=decision,
+        action=action,
+        user_id=user.id if user is not None and user.is_authenticated else None,
+        element=element,
+        method=request.method,
+        path=request.path,
+        reason=reason,
+        details=details,
+    )
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access', '0002_alter_accessrolesrules_create_permission_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessDecisionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Момент принятия решения (а не момент записи в базу)', verbose_name='Время события')),
+                ('user_id', models.BigIntegerField(blank=True, help_text='Без внешнего ключа: запись аудита переживает удаление пользователя', null=True, verbose_name='ID пользователя')),
+                ('decision', models.CharField(choices=[('allow', 'Разрешено'), ('deny', 'Запрещено'), ('admin', 'Действие администратора')], max_length=10, verbose_name='Решение')),
+                ('action', models.CharField(help_text='read/create/update/delete или действие администратора (assign_role, ...)', max_length=50, verbose_name='Действие')),
+                ('element', models.CharField(blank=True, max_length=100, verbose_name='Бизнес-элемент')),
+                ('method', models.CharField(blank=True, max_length=10, verbose_name='HTTP метод')),
+                ('path', models.CharField(blank=True, max_length=255, verbose_name='Путь запроса')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Причина')),
+                ('details', models.JSONField(blank=True, default=dict, verbose_name='Подробности')),
+            ],
+            options={
+                'verbose_name': 'Запись аудита доступа',
+                'verbose_name_plural': 'Аудит доступа',
+                'db_table': 'access_decision_log',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user_id', 'created_at'], name='idx_audit_user_time'), models.Index(fields=['decision', 'created_at'], name='idx_audit_decision_time')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access', '0003_accessdecisionlog'),
+        ('users', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accessrolesrules',
+            index=models.Index(fields=['role', 'element', 'read_permission', 'read_all_permission', 'create_permission', 'update_permission', 'update_all_permission', 'delete_permission', 'delete_all_permission'], name='idx_rule_permissions_cover'),
+        ),
+        # Старый индекс удаляется после создания нового: проверки прав не остаются без индекса
+        migrations.RemoveIndex(
+            model_name='accessrolesrules',
+            name='idx_role_element',
+        ),
+    ]
@@ -1,4 +1,31 @@
 from django.db import models
+from django.utils import timezone
+from apps.core.managers import HotPathManager
+from apps.core.query_cache import CachingManager
+
+
+def permissions_summary(read, read_all, create, update, update_all, delete, delete_all):
+    perms = []
+
+    if read_all:
+        perms.append("Читать все")
+    elif read:
+        perms.append("Читать свои")
+
+    if create:
+        perms.append("Создавать")
+
+    if update_all:
+        perms.append("Редактировать все")
+    elif update:
+        perms.append("Редактировать свои")
+
+    if delete_all:
+        perms.append("Удалять все")
+    elif delete:
+        perms.append("Удалять свои")
+
+    return ", ".join(perms) if perms else "Нет прав"
 
 
 class BusinessElement(models.Model):
@@ -21,6 +48,8 @@ class BusinessElement(models.Model):
         help_text="Автоматически устанавливается при создании"
     )
 
+    objects = CachingManager()
+
     class Meta:
         verbose_name = "Бизнес-элемент"
         verbose_name_plural = "Бизнес-элементы"
@@ -96,6 +125,9 @@ class AccessRolesRules(models.Model):
         help_text="Когда правило было последний раз изменено"
     )
 
+    objects = CachingManager()
+    hot = HotPathManager()
+
     class Meta:
         verbose_name = "Правило доступа"
         verbose_name_plural = "Правила доступа"
@@ -103,34 +135,32 @@ class AccessRolesRules(models.Model):
         ordering = ['role__name', 'element__name']
         db_table = 'access_roles_rules'
         indexes = [
-            models.Index(fields=['role', 'element'], name='idx_role_element'),
+            # Покрывающий индекс проверки прав: правила набора ролей читаются без обращения
+            # к таблице. Заменяет idx_role_element, который был его префиксом
+            models.Index(
+                fields=[
+                    'role', 'element',
+                    'read_permission', 'read_all_permission', 'create_permission',
+                    'update_permission', 'update_all_permission',
+                    'delete_permission', 'delete_all_permission',
+                ],
+                name='idx_rule_permissions_cover'
+            ),
         ]
 
     def __str__(self):
         return f"{self.role.name} -> {self.element.name}"
 
     def get_permissions_summary(self):
-        perms = []
-
-        if self.read_all_permission:
-            perms.append("Читать все")
-        elif self.read_permission:
-            perms.append("Читать свои")
-
-        if self.create_permission:
-            perms.append("Создавать")
-
-        if self.update_all_permission:
-            perms.append("Редактировать все")
-        elif self.update_permission:
-            perms.append("Редактировать свои")
-
-        if self.delete_all_permission:
-            perms.append("Удалять все")
-        elif self.delete_permission:
-            perms.append("Удалять свои")
-
-        return ", ".join(perms) if perms else "Нет прав"
+        return permissions_summary(
+            self.read_permission,
+            self.read_all_permission,
+            self.create_permission,
+            self.update_permission,
+            self.update_all_permission,
+            self.delete_permission,
+            self.delete_all_permission,
+        )
 
     def save(self, *args, **kwargs):
         # Логика: read_all -> read
@@ -145,4 +175,75 @@ class AccessRolesRules(models.Model):
         if self.delete_all_permission and not self.delete_permission:
             self.delete_permission = True
 
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class AccessDecisionLog(models.Model):
+    DECISION_ALLOW = 'allow'
+    DECISION_DENY = 'deny'
+    DECISION_ADMIN = 'admin'
+    DECISION_CHOICES = (
+        (DECISION_ALLOW, 'Разрешено'),
+        (DECISION_DENY, 'Запрещено'),
+        (DECISION_ADMIN, 'Действие администратора'),
+    )
+
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Время события",
+        help_text="Момент принятия решения (а не момент записи в базу)"
+    )
+    user_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="ID пользователя",
+        help_text="Без внешнего ключа: запись аудита переживает удаление пользователя"
+    )
+    decision = models.CharField(
+        max_length=10,
+        choices=DECISION_CHOICES,
+        verbose_name="Решение"
+    )
+    action = models.CharField(
+        max_length=50,
+        verbose_name="Действие",
+        help_text="read/create/update/delete или действие администратора (assign_role, ...)"
+    )
+    element = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Бизнес-элемент"
+    )
+    method = models.CharField(
+        max_length=10,
+        blank=True,
+        verbose_name="HTTP метод"
+    )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Путь запроса"
+    )
+    reason = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Причина"
+    )
+    details = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Подробности"
+    )
+
+    class Meta:
+        verbose_name = "Запись аудита доступа"
+        verbose_name_plural = "Аудит доступа"
+        ordering = ['-created_at']
+        db_table = 'access_decision_log'
+        indexes = [
+            models.Index(fields=['user_id', 'created_at'], name='idx_audit_user_time'),
+            models.Index(fields=['decision', 'created_at'], name='idx_audit_decision_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M:%S} {self.decision} {self.action} {self.element}"
@@ -0,0 +1,51 @@
+from apps.core.read_models import ReadModel, Column, Computed
+from .models import permissions_summary
+from .serializers import BusinessElementSerializer, AccessRolesRulesSerializer
+
+PERMISSION_COLUMNS = (
+    'read_permission',
+    'read_all_permission',
+    'create_permission',
+    'update_permission',
+    'update_all_permission',
+    'delete_permission',
+    'delete_all_permission',
+)
+
+
+class BusinessElementReadModel(ReadModel):
+    serializer_class = BusinessElementSerializer
+
+    id = Column()
+    name = Column()
+    description = Column()
+    created_at = Column()
+
+
+class AccessRolesRulesReadModel(ReadModel):
+    serializer_class = AccessRolesRulesSerializer
+
+    id = Column()
+    role = Column('role_id')
+    role_name = Column('role__name')
+    element = Column('element_id')
+    element_name = Column('element__name')
+    read_permission = Column()
+    read_all_permission = Column()
+    create_permission = Column()
+    update_permission = Column()
+    update_all_permission = Column()
+    delete_permission = Column()
+    delete_all_permission = Column()
+    permissions_summary = Computed(PERMISSION_COLUMNS, permissions_summary)
+    created_at = Column()
+    updated_at = Column()
+
+
+class RoleUsersReadModel(ReadModel):
+    # Формат ответа RoleViewSet.users (queryset по UserRole)
+    id = Column('user_id')
+    email = Column('user__email')
+    first_name = Column('user__first_name')
+    last_name = Column('user__last_name')
+    assigned_at = Column()
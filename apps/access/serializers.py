@@ -1,16 +1,17 @@
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from .models import BusinessElement, AccessRolesRules
 from apps.users.models import Role, UserRole
 
 
-class BusinessElementSerializer(serializers.ModelSerializer):
+class BusinessElementSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = BusinessElement
         fields = ['id', 'name', 'description', 'created_at']
         read_only_fields = ['created_at']
 
 
-class AccessRolesRulesSerializer(serializers.ModelSerializer):
+class AccessRolesRulesSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     role_name = serializers.CharField(source='role.name', read_only=True)
     element_name = serializers.CharField(source='element.name', read_only=True)
     permissions_summary = serializers.CharField(source='get_permissions_summary', read_only=True)
@@ -35,6 +36,17 @@ class AccessRolesRulesSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
         read_only_fields = ['created_at', 'updated_at']
+        field_dependencies = {
+            'permissions_summary': [
+                'read_permission',
+                'read_all_permission',
+                'create_permission',
+                'update_permission',
+                'update_all_permission',
+                'delete_permission',
+                'delete_all_permission',
+            ],
+        }
 
     def validate(self, attrs):
         if attrs.get('read_all_permission') and not attrs.get('read_permission'):
@@ -47,7 +59,7 @@ class AccessRolesRulesSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     users_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -55,6 +67,9 @@ class RoleSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'users_count']
 
     def get_users_count(self, obj):
+        # RoleViewSet аннотирует users_count одним запросом вместо COUNT на каждую роль
+        if hasattr(obj, 'users_count'):
+            return obj.users_count
         return obj.users.count()
 
 
@@ -0,0 +1,174 @@
+import hashlib
+import json
+from operator import itemgetter
+
+from django.conf import settings
+
+from apps.core.cache import TieredCache, is_shared_cache
+from apps.core.db import use_primary
+from apps.core.instrumentation import query_budget_exempt
+
+from .models import AccessRolesRules, BusinessElement
+
+# Соответствие ключей манифеста прав и полей AccessRolesRules
+PERMISSION_FIELDS = (
+    ('read', 'read_permission'),
+    ('read_all', 'read_all_permission'),
+    ('create', 'create_permission'),
+    ('update', 'update_permission'),
+    ('update_all', 'update_all_permission'),
+    ('delete', 'delete_permission'),
+    ('delete_all', 'delete_all_permission'),
+)
+
+# Срок жизни записи прав при кэше Django в памяти процесса: смену версии правил
+# другие воркеры не видят, и права обновляются только по истечении записи
+PROCESS_LOCAL_TIMEOUT = 5
+
+
+def get_permission_version():
+    """
+    Версия правил доступа: версия пространства имён access в TieredCache -
+    общий счётчик в кэше Django плюс локальный счётчик процесса.
+    """
+    return permission_cache.tiered.version()
+
+
+def bump_permission_version():
+    permission_cache.tiered.bump_version()
+
+
+def role_set_signature(role_ids, version=''):
+    raw = ",".join(str(role_id) for role_id in sorted(set(role_ids)))
+    return hashlib.sha1(f"{raw}|{version}".encode('utf-8')).hexdigest()
+
+
+def effective_rules(role_ids):
+    """
+    Правила набора ролей для проверки прав: без Meta.ordering (JOIN и сортировка по именам)
+    и только колонки покрывающего индекса idx_rule_permissions_cover плюс имена роли и элемента.
+    """
+    return AccessRolesRules.hot.filter(role_id__in=role_ids).values_list(
+        'role__name', 'element__name', *(field for _, field in PERMISSION_FIELDS)
+    )
+
+
+def build_effective_permissions(role_ids):
+    # Порядок как у прежней выборки с Meta.ordering: сортировка в Python дешевле ORDER BY с JOIN
+    rules = sorted(effective_rules(role_ids), key=itemgetter(0, 1))
+
+    permissions_by_element = {}
+    for role_name, element_name, *flags in rules:
+        if element_name not in permissions_by_element:
+            permissions_by_element[element_name] = {
+                'element': element_name,
+                'roles': [],
+                'permissions': {key: False for key, _ in PERMISSION_FIELDS},
+            }
+
+        permissions_by_element[element_name]['roles'].append(role_name)
+
+        perms = permissions_by_element[element_name]['permissions']
+        for (key, _), allowed in zip(PERMISSION_FIELDS, flags):
+            perms[key] = perms[key] or allowed
+
+    return permissions_by_element
+
+
+class EffectivePermissionCache:
+    """
+    Кэш эффективных прав, общий для всех пользователей с одинаковым набором ролей.
+
+    Ключ - хеш отсортированного списка role_id, поэтому миллион пользователей
+    с ролью `user` разделяют одну запись. Записи хранятся в TieredCache
+    (пространство имён access): L1 в процессе, L2 общий для воркеров, смена
+    правил меняет версию пространства имён. Перестроение single-flight: при смене
+    версии правила загружает только один поток процесса, остальные ждут его результат.
+
+    Срок жизни записи короткий: это граница устаревания прав, если смена версии
+    до воркера не дошла. При кэше в памяти процесса он не больше PROCESS_LOCAL_TIMEOUT.
+    """
+
+    def __init__(self, max_entries=1024, timeout=60):
+        self.timeout = timeout
+        self.tiered = TieredCache('access', L1_MAX_ENTRIES=max_entries, TIMEOUT=timeout)
+
+    def entry_timeout(self):
+        if is_shared_cache(self.tiered.config['ALIAS']):
+            return self.timeout
+        return min(self.timeout, PROCESS_LOCAL_TIMEOUT)
+
+    def for_roles(self, role_ids):
+        key = f'roles:{role_set_signature(role_ids)}'
+        return self._get_or_build(key, lambda: build_effective_permissions(role_ids))
+
+    def business_element_names(self):
+        return self._get_or_build(
+            'elements',
+            lambda: frozenset(BusinessElement.objects.values_list('name', flat=True)),
+            'business_elements'
+        )
+
+    def _get_or_build(self, key, builder, cache_name='effective_permissions'):
+        def load():
+            # Перестроение амортизируется на всех пользователей набора ролей.
+            # Запись живёт до смены версии правил, поэтому строится по default, а не по реплике
+            with query_budget_exempt(), use_primary():
+                return builder()
+
+        return self.tiered.get_or_load(key, load, timeout=self.entry_timeout(), metric=cache_name)
+
+    def clear(self):
+        # Новая версия отсекает и записи L2
+        self.tiered.bump_version()
+        self.tiered.clear_local()
+
+    def stats(self):
+        stats = self.tiered.stats()
+        return {
+            **stats,
+            'rebuilds': stats['loads'],
+            'version': self.tiered.version(),
+        }
+
+
+permission_cache = EffectivePermissionCache(
+    max_entries=getattr(settings, 'ACCESS_PERMISSION_CACHE_SIZE', 1024),
+    timeout=getattr(settings, 'ACCESS_PERMISSION_CACHE_TIMEOUT', 60)
+)
+
+
+def get_user_role_ids(user):
+    return list(user.roles(manager='hot').values_list('role_id', flat=True))
+
+
+def get_effective_permissions(user, role_ids=None):
+    if role_ids is None:
+        role_ids = get_user_role_ids(user)
+    if not role_ids:
+        return {}
+    return permission_cache.for_roles(role_ids)
+
+
+def build_permissions_manifest(user, user_roles):
+    """
+    Ответ my_permissions: user_roles - список UserRole с подгруженной role.
+    """
+    role_ids = [ur.role_id for ur in user_roles]
+    return {
+        'user': {
+            'id': user.id,
+            'email': user.email,
+            'roles': [ur.role.name for ur in user_roles]
+        },
+        'permissions': list(get_effective_permissions(user, role_ids).values())
+    }
+
+
+def permissions_manifest_etag(manifest):
+    """
+    ETag манифеста по его содержимому: одинаков во всех воркерах и не зависит
+    от версии кэша прав, которая меняется и без изменения прав пользователя.
+    """
+    raw = json.dumps(manifest, sort_keys=True, ensure_ascii=False)
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.users.models import Role
+from .models import BusinessElement, AccessRolesRules
+from .services import bump_permission_version
+
+
+@receiver([post_save, post_delete], sender=AccessRolesRules)
+@receiver([post_save, post_delete], sender=BusinessElement)
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_permission_cache(sender, using, **kwargs):
+    # До коммита другой воркер пересобрал бы права по старым данным под новой версией
+    transaction.on_commit(bump_permission_version, using=using)
@@ -6,65 +6,6 @@ from apps.users.models import User, Role, UserRole
 from apps.access.models import BusinessElement, AccessRolesRules
 
 
-@pytest.fixture
-def setup_admin_and_user(db):
-    admin_role = Role.objects.create(name='admin', description='Администратор')
-    user_role = Role.objects.create(name='user', description='Пользователь')
-
-    admin = User.objects.create_user(
-        email='admin@test.com',
-        first_name='Admin',
-        last_name='User',
-        password='admin123'
-    )
-    admin.is_verified = True
-    admin.save()
-    UserRole.objects.create(user=admin, role=admin_role)
-
-    regular_user = User.objects.create_user(
-        email='user@test.com',
-        first_name='Regular',
-        last_name='User',
-        password='user123'
-    )
-    regular_user.is_verified = True
-    regular_user.save()
-    UserRole.objects.create(user=regular_user, role=user_role)
-
-    return {
-        'admin': admin,
-        'admin_role': admin_role,
-        'user': regular_user,
-        'user_role': user_role
-    }
-
-
-@pytest.fixture
-def admin_client(setup_admin_and_user):
-    client = APIClient()
-    response = client.post(
-        reverse('login'),
-        {'email': 'admin@test.com', 'password': 'admin123'},
-        format='json'
-    )
-    token = response.data['token']
-    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
-    return client
-
-
-@pytest.fixture
-def user_client(setup_admin_and_user):
-    client = APIClient()
-    response = client.post(
-        reverse('login'),
-        {'email': 'user@test.com', 'password': 'user123'},
-        format='json'
-    )
-    token = response.data['token']
-    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
-    return client
-
-
 @pytest.mark.django_db
 class TestRoleManagement:
     def test_admin_can_list_roles(self, admin_client):
@@ -0,0 +1,35 @@
+import logging
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.users.models import Role, User, UserRole
+
+
+class ListHandler(logging.Handler):
+    """
+    Обработчик логов для тестов: записи собираются в список records.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_client(email, role):
+    """
+    Верифицированный пользователь с ролью (имя или объект Role) и клиент с его токеном.
+    """
+    if isinstance(role, str):
+        role, _ = Role.objects.get_or_create(name=role)
+    user = User.objects.create_user(email=email, first_name='Test', last_name='User', password='testpass123')
+    user.is_verified = True
+    user.save()
+    UserRole.objects.create(user=user, role=role)
+
+    client = APIClient()
+    response = client.post(reverse('login'), {'email': email, 'password': 'testpass123'}, format='json')
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+    return client
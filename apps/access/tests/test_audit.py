@@ -0,0 +1,191 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.users.models import User, Role, UserRole
+from apps.access.models import AccessDecisionLog
+from apps.access.audit import AuditLogWriter, get_audit_settings, get_audit_writer, reset_audit_writer
+
+
+@pytest.fixture
+def audit_writer(settings):
+    def _configure(**overrides):
+        settings.ACCESS_AUDIT = {**settings.ACCESS_AUDIT, 'ENABLED': True, 'BACKGROUND': False, **overrides}
+        reset_audit_writer()
+        return get_audit_writer()
+
+    yield _configure
+    reset_audit_writer()
+
+
+@pytest.fixture
+def client_with_role(db):
+    def _make(email, role_name):
+        role, _ = Role.objects.get_or_create(name=role_name)
+        user = User.objects.create_user(email=email, first_name='Test', last_name='User', password='testpass123')
+        user.is_verified = True
+        user.save()
+        UserRole.objects.create(user=user, role=role)
+
+        client = APIClient()
+        response = client.post(reverse('login'), {'email': email, 'password': 'testpass123'}, format='json')
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        return client, user
+
+    return _make
+
+
+@pytest.mark.django_db
+class TestAccessAudit:
+    def test_denial_is_logged(self, audit_writer, client_with_role):
+        writer = audit_writer(ALLOW_SAMPLE_RATE=0.0)
+        client, user = client_with_role('guest@test.com', 'guest')
+
+        response = client.post(reverse('products-list-create'), {'name': 'x'}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not AccessDecisionLog.objects.exists()
+
+        writer.flush()
+
+        entry = AccessDecisionLog.objects.get()
+        assert entry.decision == AccessDecisionLog.DECISION_DENY
+        assert entry.user_id == user.id
+        assert (entry.action, entry.element) == ('create', 'products')
+
+    def test_allow_decisions_are_sampled(self, audit_writer, client_with_role):
+        writer = audit_writer(ALLOW_SAMPLE_RATE=0.0)
+        client, _ = client_with_role('guest@test.com', 'guest')
+
+        client.get(reverse('products-list-create'))
+        writer.flush()
+        assert not AccessDecisionLog.objects.exists()
+        assert writer.stats()['sampled_out'] == 1
+
+        writer = audit_writer(ALLOW_SAMPLE_RATE=1.0)
+        client.get(reverse('products-list-create'))
+        writer.flush()
+        assert AccessDecisionLog.objects.get().decision == AccessDecisionLog.DECISION_ALLOW
+
+    def test_admin_actions_are_logged(self, audit_writer, client_with_role):
+        writer = audit_writer()
+        client, _ = client_with_role('admin@test.com', 'admin')
+        _, target = client_with_role('target@test.com', 'user')
+        role = Role.objects.get(name='guest') if Role.objects.filter(name='guest').exists() else \
+            Role.objects.create(name='guest')
+
+        client.post(reverse('assign-role'), {'user_id': target.id, 'role_id': role.id}, format='json')
+        client.post(reverse('revoke-role'), {'user_id': target.id, 'role_id': role.id}, format='json')
+        writer.flush()
+
+        actions = list(AccessDecisionLog.objects.order_by('created_at').values_list('action', flat=True))
+        assert actions == ['assign_role', 'revoke_role']
+
+    def test_overflow_spills_to_disk_and_is_replayed(self, tmp_path, db):
+        config = {
+            **get_audit_settings(),
+            'QUEUE_SIZE': 2,
+            'BATCH_SIZE': 100,
+            'BACKGROUND': False,
+            'SPILL_PATH': tmp_path / 'spill.ndjson',
+        }
+        writer = AuditLogWriter(config)
+
+        for i in range(5):
+            writer.record(AccessDecisionLog.DECISION_DENY, 'read', user_id=i, element='products')
+
+        assert writer.stats()['spilled'] == 3
+        assert [path.name for path in tmp_path.iterdir()] == [f'spill.ndjson.{os.getpid()}']
+        writer.flush()
+        assert AccessDecisionLog.objects.count() == 5
+        assert list(tmp_path.iterdir()) == []
+
+    def test_spill_files_of_dead_workers_are_replayed(self, tmp_path, db):
+        spill_path = tmp_path / 'spill.ndjson'
+        config = {**get_audit_settings(), 'BACKGROUND': False, 'SPILL_PATH': spill_path}
+        writer = AuditLogWriter(config)
+        writer.record(AccessDecisionLog.DECISION_DENY, 'read', user_id=1, element='products')
+        line = AuditLogWriter._to_json(writer._drain(limit=None)[0]) + '\n'
+
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        dead = tmp_path / f'spill.ndjson.{process.pid}'
+        dead_replay = tmp_path / f'spill.ndjson.{process.pid}.replay'
+        alive = tmp_path / f'spill.ndjson.{os.getppid()}'
+        for path in (dead, dead_replay, alive):
+            path.write_text(line, encoding='utf-8')
+
+        writer.flush()
+
+        assert AccessDecisionLog.objects.count() == 2
+        assert list(tmp_path.iterdir()) == [alive]
+
+    def test_writer_thread_survives_spill_errors(self, tmp_path):
+        config = {
+            **get_audit_settings(),
+            'SINK': 'file',
+            'FILE_PATH': tmp_path / 'audit.ndjson',
+            'SPILL_PATH': tmp_path / 'spill.ndjson',
+            'FLUSH_INTERVAL': 0.01,
+            'BACKGROUND': True,
+        }
+        writer = AuditLogWriter(config)
+
+        try:
+            with mock.patch.object(writer, '_replay_spill', side_effect=OSError('disk full')) as replay:
+                writer._ensure_thread()
+                deadline = time.monotonic() + 5
+                while replay.call_count < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+                writer.record(AccessDecisionLog.DECISION_DENY, 'read', user_id=1, element='products')
+                while writer.stats()['written'] < 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+        finally:
+            # Поток демонический и не останавливается - пусть дальше просыпается редко
+            writer.flush_interval = 60
+
+        assert replay.call_count >= 2
+        assert writer.stats()['written'] == 1
+
+    def test_malformed_spill_lines_are_skipped(self, tmp_path, db):
+        spill_path = tmp_path / 'spill.ndjson'
+        config = {**get_audit_settings(), 'BACKGROUND': False, 'SPILL_PATH': spill_path}
+        writer = AuditLogWriter(config)
+
+        writer.record(AccessDecisionLog.DECISION_DENY, 'read', user_id=1, element='products')
+        valid = AuditLogWriter._to_json(writer._drain(limit=None)[0])
+        # Последняя строка оборвана при падении процесса
+        own_spill = tmp_path / f'spill.ndjson.{os.getpid()}'
+        own_spill.write_text('\n'.join([valid, '{"user_id": 2}', '[]', valid[:20]]), encoding='utf-8')
+
+        writer.flush()
+
+        assert AccessDecisionLog.objects.count() == 1
+        assert writer.stats()['skipped'] == 3
+        assert list(tmp_path.iterdir()) == []
+
+    def test_overflow_drop_and_file_sink(self, tmp_path):
+        config = {
+            **get_audit_settings(),
+            'SINK': 'file',
+            'FILE_PATH': tmp_path / 'audit.ndjson',
+            'QUEUE_SIZE': 2,
+            'OVERFLOW': 'drop',
+            'BACKGROUND': False,
+        }
+        writer = AuditLogWriter(config)
+
+        for i in range(3):
+            writer.record(AccessDecisionLog.DECISION_DENY, 'delete', user_id=i, element='orders')
+        writer.flush()
+
+        lines = (tmp_path / 'audit.ndjson').read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line)['user_id'] for line in lines] == [0, 1]
+        assert writer.stats()['dropped'] == 1
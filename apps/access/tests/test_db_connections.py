@@ -0,0 +1,34 @@
+import logging
+
+import pytest
+from django.db import OperationalError, connections
+from apps.access.tests.helpers import ListHandler
+from apps.core.db import warm_up_connections
+
+
+@pytest.fixture
+def db_log():
+    handler = ListHandler()
+    logger = logging.getLogger('apps.core.db')
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+@pytest.mark.django_db
+class TestWarmUpConnections:
+    def test_opens_connection(self, db_log):
+        warm_up_connections()
+
+        assert connections['default'].connection is not None
+        assert db_log.records[0].getMessage().startswith('DB connection default warmed up')
+
+    def test_failure_is_logged_not_raised(self, monkeypatch, db_log):
+        def refuse():
+            raise OperationalError('connection refused')
+
+        monkeypatch.setattr(connections['default'], 'cursor', refuse)
+
+        warm_up_connections(['default'])
+
+        assert db_log.records[0].getMessage() == 'DB warmup failed for default: connection refused'
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.access.tests.helpers import make_client
+from apps.core.metrics import MetricsRegistry, registry
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_admin_only(self):
+        client = make_client('user@test.com', 'user')
+
+        response = client.get(reverse('metrics'))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_exposes_request_auth_and_cache_metrics(self):
+        client = make_client('admin@test.com', 'admin')
+        APIClient().post(reverse('login'), {'email': 'admin@test.com', 'password': 'wrong'}, format='json')
+        client.get(reverse('role-list'))
+        client.get(reverse('products-list-create'))
+
+        response = client.get(reverse('metrics'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        assert 'http_request_duration_seconds_count{view="role-list",method="GET"} 1' in body
+        assert 'http_requests_total{view="login",method="POST",status="200"} 1' in body
+        assert 'http_request_db_queries_bucket{view="role-list",le="+Inf"} 1' in body
+        assert 'auth_attempts_total{method="password",outcome="success"} 1' in body
+        assert 'auth_attempts_total{method="password",outcome="invalid_password"} 1' in body
+        assert 'auth_attempts_total{method="jwt",outcome="success"}' in body
+        assert 'auth_bcrypt_duration_seconds_count{operation="check"} 2' in body
+        assert 'cache_requests_total{cache="business_elements"' in body
+        assert 'cache_requests_total{cache="effective_permissions"' in body
+
+
+class TestMetricsRegistry:
+    def test_histogram_buckets_are_cumulative(self):
+        local = MetricsRegistry()
+        histogram = local.histogram('latency_seconds', 'Latency', ('view',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, view='a')
+
+        body = local.render()
+
+        assert 'latency_seconds_bucket{view="a",le="0.1"} 1' in body
+        assert 'latency_seconds_bucket{view="a",le="1"} 3' in body
+        assert 'latency_seconds_bucket{view="a",le="+Inf"} 4' in body
+        assert 'latency_seconds_sum{view="a"} 4.05' in body
+        assert 'latency_seconds_count{view="a"} 4' in body
+
+    def test_snapshots_of_other_workers_are_merged(self, tmp_path):
+        worker = MetricsRegistry()
+        worker.counter('requests_total', 'Requests', ('view',)).inc(3, view='a')
+        worker.histogram('latency_seconds', 'Latency', buckets=(1.0,)).observe(0.5)
+        (tmp_path / f'metrics_{os.getppid()}.json').write_text(json.dumps(worker.snapshot()))
+
+        local = MetricsRegistry()
+        local.counter('requests_total', 'Requests', ('view',)).inc(2, view='a')
+        local.counter('requests_total', 'Requests', ('view',)).inc(view='b')
+        local.histogram('latency_seconds', 'Latency', buckets=(1.0,)).observe(2.0)
+
+        body = local.render(str(tmp_path))
+
+        assert 'requests_total{view="a"} 5' in body
+        assert 'requests_total{view="b"} 1' in body
+        assert 'latency_seconds_bucket{le="1"} 1' in body
+        assert 'latency_seconds_count 2' in body
+
+        local.write_snapshot(str(tmp_path))
+        assert len(list(tmp_path.glob('metrics_*.json'))) == 2
+
+    def test_snapshots_of_dead_workers_are_removed(self, tmp_path):
+        worker = MetricsRegistry()
+        worker.counter('requests_total', 'Requests', ('view',)).inc(3, view='a')
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        stale = tmp_path / f'metrics_{process.pid}.json'
+        stale.write_text(json.dumps(worker.snapshot()))
+
+        local = MetricsRegistry()
+        local.counter('requests_total', 'Requests', ('view',)).inc(view='a')
+
+        assert 'requests_total{view="a"} 1' in local.render(str(tmp_path))
+        assert not stale.exists()
@@ -0,0 +1,124 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from apps.users.models import Role
+from apps.access.models import BusinessElement, AccessRolesRules
+from apps.access.services import PROCESS_LOCAL_TIMEOUT, EffectivePermissionCache, get_permission_version, \
+    permission_cache
+from apps.access.tests.helpers import make_client
+
+
+@pytest.fixture
+def rbac_setup(db):
+    permission_cache.clear()
+    admin_role, _ = Role.objects.get_or_create(name='admin')
+    user_role, _ = Role.objects.get_or_create(name='user')
+    products, _ = BusinessElement.objects.get_or_create(name='products')
+    AccessRolesRules.objects.update_or_create(
+        role=user_role,
+        element=products,
+        defaults={'read_permission': True, 'read_all_permission': True}
+    )
+    return {'admin': admin_role, 'user': user_role, 'products': products}
+
+
+@pytest.mark.django_db
+class TestEffectivePermissionCache:
+    def test_users_with_same_roles_share_entry(self, rbac_setup):
+        first = make_client('first@test.com', rbac_setup['user'])
+        second = make_client('second@test.com', rbac_setup['user'])
+
+        assert first.get(reverse('my-permissions')).status_code == status.HTTP_200_OK
+        assert second.get(reverse('my-permissions')).status_code == status.HTTP_200_OK
+
+        stats = permission_cache.stats()
+        assert stats['rebuilds'] == 1
+        assert stats['hits'] >= 1
+
+    def test_rule_change_invalidates_entry(self, rbac_setup, django_capture_on_commit_callbacks):
+        client = make_client('reader@test.com', rbac_setup['user'])
+
+        assert client.post(reverse('products-list-create'), {'name': 'x'}, format='json').status_code == \
+            status.HTTP_403_FORBIDDEN
+
+        rule = AccessRolesRules.objects.get(role=rbac_setup['user'], element=rbac_setup['products'])
+        rule.create_permission = True
+        with django_capture_on_commit_callbacks(execute=True):
+            rule.save()
+
+        response = client.post(reverse('products-list-create'), {'name': 'x', 'price': 1}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_rebuild_is_single_flight(self):
+        cache = EffectivePermissionCache()
+        calls = []
+
+        def builder():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'products': {}}
+
+        threads = [
+            threading.Thread(target=cache._get_or_build, args=('key', builder))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert cache.stats()['entries'] == 1
+
+    def test_entry_timeout_is_capped_for_process_local_cache(self):
+        cache = EffectivePermissionCache(timeout=60)
+
+        # Тесты работают на LocMemCache: смена версии в другом воркере не видна
+        with mock.patch.object(cache.tiered.shared, 'set') as shared_set:
+            cache._get_or_build('key', lambda: {'products': {}})
+        assert shared_set.call_args.kwargs['timeout'] <= PROCESS_LOCAL_TIMEOUT
+
+        with mock.patch('apps.access.services.is_shared_cache', return_value=True):
+            assert cache.entry_timeout() == 60
+
+    def test_version_is_bumped_only_after_commit(self, rbac_setup, django_capture_on_commit_callbacks):
+        version = get_permission_version()
+        rule = AccessRolesRules.objects.get(role=rbac_setup['user'], element=rbac_setup['products'])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            rule.save()
+            assert get_permission_version() == version
+
+        assert get_permission_version() != version
+
+    def test_manifest_etag_follows_content_not_cache_version(self, rbac_setup, django_capture_on_commit_callbacks):
+        client = make_client('etag@test.com', rbac_setup['user'])
+        etag = client.get(reverse('my-permissions'))['ETag']
+
+        # Смена версии без смены прав (например, в другом воркере) не сбрасывает ETag
+        permission_cache.clear()
+        assert client.get(reverse('my-permissions'), HTTP_IF_NONE_MATCH=etag).status_code == \
+            status.HTTP_304_NOT_MODIFIED
+
+        rule = AccessRolesRules.objects.get(role=rbac_setup['user'], element=rbac_setup['products'])
+        rule.create_permission = True
+        with django_capture_on_commit_callbacks(execute=True):
+            rule.save()
+
+        response = client.get(reverse('my-permissions'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_stats_endpoint_requires_admin(self, rbac_setup):
+        user_client = make_client('plain@test.com', rbac_setup['user'])
+        admin_client = make_client('boss@test.com', rbac_setup['admin'])
+
+        assert user_client.get(reverse('permission-cache-stats')).status_code == status.HTTP_403_FORBIDDEN
+
+        response = admin_client.get(reverse('permission-cache-stats'))
+        assert response.status_code == status.HTTP_200_OK
+        assert {'entries', 'hits', 'misses', 'hit_ratio'} <= set(response.data)
@@ -0,0 +1,159 @@
+import json
+import pstats
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.access.tests.helpers import make_client
+from apps.core import profiling as profiling_module
+from apps.core.profiling import ContinuousProfiler, RateSampler, StackSampler
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    def _configure(**overrides):
+        settings.PROFILING = {**settings.PROFILING, 'ENABLED': True, 'DIR': tmp_path, **overrides}
+        return tmp_path
+
+    return _configure
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+@pytest.mark.django_db
+class TestProfilingMiddleware:
+    def test_admin_gets_text_report(self, profiling):
+        profiling()
+        client = make_client('admin@test.com', 'admin')
+
+        response = client.get(reverse('products-list-create'), HTTP_X_PROFILE='text')
+
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert 'cumulative' in body
+        assert 'SQL: ' in body and 'FROM "user_roles"' in body
+
+    def test_admin_profile_is_stored(self, profiling):
+        directory = profiling()
+        client = make_client('admin@test.com', 'admin')
+
+        response = client.get(reverse('products-list-create') + '?profile=1')
+
+        assert response.status_code == 200
+        profile_id = response['X-Profile-Id']
+        assert {path.name for path in directory.iterdir()} == {
+            f"{profile_id}.prof", f"{profile_id}.collapsed", f"{profile_id}.sql.json"
+        }
+        assert pstats.Stats(str(directory / f"{profile_id}.prof")).total_calls > 0
+        stacks = (directory / f"{profile_id}.collapsed").read_text().splitlines()
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in stacks)
+        assert json.loads((directory / f"{profile_id}.sql.json").read_text())['queries']
+
+    def test_ignored_for_non_admins(self, profiling):
+        directory = profiling()
+        client = make_client('user@test.com', 'user')
+
+        response = client.get(reverse('products-list-create'), HTTP_X_PROFILE='text')
+
+        assert response['Content-Type'] == 'application/json'
+        assert 'X-Profile-Id' not in response
+        assert not list(directory.iterdir())
+
+    def test_background_sampling(self, profiling):
+        directory = profiling(SAMPLE_PER_MINUTE=1)
+        client = APIClient()
+
+        client.get(reverse('products-list-create'))
+        client.get(reverse('products-list-create'))
+
+        assert len(list(directory.glob('*.prof'))) == 1
+
+
+class TestProfilingHelpers:
+    def test_rate_sampler(self):
+        sampler = RateSampler(per_minute=2)
+
+        assert [sampler.should_sample() for _ in range(3)] == [True, True, False]
+        assert not RateSampler(per_minute=0).should_sample()
+
+    def test_stack_sampler_collapses_stacks(self):
+        done = threading.Event()
+
+        def busy():
+            while not done.is_set():
+                fib(15)
+
+        worker = threading.Thread(target=busy)
+        worker.start()
+        sampler = StackSampler(interval=0.001, thread_ids={worker.ident})
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+        done.set()
+        worker.join()
+
+        assert sampler.samples > 0
+        stacks = sampler.collapsed().splitlines()
+        assert stacks and all('busy (test_profiling.py' in line for line in stacks)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in stacks)
+
+
+class TestContinuousProfiling:
+    def test_flush_writes_window_and_rotates(self, tmp_path, monkeypatch):
+        timestamps = iter(['20240101-000000', '20240101-000100', '20240101-000200'])
+        monkeypatch.setattr(profiling_module.time, 'strftime', lambda fmt: next(timestamps))
+        profiler = ContinuousProfiler(tmp_path, interval=0.001, flush_interval=60, max_files=2)
+        paths = []
+        for window in range(3):
+            profiler.sampler.counts = {f'main (app.py:1);view{window} (views.py:10)': 5}
+            paths.append(profiler.flush())
+
+        assert profiler.flush() is None
+        assert sorted(tmp_path.iterdir()) == [tmp_path / path for path in paths[1:]]
+        assert (tmp_path / paths[2]).read_text() == 'main (app.py:1);view2 (views.py:10) 5\n'
+
+    @pytest.mark.django_db
+    def test_middleware_samples_only_request_threads(self, settings, tmp_path, monkeypatch):
+        settings.PROFILING = {**settings.PROFILING, 'CONTINUOUS': True, 'CONTINUOUS_DIR': tmp_path}
+        profiler = ContinuousProfiler(tmp_path, interval=0.001, flush_interval=3600, max_files=5)
+        monkeypatch.setattr(profiling_module, '_continuous_profiler', profiler)
+        client = APIClient()
+
+        for _ in range(200):
+            client.get(reverse('products-list-create'))
+            if profiler.sampler.counts:
+                break
+        profiler.sampler.stop()
+
+        assert not profiler.active_threads
+        stacks = profiler.sampler.collapsed().splitlines()
+        assert stacks and all('__call__ (middleware.py' in line for line in stacks)
+
+
+class TestMergeStacksCommand:
+    def test_merges_worker_files(self, tmp_path):
+        (tmp_path / 'stacks-100-20240101-000000.collapsed').write_text('a;b 2\na;c 1\n')
+        (tmp_path / 'stacks-200-20240101-000000.collapsed').write_text('a;b 3\n')
+        output = tmp_path / 'merged.txt'
+
+        call_command('merge_stacks', dir=str(tmp_path), output=str(output))
+
+        assert output.read_text() == 'a;b 5\na;c 1\n'
+
+    def test_top_leaves(self, tmp_path, capsys):
+        (tmp_path / 'stacks-100-20240101-000000.collapsed').write_text('a;b 3\nx;b 1\na;c 1\n')
+
+        call_command('merge_stacks', dir=str(tmp_path), top=1)
+
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1 and lines[0].split() == ['80.00%', '4', 'b']
+
+    def test_empty_directory(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command('merge_stacks', dir=str(tmp_path))
@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+from django.urls import reverse
+from apps.access.models import BusinessElement
+from apps.access.tests.helpers import ListHandler, make_client
+from apps.core.instrumentation import (
+    QueryBudgetExceeded, fingerprint, query_budget, query_budget_exempt,
+)
+from apps.core.metrics import registry
+
+
+@pytest.fixture
+def budgets(settings):
+    def _configure(**overrides):
+        settings.QUERY_INSPECTION = {**settings.QUERY_INSPECTION, **overrides}
+
+    return _configure
+
+
+class TestFingerprint:
+    def test_literals_and_lists_are_normalized(self):
+        first = fingerprint('SELECT "id" FROM "roles" WHERE "id" IN (%s, %s, %s) AND "name" = \'admin\'')
+        second = fingerprint('SELECT  "id" FROM "roles"\nWHERE "id" IN (%s) AND "name" = \'guest\'')
+
+        assert first == second == 'SELECT "id" FROM "roles" WHERE "id" IN (...) AND "name" = ?'
+
+    def test_bulk_insert_values_are_collapsed(self):
+        sql = 'INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s), (%s, %s)'
+
+        assert fingerprint(sql) == 'INSERT INTO "t" ("a", "b") VALUES (?, ?), ...'
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    def test_scope_budget_raises_in_tests(self, budgets):
+        budgets(BUDGETS={'scope': 1})
+
+        with query_budget('scope'):
+            list(BusinessElement.objects.all())
+
+        with pytest.raises(QueryBudgetExceeded, match="'scope': 2 > 1"):
+            with query_budget('scope'):
+                list(BusinessElement.objects.all())
+                list(BusinessElement.objects.all())
+
+    def test_exempt_queries_are_not_counted(self, budgets):
+        budgets(BUDGETS={'scope': 0})
+
+        with query_budget('scope'):
+            with query_budget_exempt():
+                list(BusinessElement.objects.all())
+
+    def test_warn_mode_logs_instead_of_raising(self, budgets):
+        budgets(BUDGETS={'scope': 0}, BUDGET_MODE='warn')
+        handler = ListHandler()
+        logger = logging.getLogger('apps.core.instrumentation')
+        logger.addHandler(handler)
+        try:
+            with query_budget('scope'):
+                list(BusinessElement.objects.all())
+        finally:
+            logger.removeHandler(handler)
+
+        assert "Query budget exceeded for 'scope': 1 > 0" in handler.records[0].getMessage()
+
+    def test_permission_check_stays_within_one_query(self, budgets):
+        # Холодный путь перестраивает кэш прав (не учитывается), тёплый - только роли пользователя
+        budgets(BUDGETS={'permission': 1})
+        client = make_client('user@test.com', 'user')
+
+        for _ in range(2):
+            assert client.get(reverse('products-list-create')).status_code == 200
+
+    def test_view_budget_is_enforced(self, budgets):
+        client = make_client('user@test.com', 'user')
+        budgets(BUDGETS={'GET products-list-create': 1})
+
+        with pytest.raises(QueryBudgetExceeded, match="'GET products-list-create': 4 > 1"):
+            client.get(reverse('products-list-create'))
+
+
+@pytest.mark.django_db
+class TestSlowQueriesAndFingerprints:
+    def test_slow_queries_are_logged_with_view(self, budgets):
+        budgets(SLOW_QUERY_MS=0)
+        client = make_client('user@test.com', 'user')
+        handler = ListHandler()
+        logger = logging.getLogger('apps.core.instrumentation')
+        logger.addHandler(handler)
+        try:
+            client.get(reverse('products-list-create'))
+        finally:
+            logger.removeHandler(handler)
+
+        assert handler.records
+        assert all(record.view == 'products-list-create' for record in handler.records)
+
+    def test_top_fingerprints_in_metrics(self):
+        registry.clear()
+        client = make_client('admin@test.com', 'admin')
+        client.get(reverse('role-list'))
+
+        body = client.get(reverse('metrics')).content.decode()
+
+        assert 'db_query_fingerprint_calls_total{view="role-list",fingerprint="SELECT' in body
+        assert 'db_query_fingerprint_seconds_total{view="login"' in body
@@ -0,0 +1,149 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from apps.access.models import AccessRolesRules, BusinessElement
+from apps.access.tests.helpers import make_client
+from apps.core.query_cache import TableVersions, query_cache, sql_tables, table_versions
+from apps.users.models import Role, User, UserRole
+
+
+def names(queryset):
+    return sorted(element.name for element in queryset)
+
+
+class TestSqlTables:
+    def test_joins_and_subqueries(self):
+        rules = AccessRolesRules.objects.select_related('role', 'element')
+        assert sql_tables(str(rules.query)) == {'access_roles_rules', 'roles', 'business_elements'}
+
+        in_subquery = Role.objects.filter(id__in=UserRole.objects.values('role_id'))
+        assert sql_tables(str(in_subquery.query)) == {'roles', 'user_roles'}
+
+
+@pytest.mark.django_db
+class TestCachingQuerySet:
+    def test_repeated_query_is_served_from_cache(self):
+        with CaptureQueriesContext(connection) as first:
+            expected = names(BusinessElement.objects.cache())
+        with CaptureQueriesContext(connection) as second:
+            assert names(BusinessElement.objects.cache()) == expected
+            assert BusinessElement.objects.cache().filter(name='products').count() == 1
+            assert BusinessElement.objects.cache().filter(name='products').count() == 1
+
+        assert len(first) == 1
+        assert len(second) == 1
+
+    def test_result_shape_is_part_of_key(self):
+        # values(), values_list() и only() с теми же колонками дают одинаковый SQL
+        elements = BusinessElement.objects.cache().filter(name='products')
+
+        assert list(elements.values_list('name')) == [('products',)]
+        assert list(elements.values_list('name', flat=True)) == ['products']
+        assert list(elements.values('name')) == [{'name': 'products'}]
+        assert list(elements.values_list('name', named=True))[0].name == 'products'
+
+        element = elements.only('id', 'name').get()
+        assert isinstance(element, BusinessElement)
+        assert list(elements.values_list('id', 'name')) == [(element.id, 'products')]
+
+    def test_uncached_queryset_always_hits_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(BusinessElement.objects.all())
+            list(BusinessElement.objects.all())
+
+        assert len(queries) == 2
+
+    def test_committed_write_bumps_table_version(self, django_capture_on_commit_callbacks):
+        before = names(BusinessElement.objects.cache())
+        version = table_versions.get({'business_elements'})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            BusinessElement.objects.create(name='reports')
+
+        assert table_versions.get({'business_elements'}) != version
+        assert names(BusinessElement.objects.cache()) == sorted([*before, 'reports'])
+
+    def test_bulk_update_through_other_manager_invalidates(self, django_capture_on_commit_callbacks):
+        rules = AccessRolesRules.objects.cache().filter(delete_all_permission=True)
+        count = rules.count()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            AccessRolesRules.hot.update(delete_all_permission=True)
+
+        assert rules.count() == AccessRolesRules.objects.count() > count
+
+    def test_uncommitted_write_bypasses_cache(self):
+        names(BusinessElement.objects.cache())
+        BusinessElement.objects.create(name='drafts')
+
+        with CaptureQueriesContext(connection) as queries:
+            assert 'drafts' in names(BusinessElement.objects.cache())
+            assert 'drafts' in names(BusinessElement.objects.cache())
+
+        # Пока транзакция не закоммичена, результат не кэшируется
+        assert len(queries) == 2
+
+    def test_evicted_table_version_does_not_restart(self):
+        worker_a, worker_b = TableVersions(), TableVersions()
+        before = worker_b.get({'roles'})
+
+        worker_a.bump({'roles'})
+        worker_a.shared.delete(worker_a.key('roles'))
+
+        assert worker_b.get({'roles'}) != before
+
+    def test_disabled(self, settings):
+        settings.QUERY_CACHE = {**settings.QUERY_CACHE, 'ENABLED': False}
+
+        with CaptureQueriesContext(connection) as queries:
+            list(BusinessElement.objects.cache())
+            list(BusinessElement.objects.cache())
+
+        assert len(queries) == 2
+
+
+@pytest.mark.django_db
+class TestAdminListingsCache:
+    def test_role_list_reflects_role_assignment(self, django_capture_on_commit_callbacks, settings):
+        # Только кэш запросов: готовый ответ отдал бы ResponseCacheMixin
+        settings.RESPONSE_CACHE = {**settings.RESPONSE_CACHE, 'ENABLED': False}
+        with django_capture_on_commit_callbacks(execute=True):
+            client = make_client('admin@test.com', 'admin')
+            User.objects.create_user(email='member@test.com', first_name='M', last_name='M', password='x')
+
+        def manager_users_count():
+            roles = client.get(reverse('role-list')).data['results']
+            return next(role['users_count'] for role in roles if role['name'] == 'manager')
+
+        before = manager_users_count()
+        assert manager_users_count() == before
+        assert query_cache.stats()['hits'] >= 1
+
+        member = User.objects.get(email='member@test.com')
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse('assign-role'), {
+                'user_id': member.id, 'role_id': Role.objects.get(name='manager').id,
+            }, format='json')
+        assert response.status_code == 201
+
+        assert manager_users_count() == before + 1
+
+    def test_rules_by_role_reflects_rule_change(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            client = make_client('admin@test.com', 'admin')
+
+        def can_create():
+            rules = client.get(reverse('access-rule-by-role'), {'role_name': 'user'}).data
+            return {rule['element_name']: rule['create_permission'] for rule in rules}
+
+        before = can_create()
+        assert can_create() == before
+
+        rule = AccessRolesRules.objects.filter(role__name='user').select_related('element').first()
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.patch(reverse('access-rule-detail', args=[rule.id]),
+                                    {'create_permission': not rule.create_permission}, format='json')
+        assert response.status_code == 200
+
+        assert can_create() == {**before, rule.element.name: not rule.create_permission}
@@ -0,0 +1,82 @@
+import pytest
+from django.utils import timezone
+from apps.core.renderers import ORJSONRenderer
+from apps.users.models import User, Role, UserRole
+from apps.access.models import BusinessElement, AccessRolesRules
+from apps.access.serializers import BusinessElementSerializer, AccessRolesRulesSerializer
+from apps.access.read_models import BusinessElementReadModel, AccessRolesRulesReadModel, RoleUsersReadModel
+
+
+def render(data):
+    return ORJSONRenderer().render(data)
+
+
+@pytest.fixture
+def rules(db):
+    role = Role.objects.create(name='auditor')
+    elements = [
+        BusinessElement.objects.create(name='invoices', description='Счета'),
+        BusinessElement.objects.create(name='reports'),
+    ]
+    AccessRolesRules.objects.create(role=role, element=elements[0], read_all_permission=True, delete_permission=True)
+    AccessRolesRules.objects.create(role=role, element=elements[1])
+    return AccessRolesRules.objects.select_related('role', 'element')
+
+
+@pytest.mark.django_db
+class TestReadModels:
+    def test_access_rules_match_serializer(self, rules):
+        expected = AccessRolesRulesSerializer(rules, many=True).data
+
+        assert render(AccessRolesRulesReadModel().serialize(rules)) == render(expected)
+
+    def test_business_elements_match_serializer(self, rules):
+        elements = BusinessElement.objects.all()
+        expected = BusinessElementSerializer(elements, many=True).data
+
+        assert render(BusinessElementReadModel().serialize(elements)) == render(expected)
+
+    def test_match_serializer_in_other_timezone(self, rules):
+        expected = AccessRolesRulesSerializer(rules, many=True).data
+
+        with timezone.override('Asia/Bishkek'):
+            assert render(AccessRolesRulesReadModel().serialize(rules)) != render(expected)
+            expected = AccessRolesRulesSerializer(rules, many=True).data
+            assert render(AccessRolesRulesReadModel().serialize(rules)) == render(expected)
+
+    def test_field_subset(self, rules):
+        read_model = AccessRolesRulesReadModel(field_names=['element_name', 'permissions_summary'])
+
+        assert read_model.columns[0] == 'element__name'
+        assert 'role__name' not in read_model.columns
+        assert read_model.serialize(rules.filter(element__name='invoices')) == [
+            {'element_name': 'invoices', 'permissions_summary': 'Читать все, Удалять свои'}
+        ]
+
+    def test_compiled_once_per_field_set(self):
+        subset = AccessRolesRulesReadModel.for_fields(['element_name', 'unknown', 'permissions_summary'])
+
+        assert AccessRolesRulesReadModel.for_fields(['element_name', 'permissions_summary']) is subset
+        assert AccessRolesRulesReadModel.for_fields() is AccessRolesRulesReadModel.for_fields(None)
+        assert AccessRolesRulesReadModel.for_fields() is not subset
+        assert BusinessElementReadModel.for_fields() is not AccessRolesRulesReadModel.for_fields()
+
+    def test_role_users_match_previous_format(self, db):
+        role = Role.objects.create(name='auditor')
+        for i in range(3):
+            user = User.objects.create(email=f'u{i}@test.com', first_name='Имя', last_name=f'Фамилия{i}')
+            UserRole.objects.create(user=user, role=role)
+
+        user_roles = UserRole.objects.filter(role=role).select_related('user')
+        expected = [
+            {
+                'id': ur.user.id,
+                'email': ur.user.email,
+                'first_name': ur.user.first_name,
+                'last_name': ur.user.last_name,
+                'assigned_at': ur.assigned_at
+            }
+            for ur in user_roles
+        ]
+
+        assert render(RoleUsersReadModel().serialize(UserRole.objects.filter(role=role))) == render(expected)
@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+import msgpack
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from apps.users.models import Role
+from apps.access.models import AccessRolesRules
+from apps.access.serializers import AccessRolesRulesSerializer
+from apps.core.renderers import ORJSONRenderer
+
+
+@pytest.mark.django_db
+class TestRenderers:
+    def test_orjson_output_matches_drf_json(self, admin_client):
+        rules = AccessRolesRules.objects.select_related('role', 'element')
+        data = AccessRolesRulesSerializer(rules, many=True).data
+        data.append({'text': 'строка перенос', 'price': 1.5, 'empty': None})
+
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    @pytest.mark.parametrize('value', [float('nan'), float('inf'), Decimal('NaN')])
+    def test_orjson_rejects_non_finite_floats_like_drf(self, value):
+        data = {'price': value, 'empty': None}
+
+        with pytest.raises(ValueError):
+            JSONRenderer().render(data)
+        with pytest.raises(ValueError):
+            ORJSONRenderer().render(data)
+
+    def test_orjson_renders_big_integers_like_drf(self):
+        data = {'big': 2 ** 64 + 1, 'negative': -2 ** 70}
+
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_json_is_default(self, admin_client):
+        response = admin_client.get(reverse('access-rule-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+
+    def test_msgpack_selected_by_accept_header(self, admin_client):
+        response = admin_client.get(reverse('access-rule-list'), HTTP_ACCEPT='application/msgpack')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/msgpack'
+        payload = msgpack.unpackb(response.content, raw=False)
+        assert 'products' in {rule['element_name'] for rule in payload['results']}
+
+    def test_msgpack_request_body(self, admin_client):
+        body = msgpack.packb({'name': 'msgpack_role', 'description': 'Роль из MessagePack'})
+
+        response = admin_client.post(reverse('role-list'), body, content_type='application/msgpack')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Role.objects.filter(name='msgpack_role').exists()
@@ -0,0 +1,125 @@
+import sqlite3
+
+import pytest
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import CommandError
+from django.db import connections
+from django.urls import reverse
+from apps.access.models import AccessDecisionLog
+from apps.access.tests.helpers import make_client
+from apps.core.db import ReplicaRouter, route_reads, use_primary
+from apps.core.middleware import ReplicaRoutingMiddleware
+from apps.users.models import User
+
+REPLICA = 'replica_test'
+COPIED_TABLES = ('users', 'roles', 'user_roles', 'business_elements', 'access_roles_rules')
+
+
+def clone_to_sqlite(path):
+    """
+    Схема и данные default в отдельный файл: так реплика видит состояние на момент копии,
+    включая незакоммиченные данные транзакции теста.
+    """
+    target = sqlite3.connect(path)
+    with connections['default'].cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+        for (sql,) in cursor.fetchall():
+            target.execute(sql)
+        for table in COPIED_TABLES:
+            cursor.execute(f'SELECT * FROM "{table}"')
+            rows = cursor.fetchall()
+            if rows:
+                placeholders = ', '.join('?' * len(rows[0]))
+                target.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
+    target.commit()
+    target.close()
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DB_REPLICAS = {**settings.DB_REPLICAS, 'ALIASES': [REPLICA]}
+    return settings
+
+
+@pytest.fixture
+def sqlite_replica(replicas, tmp_path):
+    # Закрепление за default требует кэш, общий для воркеров
+    replicas.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path / 'cache')}
+    }
+    connections.settings[REPLICA] = {**connections['default'].settings_dict, 'NAME': str(tmp_path / 'replica.sqlite3')}
+
+    def sync():
+        clone_to_sqlite(connections.settings[REPLICA]['NAME'])
+
+    yield sync
+
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.settings[REPLICA]
+
+
+class TestReplicaRouter:
+    def test_reads_outside_requests_are_not_routed(self, replicas):
+        assert ReplicaRouter().db_for_read(User) is None
+
+    def test_write_pins_following_reads_to_primary(self, replicas):
+        router = ReplicaRouter()
+
+        with route_reads(REPLICA) as state:
+            assert router.db_for_read(User) == REPLICA
+            # Аудит не требует read-your-writes
+            assert router.db_for_write(AccessDecisionLog) == 'default'
+            assert router.db_for_read(User) == REPLICA
+
+            assert router.db_for_write(User) == 'default'
+            assert state.pinned and router.db_for_read(User) == 'default'
+
+    def test_use_primary(self, replicas):
+        router = ReplicaRouter()
+
+        with route_reads(REPLICA):
+            with use_primary():
+                assert router.db_for_read(User) == 'default'
+            assert router.db_for_read(User) == REPLICA
+
+    def test_replicas_are_not_migrated(self, replicas):
+        assert ReplicaRouter().allow_migrate(REPLICA, 'users') is False
+        assert ReplicaRouter().allow_migrate('default', 'users') is None
+
+
+@pytest.mark.django_db
+class TestReplicaRouting:
+    def test_safe_reads_go_to_replica_until_user_writes(self, sqlite_replica):
+        client = make_client('replica@test.com', 'user')
+        sqlite_replica()
+        User.objects.filter(email='replica@test.com').update(first_name='Primary')
+
+        # JWT-пользователь и профиль читаются с реплики - там ещё старое имя
+        assert client.get(reverse('profile')).data['first_name'] == 'Test'
+
+        response = client.patch(reverse('profile-update'), {'first_name': 'Updated'}, format='json')
+        assert response.status_code == 200
+
+        # После записи пользователь закреплён за default и видит свои изменения
+        assert client.get(reverse('profile')).data['first_name'] == 'Updated'
+
+    def test_requires_shared_cache(self, replicas):
+        with pytest.raises(ImproperlyConfigured):
+            ReplicaRoutingMiddleware(lambda request: None)
+
+    def test_unsafe_requests_read_primary(self, sqlite_replica):
+        client = make_client('writer@test.com', 'user')
+        sqlite_replica()
+        User.objects.filter(email='writer@test.com').update(first_name='Primary')
+
+        response = client.patch(reverse('profile-update'), {'last_name': 'Changed'}, format='json')
+
+        assert response.data['user']['first_name'] == 'Primary'
+
+
+class TestSyncSqliteReplicas:
+    def test_requires_replicas(self):
+        with pytest.raises(CommandError):
+            call_command('sync_sqlite_replicas')
@@ -0,0 +1,95 @@
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from apps.access.models import BusinessElement
+from apps.access.views import BusinessElementViewSet, RoleViewSet
+from apps.access.tests.helpers import make_client
+from apps.users.models import Role, User
+
+
+@pytest.fixture
+def admin_client(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return make_client('admin@test.com', 'admin')
+
+
+def role_counts(response):
+    return {role['name']: role['users_count'] for role in response.json()['results']}
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_repeated_list_skips_orm_and_serializer(self, admin_client):
+        first = admin_client.get(reverse('role-list'))
+
+        with mock.patch.object(RoleViewSet, 'get_queryset', side_effect=AssertionError), \
+                mock.patch.object(RoleViewSet, 'get_serializer', side_effect=AssertionError):
+            second = admin_client.get(reverse('role-list'))
+
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second['Content-Type'] == first['Content-Type']
+        assert second['ETag'] == first['ETag']
+
+    def test_query_params_are_part_of_key(self, admin_client):
+        full = admin_client.get(reverse('business-element-list'))
+        names_only = admin_client.get(reverse('business-element-list'), {'fields': 'name'})
+
+        assert set(names_only.json()['results'][0]) == {'name'}
+        assert full.content != names_only.content
+
+    def test_host_is_part_of_key(self, admin_client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            BusinessElement.objects.bulk_create(BusinessElement(name=f'element_{i}') for i in range(20))
+
+        first = admin_client.get(reverse('business-element-list'), HTTP_HOST='api.example.com')
+        second = admin_client.get(reverse('business-element-list'), HTTP_HOST='admin.example.com', secure=True)
+
+        assert first.json()['next'].startswith('http://api.example.com/')
+        assert second.json()['next'].startswith('https://admin.example.com/')
+
+    def test_if_none_match_returns_304(self, admin_client):
+        etag = admin_client.get(reverse('business-element-list'))['ETag']
+
+        response = admin_client.get(reverse('business-element-list'), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_role_assignment_invalidates(self, admin_client, django_capture_on_commit_callbacks):
+        before = role_counts(admin_client.get(reverse('role-list')))
+        with django_capture_on_commit_callbacks(execute=True):
+            member = User.objects.create_user(email='member@test.com', first_name='M', last_name='M', password='x')
+            admin_client.post(reverse('assign-role'), {
+                'user_id': member.id, 'role_id': Role.objects.get(name='manager').id,
+            }, format='json')
+
+        assert role_counts(admin_client.get(reverse('role-list')))['manager'] == before['manager'] + 1
+
+    def test_business_element_change_invalidates(self, admin_client, django_capture_on_commit_callbacks):
+        etag = admin_client.get(reverse('business-element-list'))['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            BusinessElement.objects.create(name='catalog')
+
+        response = admin_client.get(reverse('business-element-list'), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert 'catalog' in {element['name'] for element in response.json()['results']}
+
+    def test_browsable_api_is_not_cached(self, admin_client, settings):
+        # Формы BrowsableAPIRenderer делают свои запросы сверх бюджета списка
+        settings.QUERY_INSPECTION = {**settings.QUERY_INSPECTION, 'BUDGET_MODE': 'warn'}
+        admin_client.get(reverse('business-element-list'), HTTP_ACCEPT='text/html')
+
+        with mock.patch.object(BusinessElementViewSet, 'get_queryset', side_effect=AssertionError):
+            with pytest.raises(AssertionError):
+                admin_client.get(reverse('business-element-list'), HTTP_ACCEPT='text/html')
+
+    def test_permissions_checked_before_cache(self, admin_client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            client = make_client('plain@test.com', 'user')
+        assert admin_client.get(reverse('role-list')).status_code == 200
+
+        assert client.get(reverse('role-list')).status_code == 403
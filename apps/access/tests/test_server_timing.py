@@ -0,0 +1,49 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.access.tests.helpers import make_client
+
+
+def parse_server_timing(header):
+    phases = {}
+    for item in header.split(', '):
+        name, *params = item.split(';')
+        phases[name] = dict(param.split('=', 1) for param in params)
+    return phases
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+    def test_admin_gets_phase_breakdown(self):
+        client = make_client('admin@test.com', 'admin')
+
+        response = client.get(reverse('products-list-create'), HTTP_X_SERVER_TIMING='1')
+
+        assert response.status_code == status.HTTP_200_OK
+        phases = parse_server_timing(response['Server-Timing'])
+        assert {'auth', 'perm', 'render', 'db', 'total'} <= set(phases)
+        assert float(phases['total']['dur']) >= float(phases['perm']['dur'])
+        assert phases['auth']['desc'] != '"0 queries"'
+
+    def test_not_sent_without_request_header(self):
+        client = make_client('admin@test.com', 'admin')
+
+        response = client.get(reverse('products-list-create'))
+
+        assert 'Server-Timing' not in response
+
+    def test_not_sent_to_regular_users(self):
+        client = make_client('user@test.com', 'user')
+
+        response = client.get(reverse('products-list-create'), HTTP_X_SERVER_TIMING='1')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Server-Timing' not in response
+
+    def test_always_mode(self, settings):
+        settings.SERVER_TIMING = {**settings.SERVER_TIMING, 'ALWAYS': True}
+
+        response = APIClient().get(reverse('products-list-create'))
+
+        assert 'total;dur=' in response['Server-Timing']
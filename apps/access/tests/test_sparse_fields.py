@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from apps.users.models import Role, UserRole
+from apps.access.models import BusinessElement, AccessRolesRules
+
+
+@pytest.fixture
+def reports_rule(db):
+    admin_role = Role.objects.get(name='admin')
+    reports = BusinessElement.objects.create(name='reports')
+    return AccessRolesRules.objects.create(
+        role=admin_role,
+        element=reports,
+        read_permission=True,
+        create_permission=True
+    )
+
+
+def _select_sql(queries, table):
+    return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def test_fields_limit_output_and_columns(self, admin_client):
+        with CaptureQueriesContext(connection) as ctx:
+            response = admin_client.get(reverse('access-rule-list'), {'fields': 'id,element_name,create_permission'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'element_name', 'create_permission'}
+
+        selected_columns = _select_sql(ctx.captured_queries, 'access_roles_rules')[-1].split(' FROM ')[0]
+        assert '"business_elements"."name"' in selected_columns
+        assert '"read_all_permission"' not in selected_columns
+        assert '"roles".' not in selected_columns
+
+    def test_computed_field_requested_explicitly(self, admin_client, reports_rule):
+        response = admin_client.get(reverse('access-rule-list'), {'fields': 'id,permissions_summary'})
+
+        assert response.status_code == status.HTTP_200_OK
+        rule = next(r for r in response.data['results'] if r['id'] == reports_rule.id)
+        assert rule == {'id': rule['id'], 'permissions_summary': 'Читать свои, Создавать'}
+
+    def test_exclude(self, admin_client):
+        response = admin_client.get(reverse('business-element-list'), {'exclude': 'description,created_at'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'name'}
+
+    def test_users_count_skipped_unless_requested(self, admin_client):
+        with CaptureQueriesContext(connection) as ctx:
+            response = admin_client.get(reverse('role-list'), {'fields': 'id,name'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'name'}
+        assert not any('COUNT("user_roles"' in sql for sql in _select_sql(ctx.captured_queries, 'roles'))
+
+        response = admin_client.get(reverse('role-list'), {'fields': 'name,users_count'})
+        admin_row = next(r for r in response.data['results'] if r['name'] == 'admin')
+        assert admin_row['users_count'] == UserRole.objects.filter(role__name='admin').count()
+
+    def test_profile_fields(self, admin_client):
+        with CaptureQueriesContext(connection) as ctx:
+            response = admin_client.get(reverse('profile'), {'fields': 'email,first_name'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'email': 'admin@test.com', 'first_name': 'Admin'}
+        assert not _select_sql(ctx.captured_queries, 'user_roles')
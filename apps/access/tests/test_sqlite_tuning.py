@@ -0,0 +1,70 @@
+import fcntl
+
+import pytest
+from django.db import connections, transaction
+
+ALIAS = 'sqlite_tuning'
+
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    path = tmp_path / 'tuned.sqlite3'
+    connections.settings[ALIAS] = {**connections['default'].settings_dict, 'NAME': str(path)}
+
+    yield path
+
+    connections[ALIAS].close()
+    del connections[ALIAS]
+    del connections.settings[ALIAS]
+
+
+def pragma(name):
+    with connections[ALIAS].cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def write_lock_is_free(path):
+    with open(f'{path}-lock', 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        return True
+
+
+@pytest.mark.django_db
+class TestSqliteTuning:
+    def test_pragmas_applied_on_connect(self, sqlite_file):
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('temp_store') == 2  # MEMORY
+        assert pragma('cache_size') == -16000
+        assert pragma('foreign_keys') == 1
+
+    def test_disabled_keeps_sqlite_defaults(self, sqlite_file, settings):
+        settings.SQLITE_TUNING = {**settings.SQLITE_TUNING, 'ENABLED': False}
+
+        assert pragma('journal_mode') == 'delete'
+        assert pragma('synchronous') == 2  # FULL
+
+    def test_write_lock_held_for_transaction(self, sqlite_file, settings):
+        settings.SQLITE_TUNING = {**settings.SQLITE_TUNING, 'WRITE_LOCK': True}
+        connections[ALIAS].ensure_connection()
+
+        with transaction.atomic(using=ALIAS):
+            assert not write_lock_is_free(sqlite_file)
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute('CREATE TABLE t (id integer)')
+        assert write_lock_is_free(sqlite_file)
+
+        with pytest.raises(ZeroDivisionError):
+            with transaction.atomic(using=ALIAS):
+                1 / 0
+        assert write_lock_is_free(sqlite_file)
+
+    def test_without_write_lock_transactions_are_deferred(self, sqlite_file):
+        with transaction.atomic(using=ALIAS):
+            assert write_lock_is_free(sqlite_file)
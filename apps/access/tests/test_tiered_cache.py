@@ -0,0 +1,146 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from apps.core.cache import TieredCache
+
+
+def counting_loader(value):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return value
+
+    return loader, calls
+
+
+class TestTieredCache:
+    def test_second_process_reads_l2(self):
+        worker_a, worker_b = TieredCache('test'), TieredCache('test')
+        loader, calls = counting_loader({'a': 1})
+
+        assert worker_a.get_or_load('key', loader) == {'a': 1}
+        assert worker_b.get_or_load('key', loader) == {'a': 1}
+        assert worker_b.get_or_load('key', loader) == {'a': 1}
+
+        assert len(calls) == 1
+        assert worker_b.stats()['l2_hits'] == 1
+        assert worker_b.stats()['hits'] == 1
+
+    def test_bump_version_invalidates_all_processes(self):
+        worker_a, worker_b = TieredCache('test', VERSION_TIMEOUT=1), TieredCache('test', VERSION_TIMEOUT=1)
+        worker_a.set('key', 'old')
+        assert worker_b.get('key') == 'old'
+
+        worker_a.bump_version()
+
+        assert worker_a.get('key') is None
+        # Другой процесс перечитывает версию из L2 не позже VERSION_TIMEOUT
+        with mock.patch('apps.core.cache.time.monotonic', return_value=time.monotonic() + 2):
+            assert worker_b.get('key') is None
+
+    def test_l1_hit_does_not_read_l2(self):
+        cache = TieredCache('test')
+        cache.set('key', 'value')
+
+        with mock.patch.object(cache.shared, 'get', side_effect=AssertionError):
+            for _ in range(3):
+                assert cache.get_or_load('key', mock.Mock()) == 'value'
+
+    def test_evicted_version_does_not_restart_from_zero(self):
+        worker_a, worker_b = TieredCache('test', VERSION_TIMEOUT=0), TieredCache('test', VERSION_TIMEOUT=0)
+        worker_a.set('key', 'old')
+
+        worker_a.shared.delete(worker_a.version_key)
+
+        assert worker_b.get('key') is None
+        assert not worker_b.version().startswith('0.')
+        assert worker_a.version() == worker_b.version()
+
+    def test_namespaces_are_isolated(self):
+        users, roles = TieredCache('users'), TieredCache('roles')
+        users.set('key', 'user')
+        roles.set('key', 'role')
+
+        users.bump_version()
+
+        assert users.get('key') is None
+        assert roles.get('key') == 'role'
+
+    def test_negative_result_is_cached(self):
+        cache = TieredCache('test')
+        loader, calls = counting_loader(None)
+
+        assert cache.get_or_load('missing', loader) is None
+        assert cache.get_or_load('missing', loader) is None
+        assert cache.get('missing', 'default') == 'default'
+
+        assert len(calls) == 1
+
+    def test_timeout_is_jittered_down(self):
+        cache = TieredCache('test', TIMEOUT=100, JITTER=0.2, NEGATIVE_TIMEOUT=10)
+
+        with mock.patch.object(cache.shared, 'set') as shared_set:
+            for _ in range(20):
+                cache.set('key', 'value')
+            cache.set('missing', None)
+
+        timeouts = [call.kwargs['timeout'] for call in shared_set.call_args_list]
+        assert all(80 <= timeout <= 100 for timeout in timeouts[:-1])
+        assert len(set(timeouts[:-1])) > 1
+        assert 8 <= timeouts[-1] <= 10
+
+    def test_l1_is_bounded_lru(self):
+        cache = TieredCache('test', L1_MAX_ENTRIES=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.stats()['entries'] == 2
+        # Вытесненная из L1 запись читается из L2
+        assert cache.get_or_load('b', mock.Mock()) == 2
+        assert cache.get_or_load('c', mock.Mock()) == 3
+        assert cache.stats()['l2_hits'] == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_l1_entry_expires(self):
+        cache = TieredCache('test', L1_TIMEOUT=60)
+        cache.set('key', 'value')
+
+        with mock.patch('apps.core.cache.time.monotonic', return_value=time.monotonic() + 61):
+            assert cache.get_or_load('key', mock.Mock()) == 'value'
+
+        assert cache.stats()['l2_hits'] == 1
+
+    def test_load_is_single_flight(self):
+        cache = TieredCache('test')
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load('key', loader)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ['value'] * 8
+
+    def test_loader_error_is_not_cached(self):
+        cache = TieredCache('test')
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_load('key', mock.Mock(side_effect=RuntimeError))
+
+        assert cache.get_or_load('key', lambda: 'value') == 'value'
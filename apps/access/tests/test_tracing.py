@@ -0,0 +1,123 @@
+import json
+
+import pytest
+from django.urls import reverse
+from apps.access.tests.helpers import make_client
+from apps.core.tracing import FileSpanExporter, STATUS_ERROR, get_span_exporter, parse_traceparent, \
+    reset_span_exporter, span, start_trace
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+@pytest.fixture
+def tracing(settings):
+    def _configure(**overrides):
+        settings.TRACING = {**settings.TRACING, 'ENABLED': True, 'EXPORTER': 'memory', 'SAMPLE_RATE': 0.0,
+                            **overrides}
+        reset_span_exporter()
+        return get_span_exporter()
+
+    yield _configure
+    reset_span_exporter()
+
+
+def traceparent(flags='01'):
+    return f"00-{TRACE_ID}-{PARENT_ID}-{flags}"
+
+
+@pytest.mark.django_db
+class TestTracingMiddleware:
+    def test_continues_incoming_trace(self, tracing):
+        exporter = tracing()
+        client = make_client('user@test.com', 'user')
+
+        response = client.get(reverse('products-list-create'), HTTP_TRACEPARENT=traceparent())
+
+        assert response.status_code == 200
+        spans = [span_data for span_data in exporter.spans() if span_data['traceId'] == TRACE_ID]
+        root = spans[0]
+        assert root['name'] == 'GET /api/mock/products/'
+        assert root['kind'] == 2 and root['parentSpanId'] == PARENT_ID
+        names = {span_data['name'] for span_data in spans}
+        assert {'auth.jwt', 'jwt.decode', 'user.lookup', 'permission.check', 'SELECT default'} <= names
+        by_id = {span_data['spanId']: span_data for span_data in spans}
+        assert all(span_data['parentSpanId'] in by_id for span_data in spans[1:])
+        statement = next(span_data for span_data in spans if span_data['name'] == 'SELECT default')
+        assert {'key': 'db.system', 'value': {'stringValue': 'sqlite'}} in statement['attributes']
+
+    def test_tail_sampling_drops_fast_unsampled_traces(self, tracing):
+        exporter = tracing()
+        client = make_client('user@test.com', 'user')
+
+        client.get(reverse('products-list-create'))
+        client.get(reverse('products-list-create'), HTTP_TRACEPARENT=traceparent(flags='00'))
+
+        assert exporter.exported == []
+
+    def test_tail_sampling_keeps_slow_traces(self, tracing):
+        exporter = tracing(SLOW_MS=0)
+        client = make_client('user@test.com', 'user')
+
+        client.get(reverse('products-list-create'), HTTP_TRACEPARENT='garbage')
+
+        root = next(span_data for span_data in exporter.spans() if span_data['name'] == 'GET /api/mock/products/')
+        assert root['traceId'] != TRACE_ID and root['parentSpanId'] == ''
+
+    def test_login_has_bcrypt_span(self, tracing):
+        exporter = tracing(SLOW_MS=0)
+
+        make_client('user@test.com', 'user')
+
+        names = {span_data['name'] for span_data in exporter.spans()}
+        assert {'POST /api/login/', 'user.lookup', 'bcrypt.check', 'UPDATE default'} <= names
+
+
+class TestTracingHelpers:
+    def test_parse_traceparent(self):
+        assert parse_traceparent(traceparent()) == (TRACE_ID, PARENT_ID, True)
+        assert parse_traceparent(traceparent(flags='00'))[2] is False
+        assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+        assert parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01") is None
+        assert parse_traceparent(traceparent() + '-extra') is None
+        assert parse_traceparent('') is None
+
+    def test_span_outside_trace_is_noop(self):
+        with span('idle') as current:
+            current.set_attribute('key', 'value')
+
+    def test_exception_marks_span_as_error(self):
+        with start_trace() as trace:
+            with pytest.raises(ValueError):
+                with span('failing'):
+                    raise ValueError('boom')
+
+        failed = trace.spans[0]
+        assert failed.status == STATUS_ERROR and failed.end is not None
+        assert failed.events[0][1] == 'exception'
+
+    def test_span_limit(self):
+        with start_trace(max_spans=2) as trace:
+            for index in range(5):
+                with span(f"step-{index}"):
+                    pass
+
+        assert len(trace.spans) == 2 and trace.dropped_spans == 3
+
+    def test_file_exporter_writes_otlp_json(self, tmp_path):
+        path = tmp_path / 'traces.ndjson'
+        exporter = FileSpanExporter('test-service', path, queue_size=10)
+        with start_trace(traceparent()) as trace:
+            with span('work', answer=42):
+                pass
+
+        exporter._queue.put_nowait(trace)
+        exporter.flush()
+
+        payload = json.loads(path.read_text())
+        resource_spans = payload['resourceSpans'][0]
+        assert resource_spans['resource']['attributes'][0]['value'] == {'stringValue': 'test-service'}
+        exported = resource_spans['scopeSpans'][0]['spans'][0]
+        assert exported['traceId'] == TRACE_ID and exported['parentSpanId'] == PARENT_ID
+        assert exported['attributes'] == [{'key': 'answer', 'value': {'intValue': '42'}}]
+        assert int(exported['endTimeUnixNano']) >= int(exported['startTimeUnixNano'])
@@ -6,7 +6,9 @@ from .views import (
     AccessRolesRulesViewSet,
     assign_role,
     revoke_role,
-    my_permissions
+    my_permissions,
+    permission_cache_stats,
+    metrics_view
 )
 
 router = DefaultRouter()
@@ -19,4 +21,6 @@ urlpatterns = [
     path('assign-role/', assign_role, name='assign-role'),
     path('revoke-role/', revoke_role, name='revoke-role'),
     path('my-permissions/', my_permissions, name='my-permissions'),
+    path('permission-cache/stats/', permission_cache_stats, name='permission-cache-stats'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
\ No newline at end of file
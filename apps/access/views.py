@@ -2,8 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from .models import BusinessElement, AccessRolesRules
+from django.utils.http import parse_etags
+from .audit import audit
+from .models import BusinessElement, AccessRolesRules, AccessDecisionLog
 from apps.users.models import Role, UserRole
 from .serializers import (
     BusinessElementSerializer,
@@ -12,48 +16,92 @@ from .serializers import (
     AssignRoleSerializer,
     RevokeRoleSerializer
 )
-from apps.users.permissions import IsAuthenticatedAndVerified
+from apps.users.permissions import IsAuthenticatedAndVerified, is_admin_user
+from apps.core.mixins import (
+    CachedQuerysetMixin,
+    ResponseCacheMixin,
+    SparseFieldsetViewMixin,
+    ReadModelListMixin
+)
+from apps.core.metrics import render_metrics
+from .read_models import BusinessElementReadModel, AccessRolesRulesReadModel, RoleUsersReadModel
+from .services import (
+    permission_cache,
+    build_permissions_manifest,
+    permissions_manifest_etag
+)
 
 
 class IsAdmin(IsAuthenticatedAndVerified):
     def has_permission(self, request, view):
-        if not super().has_permission(request, view):
-            return False
-        return request.user.roles.filter(role__name='admin').exists()
+        return is_admin_user(request.user)
 
 
-class RoleViewSet(viewsets.ModelViewSet):
+class RoleViewSet(ResponseCacheMixin, CachedQuerysetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = [IsAdmin]
+    # users_count зависит от назначений ролей
+    response_cache_models = (Role, UserRole)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+
+        selected = self.get_requested_fields()
+        if selected is None or 'users_count' in selected:
+            queryset = queryset.annotate(users_count=Count('users'))
+        return queryset
 
     @action(detail=True, methods=['get'])
     def users(self, request, pk=None):
         role = self.get_object()
-        user_roles = UserRole.objects.filter(role=role).select_related('user')
-        users_data = [
-            {
-                'id': ur.user.id,
-                'email': ur.user.email,
-                'first_name': ur.user.first_name,
-                'last_name': ur.user.last_name,
-                'assigned_at': ur.assigned_at
-            }
-            for ur in user_roles
-        ]
+        users_data = RoleUsersReadModel.for_fields().serialize(UserRole.objects.filter(role=role))
         return Response(users_data)
 
 
-class BusinessElementViewSet(viewsets.ModelViewSet):
+class BusinessElementViewSet(
+    ResponseCacheMixin, CachedQuerysetMixin, ReadModelListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet
+):
     queryset = BusinessElement.objects.all()
     serializer_class = BusinessElementSerializer
+    read_model_class = BusinessElementReadModel
     permission_classes = [IsAdmin]
+    response_cache_models = (BusinessElement,)
 
 
-class AccessRolesRulesViewSet(viewsets.ModelViewSet):
+class AccessRolesRulesViewSet(CachedQuerysetMixin, ReadModelListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = AccessRolesRules.objects.all().select_related('role', 'element')
     serializer_class = AccessRolesRulesSerializer
+    read_model_class = AccessRolesRulesReadModel
     permission_classes = [IsAdmin]
+    cached_actions = ('list', 'by_role')
+
+    def perform_create(self, serializer):
+        rule = serializer.save()
+        self._audit_rule('rule_create', rule)
+
+    def perform_update(self, serializer):
+        rule = serializer.save()
+        self._audit_rule('rule_update', rule)
+
+    def perform_destroy(self, instance):
+        self._audit_rule('rule_delete', instance)
+        instance.delete()
+
+    def _audit_rule(self, action_name, rule):
+        audit(
+            self.request,
+            AccessDecisionLog.DECISION_ADMIN,
+            action_name,
+            element=rule.element.name,
+            details={
+                'rule_id': rule.id,
+                'role': rule.role.name,
+                'permissions': rule.get_permissions_summary(),
+            }
+        )
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -77,10 +125,9 @@ class AccessRolesRulesViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            role = Role.objects.get(name=role_name)
-            rules = AccessRolesRules.objects.filter(role=role)
-            serializer = self.get_serializer(rules, many=True)
-            return Response(serializer.data)
+            role = Role.objects.cache().get(name=role_name)
+            rules = self.get_queryset().filter(role=role)
+            return Response(self.get_read_model().serialize(rules))
         except Role.DoesNotExist:
             return Response(
                 {"error": "Роль не найдена"},
@@ -94,6 +141,12 @@ def assign_role(request):
     serializer = AssignRoleSerializer(data=request.data)
     if serializer.is_valid():
         user_role = serializer.save()
+        audit(
+            request,
+            AccessDecisionLog.DECISION_ADMIN,
+            'assign_role',
+            details={'user_id': user_role.user_id, 'role': user_role.role.name}
+        )
         return Response({
             "message": "Роль успешно назначена",
             "user_id": user_role.user.id,
@@ -113,6 +166,12 @@ def revoke_role(request):
         user_email = user_role.user.email
         role_name = user_role.role.name
         user_role.delete()
+        audit(
+            request,
+            AccessDecisionLog.DECISION_ADMIN,
+            'revoke_role',
+            details={'user_id': serializer.validated_data['user_id'], 'role': role_name}
+        )
         return Response({
             "message": "Роль успешно отозвана",
             "user_email": user_email,
@@ -125,43 +184,26 @@ def revoke_role(request):
 @permission_classes([IsAuthenticatedAndVerified])
 def my_permissions(request):
     user = request.user
-    user_roles = user.roles.all().values_list('role', flat=True)
-    rules = AccessRolesRules.objects.filter(role_id__in=user_roles).select_related('role', 'element')
-
-    permissions_by_element = {}
-    for rule in rules:
-        element_name = rule.element.name
-        if element_name not in permissions_by_element:
-            permissions_by_element[element_name] = {
-                'element': element_name,
-                'roles': [],
-                'permissions': {
-                    'read': False,
-                    'read_all': False,
-                    'create': False,
-                    'update': False,
-                    'update_all': False,
-                    'delete': False,
-                    'delete_all': False,
-                }
-            }
+    user_roles = list(user.roles.select_related('role'))
 
-        permissions_by_element[element_name]['roles'].append(rule.role.name)
-
-        perms = permissions_by_element[element_name]['permissions']
-        perms['read'] = perms['read'] or rule.read_permission
-        perms['read_all'] = perms['read_all'] or rule.read_all_permission
-        perms['create'] = perms['create'] or rule.create_permission
-        perms['update'] = perms['update'] or rule.update_permission
-        perms['update_all'] = perms['update_all'] or rule.update_all_permission
-        perms['delete'] = perms['delete'] or rule.delete_permission
-        perms['delete_all'] = perms['delete_all'] or rule.delete_all_permission
-
-    return Response({
-        'user': {
-            'id': user.id,
-            'email': user.email,
-            'roles': [ur.role.name for ur in user.roles.all()]
-        },
-        'permissions': list(permissions_by_element.values())
-    })
\ No newline at end of file
+    manifest = build_permissions_manifest(user, user_roles)
+    etag = permissions_manifest_etag(manifest)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    return Response(manifest, headers={'ETag': etag})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def permission_cache_stats(request):
+    return Response(permission_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def metrics_view(request):
+    """
+    Метрики всех воркеров в текстовом формате Prometheus.
+    """
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
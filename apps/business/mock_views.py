@@ -2,6 +2,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from apps.users.permissions import RoleBasedPermission
+from apps.access.services import get_effective_permissions
 
 # Тестовые данные
 MOCK_PRODUCTS = [
@@ -55,13 +56,8 @@ def products_list_create(request):
 
     if request.method == 'GET':
         user = request.user
-        user_role_ids = user.roles.all().values_list('role_id', flat=True)
-
-        from apps.access.models import AccessRolesRules, BusinessElement
-        element = BusinessElement.objects.get(name='products')
-        rules = AccessRolesRules.objects.filter(role_id__in=user_role_ids, element=element)
-
-        has_read_all = any(rule.read_all_permission for rule in rules)
+        element_permissions = get_effective_permissions(user).get('products')
+        has_read_all = bool(element_permissions and element_permissions['permissions']['read_all'])
 
         if has_read_all:
             products = MOCK_PRODUCTS
@@ -154,13 +150,8 @@ def orders_list_create(request):
 
     if request.method == 'GET':
         user = request.user
-        user_role_ids = user.roles.all().values_list('role_id', flat=True)
-
-        from apps.access.models import AccessRolesRules, BusinessElement
-        element = BusinessElement.objects.get(name='orders')
-        rules = AccessRolesRules.objects.filter(role_id__in=user_role_ids, element=element)
-
-        has_read_all = any(rule.read_all_permission for rule in rules)
+        element_permissions = get_effective_permissions(user).get('orders')
+        has_read_all = bool(element_permissions and element_permissions['permissions']['read_all'])
 
         if has_read_all:
             orders = MOCK_ORDERS
@@ -206,13 +197,8 @@ def stores_list(request):
         )
 
     user = request.user
-    user_role_ids = user.roles.all().values_list('role_id', flat=True)
-
-    from apps.access.models import AccessRolesRules, BusinessElement
-    element = BusinessElement.objects.get(name='stores')
-    rules = AccessRolesRules.objects.filter(role_id__in=user_role_ids, element=element)
-
-    has_read_all = any(rule.read_all_permission for rule in rules)
+    element_permissions = get_effective_permissions(user).get('stores')
+    has_read_all = bool(element_permissions and element_permissions['permissions']['read_all'])
 
     if has_read_all:
         stores = MOCK_STORES
@@ -3,10 +3,17 @@ from django.conf import settings
 from rest_framework import authentication
 from rest_framework import exceptions
 from apps.users.models import User
+from apps.core.metrics import AUTH_ATTEMPTS
+from apps.core.timing import phase
+from apps.core.tracing import span
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
+        with phase('auth'), span('auth.jwt'):
+            return self._authenticate(request)
+
+    def _authenticate(self, request):
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
 
         if not auth_header:
@@ -18,24 +25,32 @@ class JWTAuthentication(authentication.BaseAuthentication):
         try:
             token = auth_header.split(' ')[1]
         except IndexError:
+            AUTH_ATTEMPTS.inc(method='jwt', outcome='malformed')
             raise exceptions.AuthenticationFailed('Неверный формат токена')
 
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+            with span('jwt.decode'):
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
         except jwt.ExpiredSignatureError:
+            AUTH_ATTEMPTS.inc(method='jwt', outcome='expired')
             raise exceptions.AuthenticationFailed('Токен истёк')
         except jwt.InvalidTokenError:
+            AUTH_ATTEMPTS.inc(method='jwt', outcome='invalid_token')
             raise exceptions.AuthenticationFailed('Неверный токен')
 
         user_id = payload.get('user_id')
         if not user_id:
+            AUTH_ATTEMPTS.inc(method='jwt', outcome='missing_user_id')
             raise exceptions.AuthenticationFailed('Токен не содержит user_id')
 
         try:
-            user = User.objects.get(id=user_id, is_active=True)
+            with span('user.lookup', **{'enduser.id': str(user_id)}):
+                user = User.hot.get(id=user_id, is_active=True)
         except User.DoesNotExist:
+            AUTH_ATTEMPTS.inc(method='jwt', outcome='user_not_found')
             raise exceptions.AuthenticationFailed('Пользователь не найден')
 
+        AUTH_ATTEMPTS.inc(method='jwt', outcome='success')
         return (user, None)
     def authenticate_header(self, request):
         return 'Bearer realm="api"'
\ No newline at end of file
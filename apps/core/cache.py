@@ -0,0 +1,255 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from apps.core.metrics import CACHE_REQUESTS
+
+DEFAULT_TIERED_CACHE_SETTINGS = {
+    # L2 - общий кэш Django (CACHES), L1 - LRU в памяти процесса перед ним
+    'ALIAS': 'default',
+    'L1_MAX_ENTRIES': 1024,
+    # L1 не видит delete()/set() других процессов: срок жизни в L1 ограничен этим значением
+    'L1_TIMEOUT': 60,
+    # Сколько секунд процесс использует прочитанную из L2 версию пространства имён:
+    # попадание в L1 не ходит в L2, а смена версии в другом воркере видна с этой задержкой
+    'VERSION_TIMEOUT': 1,
+    'TIMEOUT': 300,
+    # Срок жизни записи случайно укорачивается до этой доли, чтобы записи,
+    # созданные одновременно, не истекали одновременно
+    'JITTER': 0.1,
+    # Загрузчик вернул None - запоминаем отсутствие на это время
+    'NEGATIVE_TIMEOUT': 30,
+}
+
+# Кэши в памяти процесса: у каждого воркера gunicorn свой экземпляр
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+_MISSING = object()
+# Маркер отсутствия значения: строка, чтобы переживать pickle в L2
+NEGATIVE = '__tiered_cache_negative__'
+
+
+def _unwrap(value, default=None):
+    return default if isinstance(value, str) and value == NEGATIVE else value
+
+
+def get_tiered_cache_settings():
+    return {**DEFAULT_TIERED_CACHE_SETTINGS, **getattr(settings, 'TIERED_CACHE', {})}
+
+
+def is_shared_cache(alias='default'):
+    """
+    Кэш общий для всех процессов: запись и смена версии в одном воркере видны остальным.
+    """
+    return not isinstance(caches[alias], PROCESS_LOCAL_CACHES)
+
+
+class TieredCache:
+    """
+    Двухуровневый кэш с пространством имён.
+
+    Ключи версионируются: <namespace>:<версия>:<ключ>. bump_version() инвалидирует
+    всё пространство имён в текущем процессе сразу, даже при LocMemCache/DummyCache
+    (локальный счётчик), а в остальных - не позже VERSION_TIMEOUT (общий счётчик в L2).
+    Общий счётчик хранится без срока и начинается со времени создания, а не с 0:
+    если ключ версии вытеснен, записи прежних версий не становятся снова действительными. get_or_load()
+    загружает отсутствующее значение в режиме single-flight: при промахе загрузчик
+    вызывает один поток процесса, остальные ждут его результат.
+
+    Параметры конструктора перекрывают TIERED_CACHE из settings.
+    """
+
+    def __init__(self, namespace, **options):
+        self.namespace = namespace
+        self.options = options
+        self.version_key = f'{namespace}:version'
+        self._local_version = 0
+        # (момент устаревания по time.monotonic(), версия из L2)
+        self._shared_version = None
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    @property
+    def config(self):
+        return {**get_tiered_cache_settings(), **self.options}
+
+    @property
+    def shared(self):
+        return caches[self.config['ALIAS']]
+
+    def version(self):
+        return f'{self.shared_version()}.{self._local_version}'
+
+    def shared_version(self):
+        cached = self._shared_version
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        version = self.shared.get(self.version_key)
+        if version is None:
+            version = self._seed_version()
+        self._remember_version(version)
+        return version
+
+    def bump_version(self):
+        with self._lock:
+            self._local_version += 1
+            # Записи старой версии больше не читаются - освобождаем L1 сразу
+            self._entries.clear()
+
+        try:
+            version = self.shared.incr(self.version_key)
+        except ValueError:
+            version = self._seed_version()
+        self._remember_version(version)
+
+    def _seed_version(self):
+        # Ключ версии ещё не создан или вытеснен: начинаем с текущего времени. Если другой
+        # процесс успел раньше, add() не перезапишет его значение - читаем победителя
+        seed = time.time_ns()
+        self.shared.add(self.version_key, seed, timeout=None)
+        return self.shared.get(self.version_key, seed)
+
+    def _remember_version(self, version):
+        self._shared_version = (time.monotonic() + self.config['VERSION_TIMEOUT'], version)
+
+    def make_key(self, key):
+        return f'{self.namespace}:{self.version()}:{key}'
+
+    def get(self, key, default=None):
+        full_key = self.make_key(key)
+        value = self._get_local(full_key)
+        if value is _MISSING:
+            value = self.shared.get(full_key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._set_local(full_key, value, self.config['L1_TIMEOUT'])
+        return _unwrap(value, default)
+
+    def set(self, key, value, timeout=_MISSING):
+        self._set(self.make_key(key), value, timeout)
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        with self._lock:
+            self._entries.pop(full_key, None)
+        self.shared.delete(full_key)
+
+    def get_or_load(self, key, loader, timeout=_MISSING, metric=None):
+        """
+        Значение ключа или результат loader(), сохранённый в оба уровня.
+        None от загрузчика кэшируется на NEGATIVE_TIMEOUT.
+        """
+        metric = metric or self.namespace
+        full_key = self.make_key(key)
+
+        value = self._get_local(full_key)
+        if value is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            CACHE_REQUESTS.inc(cache=metric, result='hit')
+            return _unwrap(value)
+
+        with self._lock:
+            build_lock = self._inflight.get(full_key)
+            if build_lock is None:
+                build_lock = self._inflight[full_key] = threading.Lock()
+
+        with build_lock:
+            value = self._get_local(full_key)
+            if value is not _MISSING:
+                with self._lock:
+                    self.coalesced += 1
+                CACHE_REQUESTS.inc(cache=metric, result='coalesced')
+                return _unwrap(value)
+
+            try:
+                value = self.shared.get(full_key, _MISSING)
+                if value is not _MISSING:
+                    with self._lock:
+                        self.l2_hits += 1
+                    CACHE_REQUESTS.inc(cache=metric, result='l2_hit')
+                    self._set_local(full_key, value, self.config['L1_TIMEOUT'])
+                    return _unwrap(value)
+
+                with self._lock:
+                    self.misses += 1
+                CACHE_REQUESTS.inc(cache=metric, result='miss')
+                value = loader()
+                self._set(full_key, value, timeout)
+                with self._lock:
+                    self.loads += 1
+            finally:
+                with self._lock:
+                    self._inflight.pop(full_key, None)
+
+        return value
+
+    def _set(self, full_key, value, timeout):
+        config = self.config
+        if value is None:
+            value, timeout = NEGATIVE, config['NEGATIVE_TIMEOUT']
+        elif timeout is _MISSING:
+            timeout = config['TIMEOUT']
+
+        if timeout is not None and config['JITTER']:
+            timeout = timeout * random.uniform(1 - config['JITTER'], 1)
+        self.shared.set(full_key, value, timeout=timeout)
+        local_timeout = config['L1_TIMEOUT'] if timeout is None else min(timeout, config['L1_TIMEOUT'])
+        self._set_local(full_key, value, local_timeout)
+
+    def _get_local(self, full_key):
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[full_key]
+                return _MISSING
+            self._entries.move_to_end(full_key)
+            return value
+
+    def _set_local(self, full_key, value, timeout):
+        max_entries = self.config['L1_MAX_ENTRIES']
+        with self._lock:
+            self._entries[full_key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear_local(self):
+        with self._lock:
+            self._shared_version = None
+            self._entries.clear()
+            self._inflight.clear()
+            self._reset_stats()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.l2_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.config['L1_MAX_ENTRIES'],
+                'hits': self.hits,
+                'l2_hits': self.l2_hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'coalesced': self.coalesced,
+                'hit_ratio': round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,144 @@
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_REPLICAS_SETTINGS = {
+    # Алиасы из DATABASES с копиями default; пусто - все запросы идут в default
+    'ALIASES': [],
+    # После записи чтения пользователя идут в default это время, пока реплики догоняют
+    'USER_PIN_SECONDS': 5,
+    # Записи, которые не требуют read-your-writes (аудит) и не закрепляют запрос за default
+    'PIN_EXEMPT_MODELS': [],
+}
+
+DEFAULT_SQLITE_TUNING_SETTINGS = {
+    'ENABLED': True,
+    # Применяются по порядку к каждому новому соединению: busy_timeout - до смены журнала,
+    # иначе одновременный старт воркеров падает на переключении в WAL
+    'PRAGMAS': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -16000,
+        'temp_store': 'MEMORY',
+    },
+    # Файловая блокировка записи между процессами и потоками: транзакции (atomic)
+    # выполняются по одной и начинаются с BEGIN IMMEDIATE
+    'WRITE_LOCK': False,
+}
+
+_routing = contextvars.ContextVar('db_routing', default=None)
+
+
+def get_replica_settings():
+    return {**DEFAULT_DB_REPLICAS_SETTINGS, **getattr(settings, 'DB_REPLICAS', {})}
+
+
+def get_sqlite_tuning_settings():
+    return {**DEFAULT_SQLITE_TUNING_SETTINGS, **getattr(settings, 'SQLITE_TUNING', {})}
+
+
+class RoutingState:
+    """
+    Маршрутизация запроса: replica - реплика для чтений или None (только default),
+    pinned - в запросе была запись, дальнейшие чтения идут в default.
+    """
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.pinned = False
+
+
+@contextmanager
+def route_reads(replica):
+    state = RoutingState(replica)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Чтения внутри блока идут в default: данные, которые кэшируются надолго
+    (правила доступа), не должны собираться с отстающей реплики.
+    """
+    state = _routing.get()
+    if state is None or state.replica is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        state.replica = replica
+
+
+def choose_replica():
+    aliases = get_replica_settings()['ALIASES']
+    return random.choice(aliases) if aliases else None
+
+
+class ReplicaRouter:
+    """
+    Безопасные чтения - на реплику, выбранную ReplicaRoutingMiddleware на время запроса;
+    записи (и select_for_update) и все чтения после первой записи - в default. Вне запроса - default.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None:
+            return None
+        if state.replica is None or state.pinned:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None and model._meta.label not in get_replica_settings()['PIN_EXEMPT_MODELS']:
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и default
+        databases = {DEFAULT_DB_ALIAS, *get_replica_settings()['ALIASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_settings()['ALIASES']:
+            return False
+        return None
+
+
+def warm_up_connections(aliases=None):
+    """
+    Открывает соединения с БД текущего потока до первого запроса (хук gunicorn post_worker_init),
+    чтобы установка соединения не попадала в задержку первого запроса.
+
+    Соединения Django принадлежат потоку: прогрев помогает sync-воркерам, которые обслуживают
+    запросы в главном потоке. Потоки gthread открывают свои соединения первым запросом.
+    Ошибка не роняет воркер: соединение будет открыто первым запросом.
+    """
+    for alias in aliases or connections:
+        connection = connections[alias]
+        started = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception as e:
+            logger.warning("DB warmup failed for %s: %s", alias, e)
+            continue
+
+        logger.info("DB connection %s warmed up in %.1f ms", alias, (time.perf_counter() - started) * 1000)
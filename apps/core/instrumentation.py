@@ -0,0 +1,154 @@
+import contextvars
+import functools
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from apps.core import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_INSPECTION_SETTINGS = {
+    'ENABLED': True,
+    # Запросы дольше порога пишутся в лог вместе с view
+    'SLOW_QUERY_MS': 200,
+    # Сколько самых дорогих отпечатков отдаёт endpoint метрик
+    'TOP_N': 20,
+    # warn - предупреждение в лог и метрику, raise - исключение (тесты)
+    'BUDGET_MODE': 'warn',
+    # Область query_budget(), имя view из urls.py или 'МЕТОД view' -> максимум SQL-запросов
+    'BUDGETS': {},
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES (\((?:[^()]|%s)*\))(?:\s*,\s*\((?:[^()]|%s)*\))+', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+_budget_exempt = contextvars.ContextVar('query_budget_exempt', default=False)
+
+
+def get_query_inspection_settings():
+    return {**DEFAULT_QUERY_INSPECTION_SETTINGS, **getattr(settings, 'QUERY_INSPECTION', {})}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Нормализованный SQL: литералы -> ?, списки IN (...) и VALUES (...), (...) схлопываются.
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub(r'VALUES \1, ...', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryCollector:
+    """
+    execute_wrapper для всех подключений: число SQL-запросов и суммарное время.
+    С record=True сохраняет (sql, длительность) каждого запроса.
+    budgeted - запросы вне query_budget_exempt(), по ним проверяются бюджеты.
+    """
+
+    def __init__(self, record=False):
+        self.count = 0
+        self.budgeted = 0
+        self.duration = 0.0
+        self.statements = [] if record else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            if not _budget_exempt.get():
+                self.budgeted += 1
+            self.duration += duration
+            if self.statements is not None:
+                self.statements.append((sql, duration))
+
+
+@contextmanager
+def collect_queries(collector=None):
+    collector = collector if collector is not None else QueryCollector()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(collector))
+        yield collector
+
+
+def check_query_budget(name, count, statements=(), config=None, method=None):
+    config = config or get_query_inspection_settings()
+    budgets = config['BUDGETS']
+    if method and f"{method} {name}" in budgets:
+        name = f"{method} {name}"
+    limit = budgets.get(name)
+    if limit is None or count <= limit:
+        return
+
+    metrics.QUERY_BUDGET_EXCEEDED.inc(scope=name)
+    queries = '\n'.join(fingerprint(sql) for sql, _ in statements)
+    message = f"Query budget exceeded for '{name}': {count} > {limit}"
+    if config['BUDGET_MODE'] == 'raise':
+        raise QueryBudgetExceeded(f"{message}\n{queries}")
+    logger.warning("%s\n%s", message, queries)
+
+
+@contextmanager
+def query_budget(name):
+    """
+    Бюджет SQL-запросов для участка кода; лимит берётся из QUERY_INSPECTION['BUDGETS'][name].
+    """
+    config = get_query_inspection_settings()
+    if not config['ENABLED'] or name not in config['BUDGETS']:
+        yield
+        return
+
+    with collect_queries(QueryCollector(record=True)) as collector:
+        yield
+    check_query_budget(name, collector.budgeted, collector.statements, config)
+
+
+@contextmanager
+def query_budget_exempt():
+    """
+    Запросы внутри не учитываются бюджетом: перестроение кэшей, загрузка объекта view.
+    """
+    token = _budget_exempt.set(True)
+    try:
+        yield
+    finally:
+        _budget_exempt.reset(token)
+
+
+def inspect_request_queries(view, method, collector, config=None):
+    """
+    Разбор запросов одного HTTP-запроса: отпечатки по view, медленные запросы и бюджет view.
+    """
+    config = config or get_query_inspection_settings()
+    slow_threshold = config['SLOW_QUERY_MS'] / 1000
+
+    for sql, duration in collector.statements:
+        query_fingerprint = fingerprint(sql)
+        metrics.QUERY_FINGERPRINT_CALLS.inc(view=view, fingerprint=query_fingerprint)
+        metrics.QUERY_FINGERPRINT_DURATION.inc(duration, view=view, fingerprint=query_fingerprint)
+        if duration >= slow_threshold:
+            logger.warning(
+                "Slow query in %s (%.1f ms): %s", view, duration * 1000, query_fingerprint,
+                extra={'view': view, 'duration_ms': round(duration * 1000, 1)}
+            )
+
+    check_query_budget(view, collector.budgeted, collector.statements, config, method)
@@ -0,0 +1,238 @@
+import atexit
+import datetime
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import threading
+from collections.abc import Mapping
+
+DEFAULT_QUEUE_OPTIONS = {
+    'enabled': True,
+    # Записи сверх лимита отбрасываются, поток запроса никогда не ждёт
+    'maxsize': 10000,
+}
+
+# Аргументы этих типов неизменяемы, их можно форматировать позже в потоке слушателя
+LAZY_SAFE_TYPES = (str, int, float, bool, type(None), bytes, datetime.datetime, datetime.date)
+
+# Стандартные атрибуты LogRecord - всё остальное считается extra-полями
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Одна запись - одна строка JSON: время, уровень, логгер, сообщение
+    и все extra-поля записи (extra={'user_id': ...}).
+    """
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничение частоты для шумных сообщений (например, неудачных входов).
+
+    Лимит считается отдельно для каждой пары (логгер, шаблон сообщения), поэтому
+    сообщения должны логироваться в %-стиле: logger.warning("... %s", email).
+    Первые `rate` записей за `period` секунд проходят, дальше проходит каждая
+    `sample_every`-я, остальные отбрасываются. Прошедшая запись получает поле
+    `suppressed` - сколько записей с тем же шаблоном было отброшено до неё.
+    """
+
+    def __init__(self, rate=20, period=60.0, sample_every=100, level='WARNING', name=''):
+        super().__init__(name)
+        self.rate = rate
+        self.period = period
+        self.sample_every = sample_every
+        self.levelno = logging._checkLevel(level)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.levelno:
+            return True
+
+        key = (record.name, record.msg)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= self.period:
+                # [начало окна, пропущено, отброшено]; отброшенные в прошлом окне
+                # переносим, чтобы сообщить о них в первой записи нового
+                window = self._windows[key] = [record.created, 0, window[2] if window else 0]
+
+            passed = window[1] < self.rate
+            if not passed and self.sample_every:
+                passed = window[2] % self.sample_every == self.sample_every - 1
+
+            if not passed:
+                window[2] += 1
+                return False
+
+            window[1] += 1
+            if window[2]:
+                record.suppressed = window[2]
+            window[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладёт запись в общую очередь вместе с обработчиками-получателями.
+    Форматирование и запись на диск выполняет поток QueueListener;
+    при переполнении очереди запись отбрасывается.
+    """
+
+    def __init__(self, log_queue, targets):
+        super().__init__(log_queue)
+        self.targets = tuple(targets)
+        self.dropped = 0
+        # Не кладём в очередь записи, которые не нужны ни одному получателю
+        self.setLevel(min(handler.level for handler in self.targets))
+
+    def prepare(self, record):
+        # В отличие от QueueHandler.prepare не вызываем format() здесь - только
+        # фиксируем сообщение, если аргументы могут измениться до записи
+        record = logging.makeLogRecord(record.__dict__)
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, Mapping) else args
+            if not all(isinstance(value, LAZY_SAFE_TYPES) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait((record, self.targets))
+        except queue.Full:
+            self.dropped += 1
+
+
+class TargetedQueueListener(logging.handlers.QueueListener):
+    """
+    Один поток на все логгеры: каждый элемент очереди несёт свои обработчики.
+    """
+
+    def handle(self, item):
+        record, targets = item
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self):
+        # Ждём места в очереди: при остановке записи не должны теряться
+        self.queue.put(self._sentinel)
+
+
+_listener = None
+_queue_handlers = []
+
+
+def get_queue_stats():
+    queue_handler = _queue_handlers[0] if _queue_handlers else None
+    return {
+        'enabled': _listener is not None,
+        'queued': queue_handler.queue.qsize() if queue_handler else 0,
+        'dropped': sum(handler.dropped for handler in _queue_handlers),
+    }
+
+
+def stop_queue_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # Поток слушателя не переживает fork (gunicorn --preload), а блокировки
+    # очереди могли быть захвачены в момент fork - создаём очередь заново
+    if _listener is not None:
+        log_queue = queue.Queue(maxsize=_listener.queue.maxsize)
+        _listener.queue = log_queue
+        for queue_handler in _queue_handlers:
+            queue_handler.queue = log_queue
+        _listener._thread = None
+        _listener.start()
+
+
+def configure_logging(logging_settings):
+    """
+    LOGGING_CONFIG: обычный dictConfig, после которого обработчики каждого
+    настроенного логгера переносятся за общую очередь.
+    Параметры очереди задаются ключом LOGGING['queue'].
+    """
+    config = dict(logging_settings)
+    options = {**DEFAULT_QUEUE_OPTIONS, **config.pop('queue', {})}
+
+    stop_queue_listener()
+    _queue_handlers.clear()
+    ensure_log_directories(config)
+    logging.config.dictConfig(config)
+
+    if options['enabled']:
+        install_queue_handlers(config, options['maxsize'])
+
+
+def ensure_log_directories(config):
+    # FileHandler открывает файл при создании - каталог нужен до dictConfig
+    for handler in config.get('handlers', {}).values():
+        filename = handler.get('filename')
+        if filename:
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+
+
+def install_queue_handlers(config, maxsize):
+    global _listener
+
+    log_queue = queue.Queue(maxsize=maxsize)
+    targets = []
+    loggers = [logging.getLogger(name) for name in config.get('loggers', {})]
+    loggers.append(logging.getLogger())
+
+    for logger in loggers:
+        handlers = [handler for handler in logger.handlers if not isinstance(handler, NonBlockingQueueHandler)]
+        if not handlers:
+            continue
+
+        queue_handler = NonBlockingQueueHandler(log_queue, handlers)
+        _queue_handlers.append(queue_handler)
+        for handler in handlers:
+            logger.removeHandler(handler)
+            if handler not in targets:
+                targets.append(handler)
+        logger.addHandler(queue_handler)
+
+    _listener = TargetedQueueListener(log_queue, *targets)
+    _listener.start()
+
+
+atexit.register(stop_queue_listener)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,13 @@
+from django.db import models
+
+
+class HotPathManager(models.Manager):
+    """
+    Менеджер для горячих путей (аутентификация, проверка прав): без Meta.ordering.
+
+    Сортировка по умолчанию нужна спискам в API и админке, а точечным выборкам
+    добавляет JOIN и сортировку на каждый запрос. Менеджер по умолчанию остаётся objects.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().order_by()
@@ -0,0 +1,312 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from apps.core.utils import pid_alive
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_SETTINGS = {
+    'ENABLED': True,
+    # Каталог, куда каждый воркер gunicorn пишет свой снимок; пусто - только текущий процесс
+    'MULTIPROC_DIR': '',
+    'FLUSH_INTERVAL': 5.0,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BCRYPT_BUCKETS = (0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+
+
+def get_metrics_settings():
+    return {**DEFAULT_METRICS_SETTINGS, **getattr(settings, 'METRICS', {})}
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in labels
+    )
+    return '{%s}' % ','.join(escaped)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), top=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Выводить только top серий с наибольшим значением
+        self.top = top
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(left, right):
+        return left + right
+
+    @staticmethod
+    def sort_value(value):
+        return value
+
+    def samples(self, key, value):
+        yield self.name, zip(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """
+    Значение по набору меток: [счётчики по корзинам..., +Inf, сумма].
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, top=None):
+        super().__init__(name, documentation, labelnames, top)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+    @staticmethod
+    def merge(left, right):
+        return [a + b for a, b in zip(left, right)]
+
+    @staticmethod
+    def sort_value(value):
+        return value[-1]
+
+    def samples(self, key, value):
+        labels = list(zip(self.labelnames, key))
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), value[:-1]):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+            yield f"{self.name}_bucket", labels + [('le', le)], cumulative
+        yield f"{self.name}_sum", labels, value[-1]
+        yield f"{self.name}_count", labels, cumulative
+
+
+def _snapshot_pid(path):
+    try:
+        return int(os.path.basename(path)[len('metrics_'):-len('.json')])
+    except ValueError:
+        return None
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса с выводом в текстовом формате Prometheus.
+
+    Под gunicorn каждый воркер периодически сохраняет снимок в MULTIPROC_DIR
+    (metrics_<pid>.json), а endpoint суммирует снимки живых воркеров и удаляет
+    снимки завершившихся.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._writer_pid = None
+        self._writer_thread = None
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=(), top=None):
+        return self._register(Counter, name, documentation, labelnames, top=top)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, top=None):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets, top=top)
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def snapshot(self):
+        return {
+            name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def write_snapshot(self, directory):
+        path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as output:
+            json.dump(self.snapshot(), output)
+        os.replace(tmp_path, path)
+
+    def collect(self, directory=None):
+        """
+        Значения всех метрик: текущий процесс плюс снимки остальных воркеров.
+        """
+        merged = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        if not directory:
+            return merged
+
+        for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+            pid = _snapshot_pid(path)
+            if pid == os.getpid():
+                continue
+            if pid is not None and not pid_alive(pid):
+                # Воркер перезапущен: его снимок больше не обновится
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, encoding='utf-8') as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged[name]
+                for key, value in values:
+                    key = tuple(key)
+                    target[key] = metric.merge(target[key], value) if key in target else value
+        return merged
+
+    def render(self, directory=None):
+        lines = []
+        for name, values in self.collect(directory).items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            keys = sorted(values)
+            if metric.top is not None:
+                keys = sorted(keys, key=lambda key: metric.sort_value(values[key]), reverse=True)[:metric.top]
+            for key in keys:
+                for sample_name, labels, value in metric.samples(key, values[key]):
+                    lines.append(f"{sample_name}{_format_labels(list(labels))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def ensure_file_writer(self, directory, interval):
+        # Поток не переживает fork, поэтому проверяем pid
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+            self._writer_thread = threading.Thread(
+                target=self._write_periodically,
+                args=(directory, interval),
+                name='metrics-writer',
+                daemon=True
+            )
+            self._writer_thread.start()
+
+    def _write_periodically(self, directory, interval):
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            time.sleep(interval)
+            try:
+                self.write_snapshot(directory)
+            except OSError:
+                logger.exception("Failed to write metrics snapshot to %s", directory)
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by view', ('view', 'method')
+)
+REQUESTS_TOTAL = registry.counter(
+    'http_requests_total', 'Requests by view and status code', ('view', 'method', 'status')
+)
+DB_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL queries per request', ('view',), buckets=QUERY_COUNT_BUCKETS
+)
+DB_DURATION = registry.histogram(
+    'http_request_db_duration_seconds', 'Time spent in SQL per request', ('view',)
+)
+AUTH_ATTEMPTS = registry.counter(
+    'auth_attempts_total', 'Authentication attempts by method and outcome', ('method', 'outcome')
+)
+BCRYPT_DURATION = registry.histogram(
+    'auth_bcrypt_duration_seconds', 'bcrypt hash/check time', ('operation',), buckets=BCRYPT_BUCKETS
+)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result')
+)
+QUERY_FINGERPRINT_CALLS = registry.counter(
+    'db_query_fingerprint_calls_total', 'Executions of normalized SQL by view (top N)',
+    ('view', 'fingerprint'), top=getattr(settings, 'QUERY_INSPECTION', {}).get('TOP_N', 20)
+)
+QUERY_FINGERPRINT_DURATION = registry.counter(
+    'db_query_fingerprint_seconds_total', 'Time spent in normalized SQL by view (top N)',
+    ('view', 'fingerprint'), top=getattr(settings, 'QUERY_INSPECTION', {}).get('TOP_N', 20)
+)
+QUERY_BUDGET_EXCEEDED = registry.counter(
+    'db_query_budget_exceeded_total', 'Query budget violations by view or scope', ('scope',)
+)
+
+
+def render_metrics():
+    return registry.render(get_metrics_settings()['MULTIPROC_DIR'] or None)
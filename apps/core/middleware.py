@@ -1,6 +1,23 @@
 import logging
+import threading
+import time
+
+import jwt
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.http import HttpResponse
 from apps.users.authentication import CustomAuthentication
+from apps.core import metrics
+from apps.core.instrumentation import QueryCollector, collect_queries, get_query_inspection_settings, \
+    inspect_request_queries, query_budget_exempt
+from apps.core.cache import is_shared_cache
+from apps.core.db import choose_replica, get_replica_settings, route_reads
+from apps.core.timing import collect_timings, get_server_timing_settings, phase
+from apps.core.tracing import SPAN_KIND_SERVER, STATUS_ERROR, get_span_exporter, get_tracing_settings, \
+    should_keep, span, start_trace, trace_query
+from apps.core.profiling import RateSampler, get_continuous_profiler, get_profiling_settings, profile_request
+from apps.users.permissions import is_admin_user
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +31,12 @@ class JWTAuthenticationMiddleware:
 
         if auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            user = self._authenticate_token(token)
+            with phase('auth'), span('auth.jwt'):
+                user = self._authenticate_token(token)
 
             if user:
                 request.user = user
-                logger.debug(f"User authenticated via JWT: {user.email}")
+                logger.debug("User authenticated via JWT: %s", user.email)
             else:
                 request.user = AnonymousUser()
                 logger.debug("JWT authentication failed, user set to AnonymousUser")
@@ -33,7 +51,7 @@ class JWTAuthenticationMiddleware:
             user = CustomAuthentication.get_user_from_token(token)
             return user
         except Exception as e:
-            logger.warning(f"Token authentication failed: {str(e)}")
+            logger.warning("Token authentication failed: %s", e)
             return None
 
 
@@ -46,11 +64,244 @@ class RequestLoggingMiddleware:
 
         if settings.DEBUG:
             user_info = f"User: {request.user}" if hasattr(request, 'user') else "Anonymous"
-            logger.info(f"[REQUEST] {request.method} {request.path} | {user_info}")
+            logger.info("[REQUEST] %s %s | %s", request.method, request.path, user_info)
 
         response = self.get_response(request)
 
         if settings.DEBUG:
-            logger.info(f"[RESPONSE] {request.method} {request.path} | Status: {response.status_code}")
+            logger.info("[RESPONSE] %s %s | Status: %s", request.method, request.path, response.status_code)
+
+        return response
+
+
+class TracingMiddleware:
+    """
+    Трассировка запроса: корневой SERVER-спан продолжает trace id из заголовка
+    traceparent шлюза, внутри - спаны auth, permission, SQL, bcrypt и email.
+    В конце запроса хвостовое сэмплирование решает, экспортировать ли трассу.
+    Должен стоять первым в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        config = get_tracing_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.config = config
+
+    def __call__(self, request):
+        with start_trace(request.META.get('HTTP_TRACEPARENT'), self.config['MAX_SPANS']) as trace:
+            with span(request.method, kind=SPAN_KIND_SERVER, **{
+                'http.request.method': request.method,
+                'url.path': request.path,
+            }) as root, collect_queries(trace_query):
+                response = self.get_response(request)
+
+                match = request.resolver_match
+                if match is not None and match.route:
+                    root.name = f"{request.method} /{match.route}"
+                    root.set_attribute('http.route', f"/{match.route}")
+                root.set_attribute('http.response.status_code', response.status_code)
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    root.set_attribute('enduser.id', str(user.id))
+                if response.status_code >= 500:
+                    root.status = STATUS_ERROR
+
+        if trace.dropped_spans:
+            root.set_attribute('trace.dropped_spans', trace.dropped_spans)
+        if should_keep(trace, self.config):
+            get_span_exporter().export(trace)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Латентность, число и время SQL-запросов по имени view, отпечатки запросов,
+    медленные запросы и бюджеты view (QUERY_INSPECTION).
+    Должен стоять в начале MIDDLEWARE (после TracingMiddleware), чтобы учитывать весь стек.
+    """
+
+    def __init__(self, get_response):
+        config = metrics.get_metrics_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.multiproc_dir = config['MULTIPROC_DIR']
+        self.flush_interval = config['FLUSH_INTERVAL']
+        self.inspect_queries = get_query_inspection_settings()['ENABLED']
+
+    def __call__(self, request):
+        if self.multiproc_dir:
+            metrics.registry.ensure_file_writer(self.multiproc_dir, self.flush_interval)
+
+        start = time.perf_counter()
+        with collect_queries(QueryCollector(record=self.inspect_queries)) as queries:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # Только имена из urls.py: произвольные пути (404) не раздувают число серий
+        match = request.resolver_match
+        view = match.view_name if match is not None else '<unresolved>'
+
+        metrics.REQUEST_LATENCY.observe(duration, view=view, method=request.method)
+        metrics.REQUESTS_TOTAL.inc(view=view, method=request.method, status=response.status_code)
+        metrics.DB_QUERIES.observe(queries.count, view=view)
+        metrics.DB_DURATION.observe(queries.duration, view=view)
+        if self.inspect_queries:
+            inspect_request_queries(view, request.method, queries)
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing: auth, perm, render, db и total.
+
+    Замер включается заголовком запроса X-Server-Timing, а ответ получает его
+    только для администраторов. С SERVER_TIMING['ALWAYS'] - для всех запросов.
+    """
+
+    def __init__(self, get_response):
+        config = get_server_timing_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.always = config['ALWAYS']
+        self.request_header = 'HTTP_' + config['REQUEST_HEADER'].upper().replace('-', '_')
+
+    def __call__(self, request):
+        if not self.always and not request.META.get(self.request_header):
+            return self.get_response(request)
+
+        with collect_timings() as timings:
+            with collect_queries(timings.queries):
+                response = self.get_response(request)
+
+        if self.always or self._is_admin(getattr(request, 'user', None)):
+            response['Server-Timing'] = timings.header()
+        return response
+
+    @staticmethod
+    def _is_admin(user):
+        with query_budget_exempt():
+            return is_admin_user(user)
+
 
-        return response
\ No newline at end of file
+class ProfilingMiddleware:
+    """
+    Профилирование запроса под cProfile по заголовку X-Profile или ?profile= (только админы).
+
+    - `X-Profile: text` / `?profile=text` - вместо ответа вернуть отчёт pstats и список SQL;
+    - любое другое значение - сохранить .prof, .collapsed и .sql.json в PROFILING['DIR'],
+      id профиля придёт в заголовке X-Profile-Id.
+
+    PROFILING['SAMPLE_PER_MINUTE'] дополнительно сохраняет N случайных запросов в минуту.
+    Должен стоять после JWTAuthenticationMiddleware, чтобы знать пользователя.
+    """
+
+    def __init__(self, get_response):
+        config = get_profiling_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.request_header = 'HTTP_' + config['HEADER'].upper().replace('-', '_')
+        self.query_param = config['QUERY_PARAM']
+        self.directory = str(config['DIR'])
+        self.report_lines = config['REPORT_LINES']
+        self.sampler = RateSampler(config['SAMPLE_PER_MINUTE'])
+
+    def __call__(self, request):
+        mode = request.META.get(self.request_header) or request.GET.get(self.query_param)
+        if mode:
+            with query_budget_exempt():
+                if not is_admin_user(getattr(request, 'user', None)):
+                    mode = None
+
+        if not mode and not self.sampler.should_sample():
+            return self.get_response(request)
+
+        response, profile = profile_request(self.get_response, request)
+        if profile is None:
+            return response
+
+        if mode == 'text':
+            return HttpResponse(profile.report(self.report_lines), content_type='text/plain; charset=utf-8')
+
+        match = request.resolver_match
+        name = match.view_name if match is not None else 'unresolved'
+        profile_id = profile.store(self.directory, ''.join(c if c.isalnum() else '_' for c in name))
+        if mode:
+            response['X-Profile-Id'] = profile_id
+        logger.info("Request profile stored: %s", profile_id)
+        return response
+
+
+class ContinuousProfilingMiddleware:
+    """
+    Постоянное сэмплирование стеков потоков, обрабатывающих запросы (PROFILING['CONTINUOUS']).
+    Сэмплер запускается в каждом воркере при первом запросе; файлы склеивает manage.py merge_stacks.
+    """
+
+    def __init__(self, get_response):
+        if not get_profiling_settings()['CONTINUOUS']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.profiler = get_continuous_profiler()
+
+    def __call__(self, request):
+        self.profiler.ensure_started()
+        thread_id = threading.get_ident()
+        self.profiler.active_threads.add(thread_id)
+        try:
+            return self.get_response(request)
+        finally:
+            self.profiler.active_threads.discard(thread_id)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Чтения безопасных запросов (GET/HEAD/OPTIONS) - на реплику из DB_REPLICAS, всё остальное -
+    в default. После записи пользователь закрепляется за default на USER_PIN_SECONDS,
+    чтобы следующие запросы видели его изменения (read-your-writes).
+
+    Закрепление хранится в кэше Django, поэтому кэш должен быть общим для воркеров:
+    иначе следующий запрос, попавший в другой воркер, прочитает отстающую реплику.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.config = get_replica_settings()
+        if not self.config['ALIASES']:
+            raise MiddlewareNotUsed
+        if not is_shared_cache():
+            raise ImproperlyConfigured(
+                "DB_REPLICAS требует общий кэш для закрепления за default: CACHE_URL=redis://... или filecache://..."
+            )
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_key = self._pin_key(request)
+        replica = None
+        if request.method in self.SAFE_METHODS and not (pin_key and cache.get(pin_key)):
+            replica = choose_replica()
+
+        with route_reads(replica) as state:
+            response = self.get_response(request)
+
+        if state.pinned and pin_key:
+            cache.set(pin_key, 1, timeout=self.config['USER_PIN_SECONDS'])
+        return response
+
+    @staticmethod
+    def _pin_key(request):
+        # Пользователь нужен до загрузки из БД (её тоже надо маршрутизировать), поэтому
+        # user_id берётся из токена без проверки подписи: ошибка даст лишь лишнее чтение из default
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not auth_header.startswith('Bearer '):
+            return None
+        try:
+            user_id = jwt.decode(auth_header[7:], options={'verify_signature': False}).get('user_id')
+        except jwt.InvalidTokenError:
+            return None
+        return f'db:pin:user:{user_id}' if user_id else None
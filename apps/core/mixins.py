@@ -0,0 +1,151 @@
+import hashlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from apps.core.cache import TieredCache
+from apps.core.metrics import CACHE_REQUESTS
+from apps.core.query_cache import versions_for_read
+
+DEFAULT_RESPONSE_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    # HTML BrowsableAPIRenderer зависит от пользователя и CSRF - не кэшируется
+    'FORMATS': ['json', 'msgpack'],
+}
+
+response_cache = TieredCache('responses')
+
+
+def get_response_cache_settings():
+    return {**DEFAULT_RESPONSE_CACHE_SETTINGS, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+class SparseFieldsetViewMixin:
+    """
+    Для ViewSet с SparseFieldsetMixin-сериализатором: при ?fields=/?exclude=
+    из базы выбираются только колонки, нужные запрошенным полям.
+    """
+
+    def get_requested_fields(self):
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'get_selected_field_names'):
+            return None
+        return serializer_class.get_selected_field_names(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        selected = self.get_requested_fields()
+        if selected is None:
+            return queryset
+        return self.get_serializer_class().prune_queryset(queryset, selected)
+
+
+class ReadModelListMixin:
+    """
+    list() через ReadModel: строки из values_list() сразу превращаются в dict
+    без создания моделей и сериализаторов. Учитывает ?fields=/?exclude=.
+    """
+
+    read_model_class = None
+
+    def get_read_model(self):
+        selected = self.get_requested_fields() if hasattr(self, 'get_requested_fields') else None
+        return self.read_model_class.for_fields(selected)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        read_model = self.get_read_model()
+        rows = read_model.values(queryset)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(read_model.to_dicts(page))
+
+        return Response(read_model.to_dicts(rows))
+
+
+class CachedQuerysetMixin:
+    """
+    Чтения действий из cached_actions через кэш запросов (queryset.cache(),
+    apps.core.query_cache): ключ включает версии таблиц, инвалидация не нужна.
+    Менеджер модели должен быть CachingManager.
+    """
+
+    cached_actions = ('list',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.cached_actions:
+            queryset = queryset.cache()
+        return queryset
+
+
+class ResponseCacheMixin:
+    """
+    Готовые байты ответа list() и их ETag в кэше (TieredCache, пространство имён responses).
+
+    Ключ - view, параметры запроса, формат ответа и версии таблиц response_cache_models
+    (apps.core.query_cache): любая запись в эти таблицы меняет ключ. Совпавший запрос
+    проходит аутентификацию и проверку прав, но не трогает ORM и сериализатор;
+    If-None-Match с тем же ETag получает 304. Ответ не должен зависеть от пользователя.
+    """
+
+    response_cache_models = ()
+
+    def get_response_cache_key(self, request):
+        config = get_response_cache_settings()
+        if not config['ENABLED'] or request.accepted_renderer.format not in config['FORMATS']:
+            return None
+
+        tables = {model._meta.db_table for model in self.response_cache_models}
+        versions = versions_for_read(connections[DEFAULT_DB_ALIAS], tables)
+        if versions is None:
+            return None
+
+        # Ссылки пагинации абсолютные: схема, хост и путь входят в ответ
+        raw = repr((
+            type(self).__module__, type(self).__qualname__, self.action,
+            request.build_absolute_uri(request.path),
+            sorted(request.query_params.lists()), request.accepted_media_type, versions,
+        ))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        self.response_cache_key = self.get_response_cache_key(request)
+        if self.response_cache_key is None:
+            return super().list(request, *args, **kwargs)
+
+        entry = response_cache.get(self.response_cache_key)
+        if entry is None:
+            CACHE_REQUESTS.inc(cache='responses', result='miss')
+            return super().list(request, *args, **kwargs)
+
+        CACHE_REQUESTS.inc(cache='responses', result='hit')
+        # Ответ уже сохранён - finalize_response не должен сохранять его снова
+        self.response_cache_key = None
+        if entry['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        key = getattr(self, 'response_cache_key', None)
+        if key is not None and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            etag = '"%s"' % hashlib.sha1(response.content).hexdigest()
+            response_cache.set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': etag,
+            }, timeout=get_response_cache_settings()['TIMEOUT'])
+            response['ETag'] = etag
+        return response
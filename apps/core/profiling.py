@@ -0,0 +1,301 @@
+import cProfile
+import glob
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from apps.core.instrumentation import QueryCollector, collect_queries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILING_SETTINGS = {
+    # Выключено - middleware не подключается вовсе
+    'ENABLED': False,
+    'HEADER': 'X-Profile',
+    'QUERY_PARAM': 'profile',
+    # Фоновый сбор: сколько случайных запросов в минуту профилировать (0 - не собирать)
+    'SAMPLE_PER_MINUTE': 0,
+    'DIR': 'logs/profiles',
+    # Сколько строк pstats в текстовом отчёте
+    'REPORT_LINES': 60,
+    # Постоянный сэмплирующий профилировщик в каждом воркере
+    'CONTINUOUS': False,
+    'SAMPLE_HZ': 100,
+    'CONTINUOUS_DIR': 'logs/stacks',
+    'FLUSH_INTERVAL': 60,
+    'MAX_FILES': 60,
+}
+
+# Период сэмплирования стеков для flamegraph профилируемого запроса
+STACK_SAMPLE_INTERVAL = 0.0005
+
+
+def get_profiling_settings():
+    return {**DEFAULT_PROFILING_SETTINGS, **getattr(settings, 'PROFILING', {})}
+
+
+class RateSampler:
+    """
+    Не больше `per_minute` срабатываний за минуту в процессе.
+    """
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._window = 0
+        self._taken = 0
+        self._lock = threading.Lock()
+
+    def should_sample(self):
+        if not self.per_minute:
+            return False
+        window = int(time.monotonic() // 60)
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._taken = 0
+            if self._taken >= self.per_minute:
+                return False
+            self._taken += 1
+            return True
+
+
+class RequestProfile:
+    def __init__(self, profiler, sampler, queries, duration):
+        self.profiler = profiler
+        self.sampler = sampler
+        self.queries = queries
+        self.duration = duration
+
+    def sql(self):
+        return [
+            {'sql': sql, 'duration_ms': round(duration * 1000, 3)}
+            for sql, duration in self.queries.statements
+        ]
+
+    def report(self, lines):
+        output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(lines)
+
+        output.write(f"\nSQL: {self.queries.count} queries, {self.queries.duration * 1000:.2f} ms\n")
+        for entry in self.sql():
+            output.write(f"{entry['duration_ms']:>10.3f} ms  {entry['sql']}\n")
+        return output.getvalue()
+
+    def collapsed(self):
+        return self.sampler.collapsed()
+
+    def store(self, directory, name):
+        """
+        Сохраняет <id>.prof (pstats), <id>.collapsed (flamegraph.pl/speedscope) и <id>.sql.json.
+        """
+        os.makedirs(directory, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(directory, profile_id)
+
+        self.profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.collapsed", 'w', encoding='utf-8') as output:
+            output.write(self.collapsed())
+        with open(f"{base}.sql.json", 'w', encoding='utf-8') as output:
+            json.dump({'duration_ms': round(self.duration * 1000, 3), 'queries': self.sql()}, output, indent=2)
+        return profile_id
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def frame_stack(frame):
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик: фоновый поток раз в `interval` секунд снимает
+    стеки потоков через sys._current_frames() и считает свёрнутые стеки
+    ("a;b;c" -> число сэмплов) для flamegraph.pl / speedscope.
+
+    thread_ids - снимать только эти потоки (множество может меняться на ходу),
+    иначе все, кроме самого сэмплера; skip_frames - сколько внешних кадров
+    стека отбросить (общий префикс).
+    """
+
+    def __init__(self, interval=0.001, thread_ids=None, skip_frames=0):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.skip_frames = skip_frames
+        self.counts = {}
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sample(self):
+        own_id = threading.get_ident()
+        frames = sys._current_frames()
+        if self.thread_ids is not None:
+            frames = {thread_id: frames[thread_id] for thread_id in tuple(self.thread_ids) if thread_id in frames}
+
+        stacks = []
+        for thread_id, frame in frames.items():
+            if thread_id == own_id:
+                continue
+            stack = frame_stack(frame)[self.skip_frames:]
+            if stack:
+                stacks.append(';'.join(stack))
+        del frames
+
+        with self._lock:
+            for key in stacks:
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def drain(self):
+        """
+        Забирает накопленные стеки и начинает новое окно.
+        """
+        with self._lock:
+            counts, self.counts = self.counts, {}
+            self.samples = 0
+        return counts
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def collapsed(self):
+        return format_collapsed(self.counts)
+
+
+def format_collapsed(counts):
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+def read_collapsed(path, counts=None):
+    counts = {} if counts is None else counts
+    with open(path, encoding='utf-8') as collapsed_file:
+        for line in collapsed_file:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack and count.isdigit():
+                counts[stack] = counts.get(stack, 0) + int(count)
+    return counts
+
+
+class ContinuousProfiler:
+    """
+    Постоянный сэмплирующий профилировщик воркера: снимает стеки только потоков,
+    которые сейчас обрабатывают запрос, и раз в FLUSH_INTERVAL секунд пишет
+    окно в <DIR>/stacks-<pid>-<время>.collapsed. Старые файлы процесса удаляются,
+    остаётся не больше MAX_FILES. Склейка файлов всех воркеров - manage.py merge_stacks.
+    """
+
+    def __init__(self, directory, interval, flush_interval, max_files):
+        self.directory = str(directory)
+        self.flush_interval = flush_interval
+        self.max_files = max_files
+        self.active_threads = set()
+        self.sampler = StackSampler(interval=interval, thread_ids=self.active_threads)
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # Потоки не переживают fork (gunicorn --preload), поэтому проверяем pid
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.active_threads.clear()
+            self.sampler = StackSampler(interval=self.sampler.interval, thread_ids=self.active_threads)
+            self.sampler.start()
+            threading.Thread(target=self._flush_periodically, name='stack-flusher', daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to write collapsed stacks to %s", self.directory)
+
+    def flush(self):
+        counts = self.sampler.drain()
+        if not counts:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"stacks-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as output:
+            output.write(format_collapsed(counts))
+        os.replace(f"{path}.tmp", path)
+
+        own_files = sorted(glob.glob(os.path.join(self.directory, f"stacks-{os.getpid()}-*.collapsed")))
+        for old_path in own_files[:-self.max_files]:
+            os.remove(old_path)
+        return path
+
+
+def profile_request(get_response, request):
+    """
+    Выполняет запрос под cProfile (pstats) и сэмплером стеков (flamegraph).
+    Если профилировщик уже занят другим инструментом, запрос выполняется как обычно.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return get_response(request), None
+
+    sampler = StackSampler(
+        interval=STACK_SAMPLE_INTERVAL,
+        thread_ids={threading.get_ident()},
+        skip_frames=len(frame_stack(sys._getframe()))
+    )
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        with collect_queries(QueryCollector(record=True)) as queries:
+            response = get_response(request)
+    finally:
+        profiler.disable()
+        sampler.stop()
+    return response, RequestProfile(profiler, sampler, queries, time.perf_counter() - start)
+
+
+_continuous_profiler = None
+
+
+def get_continuous_profiler():
+    global _continuous_profiler
+    if _continuous_profiler is None:
+        config = get_profiling_settings()
+        _continuous_profiler = ContinuousProfiler(
+            directory=config['CONTINUOUS_DIR'],
+            interval=1 / config['SAMPLE_HZ'],
+            flush_interval=config['FLUSH_INTERVAL'],
+            max_files=config['MAX_FILES'],
+        )
+    return _continuous_profiler
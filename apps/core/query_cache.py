@@ -0,0 +1,216 @@
+"""
+Кэш результатов ORM-запросов с версиями таблиц (opt-in: queryset.cache()).
+
+Ключ записи - SQL с параметрами и версии всех таблиц, упомянутых в SQL (включая JOIN
+и подзапросы). Любая запись в таблицу через это соединение - save()/delete(), update(),
+bulk_create(), каскадное удаление, сырой SQL - увеличивает её версию: execute_wrapper
+ставится на каждое новое соединение. Внутри транзакции версии увеличиваются после
+коммита, а чтения изменённых в ней таблиц идут мимо кэша. Поэтому ключ устаревшего
+результата больше никогда не запрашивается, и инвалидировать кэш вручную не нужно.
+
+Запись в базу в обход Django (psql, другое приложение) версии не меняет - такие записи
+видны после истечения TIMEOUT. Версии хранятся в кэше Django, поэтому с несколькими
+воркерами он должен быть общим (по умолчанию кэш включён только с таким кэшем).
+"""
+import hashlib
+import re
+import threading
+import time
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.backends.signals import connection_created
+
+from apps.core.cache import TieredCache, get_tiered_cache_settings
+from apps.core.db import use_primary
+
+DEFAULT_QUERY_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+}
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'ALTER', 'DROP', 'TRUNCATE')
+# Имена в кавычках: "table" (SQLite, PostgreSQL) и `table` (MySQL)
+QUOTED_NAME = re.compile(r'["`]([^"`]+)["`]')
+
+_table_names = None
+
+
+def get_query_cache_settings():
+    return {**DEFAULT_QUERY_CACHE_SETTINGS, **getattr(settings, 'QUERY_CACHE', {})}
+
+
+def known_tables():
+    global _table_names
+    if _table_names is None:
+        _table_names = frozenset(model._meta.db_table for model in apps.get_models(include_auto_created=True))
+    return _table_names
+
+
+def sql_tables(sql):
+    """
+    Таблицы моделей, упомянутые в SQL. Совпадение имени колонки с именем таблицы
+    даёт лишнюю инвалидацию, но не устаревший результат.
+    """
+    return known_tables().intersection(QUOTED_NAME.findall(sql))
+
+
+class TableVersions:
+    """
+    Версии таблиц: общие счётчики в кэше Django плюс локальные счётчики процесса,
+    как у TieredCache.version().
+    """
+
+    def __init__(self):
+        self._local = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[get_tiered_cache_settings()['ALIAS']]
+
+    @staticmethod
+    def key(table):
+        return f'table_version:{table}'
+
+    def get(self, tables):
+        tables = sorted(tables)
+        keys = [self.key(table) for table in tables]
+        shared = self.shared.get_many(keys)
+        missing = [key for key in keys if key not in shared]
+        if missing:
+            # Версия ещё не создана или вытеснена: как в TieredCache, начинаем со времени, а не с 0,
+            # чтобы записи прежних версий не стали снова действительными
+            seed = time.time_ns()
+            for key in missing:
+                self.shared.add(key, seed, timeout=None)
+            shared.update(self.shared.get_many(missing))
+        return tuple(f'{table}={shared.get(self.key(table), 0)}.{self._local.get(table, 0)}' for table in tables)
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._local[table] = self._local.get(table, 0) + 1
+
+        for table in tables:
+            try:
+                self.shared.incr(self.key(table))
+            except ValueError:
+                self.shared.add(self.key(table), time.time_ns(), timeout=None)
+
+
+table_versions = TableVersions()
+query_cache = TieredCache('queries')
+
+
+def _dirty_tables(connection):
+    # Таблицы, изменённые в текущей (ещё не закоммиченной) транзакции соединения.
+    # Транзакция определяется внешним atomic-блоком: у следующей транзакции свой набор
+    outermost = connection.atomic_blocks[0] if connection.atomic_blocks else None
+    state = getattr(connection, 'query_cache_dirty', None)
+    if state is None or state[0] is not outermost:
+        state = connection.query_cache_dirty = (outermost, set())
+    return state[1]
+
+
+def _committed(connection, tables):
+    table_versions.bump(tables)
+    _dirty_tables(connection).difference_update(tables)
+
+
+def versions_for_read(connection, tables):
+    """
+    Версии таблиц для ключа кэша или None, если текущая транзакция соединения
+    уже меняла эти таблицы: прочитанное ещё не видно другим и может откатиться.
+    """
+    if connection.in_atomic_block and tables & _dirty_tables(connection):
+        return None
+    return table_versions.get(tables)
+
+
+def track_writes(execute, sql, params, many, context):
+    result = execute(sql, params, many, context)
+
+    if sql.lstrip()[:8].upper().startswith(WRITE_STATEMENTS):
+        tables = sql_tables(sql)
+        if tables:
+            connection = context['connection']
+            if connection.in_atomic_block:
+                _dirty_tables(connection).update(tables)
+                transaction.on_commit(partial(_committed, connection, tables), using=connection.alias)
+            else:
+                table_versions.bump(tables)
+    return result
+
+
+def install_write_tracking(sender, connection, **kwargs):
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+connection_created.connect(install_write_tracking)
+
+
+class CachingQuerySet(models.QuerySet):
+    """
+    QuerySet с opt-in кэшем результатов: queryset.cache() кэширует результат
+    и count() этого queryset и всех производных от него (filter, values_list, срезы).
+    Результат загружается по default, а не по реплике: запись живёт до смены версий таблиц.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_results = False
+
+    def cache(self):
+        clone = self._chain()
+        clone._cache_results = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_results = self._cache_results
+        return clone
+
+    def _fetch_all(self):
+        if self._result_cache is None and self._cache_results:
+            self._result_cache = self._cached('rows', lambda: list(self._iterable_class(self)))
+        super()._fetch_all()
+
+    def count(self):
+        if self._result_cache is None and self._cache_results:
+            return self._cached('count', super().count)
+        return super().count()
+
+    def _cached(self, kind, loader):
+        if not get_query_cache_settings()['ENABLED'] or self.query.select_for_update:
+            return loader()
+
+        with use_primary():
+            db = self.db
+            try:
+                sql, params = self.query.get_compiler(using=db).as_sql()
+            except EmptyResultSet:
+                return loader()
+
+            versions = versions_for_read(connections[db], sql_tables(sql))
+            if versions is None:
+                return loader()
+
+            # Один SQL дают values(), values_list(), values_list(flat=True), only() и прокси-модели:
+            # результат различается классом итератора, списком полей и моделью
+            iterable = f'{self._iterable_class.__module__}.{self._iterable_class.__qualname__}'
+            raw = repr((kind, db, self.model._meta.label, iterable, self._fields, sql, params, versions))
+            key = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+            return query_cache.get_or_load(
+                key, loader, timeout=get_query_cache_settings()['TIMEOUT'],
+                metric=f'query:{self.model._meta.label}'
+            )
+
+
+class CachingManager(models.Manager.from_queryset(CachingQuerySet)):
+    pass
@@ -0,0 +1,168 @@
+import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Поля DRF, чьё представление совпадает со значением из базы - их не конвертируем
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+
+def iso_datetime(value, tz):
+    # То же, что DateTimeField.to_representation DRF для формата ISO 8601,
+    # но текущая таймзона вычисляется один раз на пачку строк, а не на каждое значение
+    if tz is not None:
+        value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+    elif timezone.is_aware(value):
+        value = timezone.make_naive(value, datetime.timezone.utc)
+
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class Column:
+    """
+    Колонка из values_list(). path - путь ORM (по умолчанию имя атрибута),
+    to_representation - конвертер значения (None пропускается без конвертации).
+    """
+
+    def __init__(self, path=None, to_representation=None):
+        self.path = path
+        self.to_representation = to_representation
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if self.path is None:
+            self.path = name
+
+    @property
+    def paths(self):
+        return (self.path,)
+
+    def compile(self, index, converter, namespace):
+        position = index[self.path]
+        converter = self.to_representation or converter
+        if converter is None:
+            return f"row[{position}]"
+        if converter is iso_datetime:
+            namespace['iso_datetime'] = iso_datetime
+            return f"(None if not row[{position}] else iso_datetime(row[{position}], tz))"
+        namespace[f"convert_{self.name}"] = converter
+        return f"(None if row[{position}] is None else convert_{self.name}(row[{position}]))"
+
+
+class Computed:
+    """
+    Значение, вычисляемое функцией из нескольких колонок.
+    """
+
+    def __init__(self, paths, func):
+        self._paths = tuple(paths)
+        self.func = func
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    @property
+    def paths(self):
+        return self._paths
+
+    def compile(self, index, converter, namespace):
+        namespace[f"compute_{self.name}"] = self.func
+        args = ", ".join(f"row[{index[path]}]" for path in self._paths)
+        return f"compute_{self.name}({args})"
+
+
+class ReadModel:
+    """
+    Быстрый путь чтения для списков: queryset.values_list() -> список dict
+    без создания экземпляров моделей и без машинерии ModelSerializer.
+
+    Поля объявляются атрибутами класса (Column/Computed) в порядке вывода.
+    Если задан serializer_class, конвертеры колонок берутся из полей сериализатора,
+    поэтому вывод совпадает с ним байт в байт.
+
+    Сборка модели (exec, поля сериализатора) дороже сериализации страницы -
+    во views модель берётся через for_fields(), скомпилированной один раз на набор полей.
+    """
+
+    serializer_class = None
+    _declared = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        declared = dict(getattr(cls, '_declared', ()))
+        for name, value in vars(cls).items():
+            if isinstance(value, (Column, Computed)):
+                declared[name] = value
+        cls._declared = tuple(declared.items())
+
+    def __init__(self, field_names=None):
+        declared = dict(self._declared)
+        if field_names is None:
+            names = [name for name, _ in self._declared]
+        else:
+            names = [name for name in field_names if name in declared]
+
+        index = {}
+        for name in names:
+            for path in declared[name].paths:
+                index.setdefault(path, len(index))
+        self.columns = tuple(index)
+
+        serializer_fields = self.serializer_class().fields if self.serializer_class else {}
+        namespace = {}
+        items = []
+        for name in names:
+            converter = self._get_converter(serializer_fields.get(name))
+            items.append(f"{name!r}: {declared[name].compile(index, converter, namespace)}")
+
+        # Одна функция-литерал вместо цикла по полям: row -> {'id': row[0], ...}
+        source = "def row_to_dict(row, tz):\n    return {%s}\n" % ", ".join(items)
+        exec(compile(source, f"<read model {type(self).__name__}>", 'exec'), namespace)
+        self.row_to_dict = namespace['row_to_dict']
+
+    @classmethod
+    def for_fields(cls, field_names=None):
+        if field_names is not None:
+            declared = dict(cls._declared)
+            field_names = tuple(name for name in field_names if name in declared)
+        return _compiled_read_model(cls, field_names)
+
+    @staticmethod
+    def _get_converter(field):
+        if field is None or isinstance(field, IDENTITY_FIELDS):
+            return None
+        if (
+            type(field) is serializers.DateTimeField
+            and not hasattr(field, 'timezone')
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601
+        ):
+            return iso_datetime
+        return field.to_representation
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def to_dicts(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        row_to_dict = self.row_to_dict
+        return [row_to_dict(row, tz) for row in rows]
+
+    def serialize(self, queryset):
+        return self.to_dicts(self.values(queryset))
+
+
+@lru_cache(maxsize=256)
+def _compiled_read_model(read_model_class, field_names):
+    return read_model_class(field_names=field_names)
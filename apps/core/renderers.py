@@ -0,0 +1,100 @@
+import math
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer, BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.core.timing import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson опционален
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack опционален
+    msgpack = None
+
+_fallback_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    # Типы, которые не умеют orjson/msgpack (Decimal, lazy-строки, QuerySet и т.д.),
+    # кодируем так же, как стандартный JSONEncoder DRF
+    return _fallback_encoder.default(obj)
+
+
+def has_non_finite(data):
+    # Обход без рекурсии: проверка идёт только для ответов, где orjson вывел null
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, Decimal) and not value.is_finite():
+            return True
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson. Формат вывода совпадает с JSONRenderer DRF:
+    компактный UTF-8, datetime в ISO 8601 с 'Z' для UTC.
+    Без установленного orjson, для запросов с indent и для данных, которые orjson
+    кодирует иначе (NaN/Infinity, целые больше 64 бит), работает как JSONRenderer.
+    """
+
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=self.options)
+        except orjson.JSONEncodeError:
+            # Целые больше 64 бит orjson не кодирует, а DRF выводит как есть
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # orjson пишет NaN и Infinity как null, а DRF при STRICT_JSON выдаёт ошибку
+        if b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и DRF, экранируем \u2028 и \u2029
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Компактный бинарный формат, выбирается заголовком `Accept: application/msgpack`.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with phase('render'):
+            return msgpack.packb(data, default=encode_default, use_bin_type=True)
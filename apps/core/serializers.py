@@ -0,0 +1,88 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse_names(raw):
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Разреженные наборы полей для ModelSerializer: ?fields=id,name или ?exclude=description.
+
+    Работает только для безопасных (GET/HEAD/OPTIONS) запросов. Вычисляемые поля
+    (SerializerMethodField, методы модели) при ?fields= вычисляются, только если
+    их запросили явно. Колонки, которые нужны вычисляемым полям, перечисляются
+    в Meta.field_dependencies.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        selected = self.get_selected_field_names(self.context.get('request'))
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_selected_field_names(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get('fields')
+        exclude = params.get('exclude')
+        if not fields and not exclude:
+            return None
+
+        selected = list(cls.Meta.fields)
+        if fields:
+            requested = _parse_names(fields)
+            selected = [name for name in selected if name in requested]
+        if exclude:
+            excluded = _parse_names(exclude)
+            selected = [name for name in selected if name not in excluded]
+        return selected
+
+    @classmethod
+    def get_model_columns(cls, selected):
+        """
+        Колонки модели и связи для select_related, необходимые выбранным полям.
+        """
+        model = cls.Meta.model
+        dependencies = getattr(cls.Meta, 'field_dependencies', {})
+        columns = {model._meta.pk.name}
+        relations = set()
+
+        for name in selected:
+            if name in dependencies:
+                paths = dependencies[name]
+            else:
+                declared = cls._declared_fields.get(name)
+                source = getattr(declared, 'source', None) or name
+                paths = [source.replace('.', '__')]
+
+            for path in paths:
+                first, _, rest = path.partition('__')
+                try:
+                    field = model._meta.get_field(first)
+                except FieldDoesNotExist:
+                    # Метод модели или SerializerMethodField без зависимостей
+                    continue
+                if not field.concrete:
+                    continue
+
+                columns.add(first)
+                if rest and field.is_relation:
+                    relations.add(first)
+                    columns.add(path)
+
+        return sorted(columns), sorted(relations)
+
+    @classmethod
+    def prune_queryset(cls, queryset, selected):
+        columns, relations = cls.get_model_columns(selected)
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
@@ -0,0 +1,81 @@
+"""
+SQLite для development и установок на одном узле (ENGINE 'apps.core.sqlite').
+
+Стандартный бэкенд открывает базу в режиме rollback journal с synchronous=FULL:
+запись блокирует читателей, каждый коммит - несколько fsync, и при нескольких воркерах
+gunicorn запросы получают "database is locked". Здесь каждое новое соединение
+получает прагмы из SQLITE_TUNING (WAL, synchronous=NORMAL, busy_timeout и др.).
+
+WRITE_LOCK сериализует транзакции через flock на файле <база>-lock. В WAL транзакция,
+начатая с BEGIN, читает снимок и при первой записи может сразу получить
+"database is locked" без ожидания busy_timeout, если другой писатель уже закоммитил.
+BEGIN IMMEDIATE под блокировкой берёт право записи заранее, а ядро будит ожидающих
+по очереди. Блокировка снимается при коммите, откате или закрытии соединения,
+а если воркер упал - освобождается ядром.
+"""
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - flock недоступен на Windows
+    fcntl = None
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+from apps.core.db import get_sqlite_tuning_settings
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._write_lock = None
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        tuning = get_sqlite_tuning_settings()
+        if tuning['ENABLED']:
+            for name, value in tuning['PRAGMAS'].items():
+                conn.execute(f'PRAGMA {name} = {value}')
+            if tuning['WRITE_LOCK'] and fcntl is None:
+                conn.close()
+                raise ImproperlyConfigured('SQLITE_TUNING WRITE_LOCK требует fcntl.flock (Linux, macOS)')
+        return conn
+
+    def uses_write_lock(self):
+        tuning = get_sqlite_tuning_settings()
+        return tuning['ENABLED'] and tuning['WRITE_LOCK'] and not self.is_in_memory_db()
+
+    def _start_transaction_under_autocommit(self):
+        if not self.uses_write_lock():
+            return super()._start_transaction_under_autocommit()
+
+        if self._write_lock is None:
+            self._write_lock = open(f"{self.settings_dict['NAME']}-lock", 'a')
+        fcntl.flock(self._write_lock, fcntl.LOCK_EX)
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self._write_lock is not None:
+            fcntl.flock(self._write_lock, fcntl.LOCK_UN)
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            if self._write_lock is not None:
+                self._write_lock.close()
+                self._write_lock = None
@@ -0,0 +1,83 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from apps.core.instrumentation import QueryCollector
+
+DEFAULT_SERVER_TIMING_SETTINGS = {
+    'ENABLED': True,
+    # Отдавать заголовок на каждый ответ (staging); иначе только админам по заголовку запроса
+    'ALWAYS': False,
+    'REQUEST_HEADER': 'X-Server-Timing',
+}
+
+_current_timings = contextvars.ContextVar('server_timings', default=None)
+
+
+def get_server_timing_settings():
+    return {**DEFAULT_SERVER_TIMING_SETTINGS, **getattr(settings, 'SERVER_TIMING', {})}
+
+
+class RequestTimings:
+    """
+    Длительности фаз запроса и число SQL-запросов внутри каждой фазы.
+    Повторный вход в фазу с тем же именем суммируется.
+    """
+
+    def __init__(self):
+        self.queries = QueryCollector()
+        self.phases = {}
+        self.start = time.perf_counter()
+        self.total = None
+
+    def add(self, name, duration, queries):
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += duration
+        entry[1] += queries
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def header(self):
+        metrics = []
+        for name, (duration, queries) in self.phases.items():
+            metrics.append(f'{name};dur={duration * 1000:.2f};desc="{queries} queries"')
+        metrics.append(f'db;dur={self.queries.duration * 1000:.2f};desc="{self.queries.count} queries"')
+        if self.total is not None:
+            metrics.append(f'total;dur={self.total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+def get_current_timings():
+    return _current_timings.get()
+
+
+@contextmanager
+def phase(name):
+    """
+    Замер фазы запроса для Server-Timing. Без активного замера ничего не делает.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    queries = timings.queries.count
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start, timings.queries.count - queries)
+
+
+@contextmanager
+def collect_timings():
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+        timings.finish()
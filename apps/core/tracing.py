@@ -0,0 +1,365 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACING_SETTINGS = {
+    # Выключено - TracingMiddleware не подключается, span() ничего не делает
+    'ENABLED': False,
+    'SERVICE_NAME': 'access-control-system',
+    # file - OTLP-JSON (ExportTraceServiceRequest) по строке на трассу, memory - коллектор в процессе
+    'EXPORTER': 'file',
+    'FILE_PATH': 'logs/traces.ndjson',
+    # Хвостовое сэмплирование: трассы с ошибкой (5xx) и медленнее SLOW_MS сохраняются всегда,
+    # остальные - с вероятностью SAMPLE_RATE
+    'SLOW_MS': 500,
+    'SAMPLE_RATE': 0.01,
+    # Сохранять трассу, если шлюз пометил её sampled во флагах traceparent
+    'RESPECT_PARENT_SAMPLED': True,
+    # Предел спанов в трассе (N+1 не должен раздувать экспорт)
+    'MAX_SPANS': 500,
+    'QUEUE_SIZE': 1000,
+}
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(?:-.*)?$')
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def get_tracing_settings():
+    return {**DEFAULT_TRACING_SETTINGS, **getattr(settings, 'TRACING', {})}
+
+
+def parse_traceparent(value):
+    """
+    W3C traceparent -> (trace_id, parent_span_id, sampled) или None для неверного заголовка.
+    """
+    match = _TRACEPARENT.match((value or '').strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == 'ff' or (version == '00' and len(value.strip()) != 55):
+        return None
+    if trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+class Span:
+    def __init__(self, trace, name, kind, parent_id, attributes):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.events = []
+        self.status = STATUS_UNSET
+        self.status_message = ''
+        self.start = time.time_ns()
+        self.end = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = STATUS_ERROR
+        self.status_message = str(exc)[:255]
+        self.events.append((time.time_ns(), 'exception', {
+            'exception.type': type(exc).__name__,
+            'exception.message': str(exc)[:1024],
+        }))
+
+    def to_otlp(self):
+        data = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': {'code': self.status},
+        }
+        if self.status_message:
+            data['status']['message'] = self.status_message
+        if self.events:
+            data['events'] = [
+                {'timeUnixNano': str(timestamp), 'name': name, 'attributes': _otlp_attributes(attributes)}
+                for timestamp, name, attributes in self.events
+            ]
+        return data
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # int64 в OTLP-JSON передаётся строкой
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Trace:
+    """
+    Спаны одного запроса. Решение о сохранении принимается в конце запроса (tail sampling).
+    """
+
+    def __init__(self, trace_id=None, parent_span_id=None, parent_sampled=False, max_spans=500):
+        self.trace_id = trace_id or _new_id(128)
+        self.parent_span_id = parent_span_id
+        self.parent_sampled = parent_sampled
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped_spans = 0
+
+    def add(self, span):
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+
+    @property
+    def root(self):
+        return self.spans[0] if self.spans else None
+
+    def duration_ms(self):
+        root = self.root
+        return (root.end - root.start) / 1e6 if root is not None and root.end else 0.0
+
+    def to_otlp(self, service_name):
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [span.to_otlp() for span in self.spans],
+                }],
+            }],
+        }
+
+
+def get_current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """
+    Спан внутри трассируемого запроса. Без активной трассы отдаёт NOOP_SPAN.
+    Исключение помечает спан ошибкой и пробрасывается дальше.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(trace, name, kind, parent.span_id if parent is not None else trace.parent_span_id, attributes)
+    trace.add(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.record_exception(exc)
+        raise
+    finally:
+        current.end = time.time_ns()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(traceparent=None, max_spans=500):
+    context = parse_traceparent(traceparent) if traceparent else None
+    trace = Trace(*context, max_spans=max_spans) if context else Trace(max_spans=max_spans)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def trace_query(execute, sql, params, many, context):
+    """
+    execute_wrapper: спан на каждый SQL-запрос ORM (только текст с плейсхолдерами, без параметров).
+    """
+    connection = context['connection']
+    operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'SQL'
+    with span(
+        f"{operation} {connection.alias}",
+        kind=SPAN_KIND_CLIENT,
+        **{'db.system': connection.vendor, 'db.name': connection.alias, 'db.statement': sql[:2000]}
+    ):
+        return execute(sql, params, many, context)
+
+
+def should_keep(trace, config):
+    root = trace.root
+    if root is None:
+        return False
+    if root.status == STATUS_ERROR or trace.duration_ms() >= config['SLOW_MS']:
+        return True
+    if config['RESPECT_PARENT_SAMPLED'] and trace.parent_sampled:
+        return True
+    return random.random() < config['SAMPLE_RATE']
+
+
+class InMemorySpanExporter:
+    """
+    Коллектор в процессе (тесты, отладка): хранит экспортированные OTLP-пакеты.
+    """
+
+    def __init__(self, service_name):
+        self.service_name = service_name
+        self.exported = []
+
+    def export(self, trace):
+        self.exported.append(trace.to_otlp(self.service_name))
+        return True
+
+    def spans(self):
+        return [
+            span_data
+            for payload in self.exported
+            for resource_spans in payload['resourceSpans']
+            for scope_spans in resource_spans['scopeSpans']
+            for span_data in scope_spans['spans']
+        ]
+
+    def flush(self):
+        pass
+
+
+class FileSpanExporter:
+    """
+    NDJSON-файл в формате OTLP-JSON: запрос только кладёт трассу в очередь,
+    сериализацию и запись выполняет фоновый поток; при переполнении трасса отбрасывается.
+    Файл можно отправить в коллектор: otelcol filelog или curl на /v1/traces построчно.
+    """
+
+    def __init__(self, service_name, path, queue_size):
+        self.service_name = service_name
+        self.path = str(path)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._write_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._pid = None
+
+    def export(self, trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self._ensure_thread()
+        return True
+
+    def flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        with self._write_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as output:
+                    output.write(''.join(
+                        json.dumps(trace.to_otlp(self.service_name), ensure_ascii=False) + '\n' for trace in batch
+                    ))
+            except OSError:
+                self.dropped += len(batch)
+                logger.exception("Failed to export %d traces to %s", len(batch), self.path)
+
+    def _ensure_thread(self):
+        # После fork (gunicorn --preload) поток нужно запустить заново в каждом воркере
+        if self._pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='trace-exporter', daemon=True).start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_span_exporter():
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                config = get_tracing_settings()
+                if config['EXPORTER'] == 'memory':
+                    _exporter = InMemorySpanExporter(config['SERVICE_NAME'])
+                else:
+                    _exporter = FileSpanExporter(config['SERVICE_NAME'], config['FILE_PATH'], config['QUEUE_SIZE'])
+                    atexit.register(_exporter.flush)
+    return _exporter
+
+
+def reset_span_exporter():
+    global _exporter
+    with _exporter_lock:
+        _exporter = None
@@ -0,0 +1,14 @@
+import os
+
+
+def pid_alive(pid):
+    """
+    Процесс с таким pid существует (в том числе чужой, которому нельзя слать сигналы).
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -3,7 +3,9 @@ import logging
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
-from .models import User
+from apps.core.metrics import AUTH_ATTEMPTS
+from apps.core.tracing import span
+from .models import User, normalize_email
 
 logger = logging.getLogger(__name__)
 
@@ -13,30 +15,37 @@ class CustomAuthentication:
     def authenticate_user(email, password):
         if not email or not password:
             logger.warning("Authentication attempt with empty email or password")
+            AUTH_ATTEMPTS.inc(method='password', outcome='missing_credentials')
             raise ValueError("Email и пароль обязательны")
 
         try:
-            user = User.objects.get(email=email.lower().strip())
+            with span('user.lookup'):
+                user = User.hot.get(email=normalize_email(email))
         except User.DoesNotExist:
-            logger.warning(f"Authentication failed: User not found for email {email}")
+            logger.warning("Authentication failed: User not found for email %s", email)
+            AUTH_ATTEMPTS.inc(method='password', outcome='user_not_found')
             return None
 
         if not user.is_active:
-            logger.warning(f"Authentication failed: Inactive user {email}")
+            logger.warning("Authentication failed: Inactive user %s", email)
+            AUTH_ATTEMPTS.inc(method='password', outcome='inactive')
             return None
 
         if not user.is_verified:
-            logger.warning(f"Authentication failed: Unverified user {email}")
+            logger.warning("Authentication failed: Unverified user %s", email)
+            AUTH_ATTEMPTS.inc(method='password', outcome='unverified')
             return None
 
         if not user.check_password(password):
-            logger.warning(f"Authentication failed: Invalid password for {email}")
+            logger.warning("Authentication failed: Invalid password for %s", email)
+            AUTH_ATTEMPTS.inc(method='password', outcome='invalid_password')
             return None
 
         user.last_login = timezone.now()
         user.save(update_fields=['last_login'])
 
-        logger.info(f"User authenticated successfully: {email}")
+        logger.info("User authenticated successfully: %s", email)
+        AUTH_ATTEMPTS.inc(method='password', outcome='success')
         return user
 
     @staticmethod
@@ -58,7 +67,7 @@ class CustomAuthentication:
             algorithm='HS256'
         )
 
-        logger.info(f"JWT token generated for user {user.email}")
+        logger.info("JWT token generated for user %s", user.email)
         return token
 
     @staticmethod
@@ -67,20 +76,21 @@ class CustomAuthentication:
             raise jwt.InvalidTokenError("Токен не может быть пустым")
 
         try:
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=['HS256']
-            )
-
-            logger.debug(f"JWT token decoded successfully for user_id {payload.get('user_id')}")
+            with span('jwt.decode'):
+                payload = jwt.decode(
+                    token,
+                    settings.SECRET_KEY,
+                    algorithms=['HS256']
+                )
+
+            logger.debug("JWT token decoded successfully for user_id %s", payload.get('user_id'))
             return payload
 
         except jwt.ExpiredSignatureError:
             logger.warning("JWT token has expired")
             raise
         except jwt.InvalidTokenError as e:
-            logger.warning(f"Invalid JWT token: {str(e)}")
+            logger.warning("Invalid JWT token: %s", e)
             raise
 
     @staticmethod
@@ -93,13 +103,14 @@ class CustomAuthentication:
                 logger.warning("JWT token does not contain user_id")
                 return None
 
-            user = User.objects.get(id=user_id, is_active=True)
+            with span('user.lookup', **{'enduser.id': str(user_id)}):
+                user = User.hot.get(id=user_id, is_active=True)
             return user
 
         except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
             return None
         except User.DoesNotExist:
-            logger.warning(f"User not found for user_id from token")
+            logger.warning("User not found for user_id from token")
             return None
 
 
@@ -112,22 +123,22 @@ class OTPService:
         digits = string.digits
         otp = ''.join(random.choice(digits) for _ in range(length))
 
-        logger.debug(f"OTP code generated: {otp}")
+        logger.debug("OTP code generated: %s", otp)
         return otp
 
     @staticmethod
     def verify_otp(user, otp_code):
         if not user.otp_code or not otp_code:
-            logger.warning(f"OTP verification failed: Missing OTP code for {user.email}")
+            logger.warning("OTP verification failed: Missing OTP code for %s", user.email)
             return False
         if user.otp_code != otp_code:
-            logger.warning(f"OTP verification failed: Invalid code for {user.email}")
+            logger.warning("OTP verification failed: Invalid code for %s", user.email)
             return False
         if OTPService.is_otp_expired(user):
-            logger.warning(f"OTP verification failed: Expired code for {user.email}")
+            logger.warning("OTP verification failed: Expired code for %s", user.email)
             return False
 
-        logger.info(f"OTP verified successfully for {user.email}")
+        logger.info("OTP verified successfully for %s", user.email)
         return True
 
     @staticmethod
@@ -0,0 +1,424 @@
+import http.client
+import io
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from apps.access.models import AccessRolesRules
+from apps.core.instrumentation import QueryCollector, collect_queries, get_query_inspection_settings
+from apps.users.authentication import CustomAuthentication
+from apps.users.models import User, Role, UserRole
+
+DEFAULT_MIX = 'register=1,login=2,my_permissions=6,products=4,admin_rules=1'
+PREFIX = 'loadtest'
+PASSWORD = 'loadpass123'
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class InProcessClient:
+    """
+    Полный стек Django (middleware, DRF, рендеринг) без сокетов.
+    SQL считается execute_wrapper'ом: соединения потока принадлежат только ему.
+    """
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        body = json.dumps(data) if data is not None else None
+        with collect_queries(QueryCollector()) as queries:
+            response = self.client.generic(method, path, body or '', content_type='application/json', **headers)
+        return response.status_code, _json(response.content), queries.count
+
+    def close(self):
+        for connection in connections.all(initialized_only=True):
+            connection.close()
+
+
+class HTTPClient:
+    """
+    Постоянное HTTP-соединение к локальному gunicorn. Число SQL-запросов берётся
+    из Server-Timing (нужен SERVER_TIMING_ALWAYS=True на сервере), иначе не считается.
+    """
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.connection = None
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json', 'X-Server-Timing': '1'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.connection.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                content = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Сервер закрыл keep-alive соединение - переподключаемся один раз
+                self.close()
+                if attempt:
+                    raise
+
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+        match = SERVER_TIMING_QUERIES.search(response.getheader('Server-Timing') or '')
+        return response.status, _json(content), int(match.group(1)) if match else None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def _json(content):
+    try:
+        return json.loads(content) if content else None
+    except ValueError:
+        return None
+
+
+class ScenarioStats:
+    def __init__(self):
+        self.iterations = 0
+        self.latencies = []
+        self.client_errors = 0
+        self.errors = 0
+        self.queries = 0
+        self.queries_known = True
+
+    def merge(self, other):
+        self.iterations += other.iterations
+        self.latencies.extend(other.latencies)
+        self.client_errors += other.client_errors
+        self.errors += other.errors
+        self.queries += other.queries
+        self.queries_known = self.queries_known and other.queries_known
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+
+        def percentile(fraction):
+            return round(latencies[min(requests - 1, int(requests * fraction))] * 1000, 2) if requests else None
+
+        return {
+            'iterations': self.iterations,
+            'requests': requests,
+            'rps': round(requests / duration, 1) if duration else 0.0,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if requests else None,
+            'client_errors': self.client_errors,
+            'error_rate': round(self.errors / requests, 4) if requests else 0.0,
+            'db_queries': self.queries if self.queries_known else None,
+            'db_queries_per_request': round(self.queries / requests, 2) if requests and self.queries_known else None,
+        }
+
+
+class Session:
+    """
+    Один виртуальный пользователь: клиент, токены пула и статистика по сценариям.
+    """
+
+    def __init__(self, client, pool, admin_token, rng):
+        self.client = client
+        self.pool = pool
+        self.admin_token = admin_token
+        self.rng = rng
+        self.stats = {}
+        self.scenario = None
+
+    def call(self, method, path, data=None, token=None, expect=(200, 201, 204, 304)):
+        stats = self.stats[self.scenario]
+        started = time.perf_counter()
+        try:
+            status, payload, queries = self.client.request(method, path, data, token)
+        except Exception:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors += 1
+            return None, None
+        stats.latencies.append(time.perf_counter() - started)
+
+        if queries is None:
+            stats.queries_known = False
+        else:
+            stats.queries += queries
+        if status >= 500:
+            stats.errors += 1
+        elif status not in expect:
+            stats.client_errors += 1
+        return status, payload
+
+    def run(self, name):
+        self.scenario = name
+        self.stats.setdefault(name, ScenarioStats()).iterations += 1
+        SCENARIOS[name](self)
+
+
+def scenario_register(session):
+    email = f'{PREFIX}_new_{threading.get_ident()}_{session.rng.getrandbits(48):x}@example.com'
+    status, _ = session.call('POST', '/api/register/', {
+        'email': email, 'first_name': 'Нагрузка', 'last_name': 'Тест',
+        'password': PASSWORD, 'password2': PASSWORD,
+    })
+    if status != 201:
+        return
+    # OTP приходит письмом; сервер и нагрузка работают с одной базой, поэтому код читаем из неё
+    otp_code = User.objects.filter(email=email).values_list('otp_code', flat=True).first()
+    session.call('POST', '/api/verify-otp/', {'email': email, 'otp_code': otp_code})
+
+
+def scenario_login(session):
+    email, _ = session.rng.choice(session.pool)
+    session.call('POST', '/api/login/', {'email': email, 'password': PASSWORD})
+
+
+def scenario_my_permissions(session):
+    _, token = session.rng.choice(session.pool)
+    session.call('GET', '/api/admin/my-permissions/', token=token)
+    session.call('GET', '/api/profile/', token=token)
+
+
+def scenario_products(session):
+    _, token = session.rng.choice(session.pool)
+    session.call('GET', '/api/mock/products/', token=token)
+    status, payload = session.call('POST', '/api/mock/products/', {'name': 'Товар', 'price': 100}, token=token)
+    if status != 201:
+        return
+    product_id = payload['product']['id']
+    session.call('GET', f'/api/mock/products/{product_id}/', token=token, expect=(200, 404))
+    session.call('PUT', f'/api/mock/products/{product_id}/', {'price': 150}, token=token, expect=(200, 404))
+    session.call('DELETE', f'/api/mock/products/{product_id}/', token=token, expect=(200, 404))
+
+
+def scenario_admin_rules(session):
+    status, payload = session.call('GET', '/api/admin/access-rules/', token=session.admin_token)
+    if status != 200:
+        return
+    rules = payload if isinstance(payload, list) else payload.get('results', [])
+    # Меняем только правила сгенерированных ролей, права пула на products не трогаем
+    rules = [rule for rule in rules if str(rule.get('role_name', '')).startswith(f'{PREFIX}_role_')]
+    if rules:
+        rule = session.rng.choice(rules)
+        session.call('PATCH', f"/api/admin/access-rules/{rule['id']}/", {
+            'create_permission': not rule['create_permission'],
+        }, token=session.admin_token)
+
+
+SCENARIOS = {
+    'register': scenario_register,
+    'login': scenario_login,
+    'my_permissions': scenario_my_permissions,
+    'products': scenario_products,
+    'admin_rules': scenario_admin_rules,
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f'Неизвестный сценарий "{name}", доступны: {", ".join(SCENARIOS)}')
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f'Неверный вес сценария "{part}"')
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный прогон смешанных сценариев в процессе или против локального gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Адрес локального сервера (http://127.0.0.1:8000); без него - в процессе')
+        parser.add_argument('--concurrency', type=int, default=8, help='Число параллельных клиентов (потоков)')
+        parser.add_argument('--duration', type=float, default=30, help='Длительность прогона, с')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Веса сценариев (по умолчанию {DEFAULT_MIX})')
+        parser.add_argument('--users', type=int, default=200, help='Пользователей в пуле (seed_scale)')
+        parser.add_argument('--bcrypt-rounds', type=int, default=12, help='Стоимость bcrypt паролей пула')
+        parser.add_argument('--seed', type=int, default=42, help='Seed данных и выбора сценариев')
+        parser.add_argument('--json', dest='json_path', help='Записать результаты в JSON-файл')
+        parser.add_argument(
+            '--allow-writes', action='store_true',
+            help='С --url: разрешить seed_scale --clear и удаление пользователей loadtest_* в базе из настроек'
+        )
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        if not mix:
+            raise CommandError('В --mix нет сценариев с положительным весом')
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть положительным')
+
+        url = options['url']
+        if url and urlsplit(url).hostname not in LOCAL_HOSTS:
+            raise CommandError('Нагрузка подаётся только на localhost')
+        if url and not options['allow_writes']:
+            # С --url данные готовятся в базе сервера, а не во временной - это может быть рабочая база
+            raise CommandError(
+                f"--url пишет в базу {connections['default'].settings_dict['NAME']}: пересоздаёт роли, "
+                f"правила и пользователей {PREFIX}_*. Если база одноразовая, добавьте --allow-writes"
+            )
+
+        old_config = None
+        budgets = override_settings(QUERY_INSPECTION={**get_query_inspection_settings(), 'BUDGET_MODE': 'warn'})
+        if not url:
+            # Отдельная одноразовая база и locmem-почта: ни данных разработчика, ни SMTP.
+            # Превышение бюджета SQL только логируется, как в продакшене, а не роняет запрос
+            setup_test_environment()
+            budgets.enable()
+            old_config = self.create_database()
+
+        try:
+            pool, admin_token = self.prepare_data(options)
+            results, duration = self.run_load(url, mix, pool, admin_token, options)
+        finally:
+            if old_config is not None:
+                self.destroy_database(old_config)
+                budgets.disable()
+                teardown_test_environment()
+
+        self.report(results, duration, options['json_path'])
+
+    def create_database(self):
+        connection = connections['default']
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        old_name = connection.settings_dict['NAME']
+        temp_path = None
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # In-memory SQLite не переживает параллельную запись из потоков - берём файл
+            fd, temp_path = tempfile.mkstemp(prefix='loadtest_', suffix='.sqlite3')
+            os.close(fd)
+            test_settings['NAME'] = temp_path
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        call_command('loaddata', 'fixtures/initial_data.json', verbosity=0)
+        self.stdout.write(self.style.WARNING(f'• Временная база: {connection.settings_dict["NAME"]}'))
+        return old_name, temp_path
+
+    def destroy_database(self, old_config):
+        old_name, temp_path = old_config
+        connections['default'].creation.destroy_test_db(old_name, verbosity=0)
+        if temp_path:
+            connections['default'].settings_dict['TEST']['NAME'] = None
+            # Файл блокировки записи SQLite (SQLITE_TUNING WRITE_LOCK) остаётся рядом с базой
+            if os.path.exists(f'{temp_path}-lock'):
+                os.remove(f'{temp_path}-lock')
+
+    def prepare_data(self, options):
+        call_command(
+            'seed_scale', users=options['users'], roles=5, elements=10, rules_density=0.5,
+            seed=options['seed'], password=PASSWORD, bcrypt_rounds=options['bcrypt_rounds'],
+            prefix=PREFIX, clear=True, stdout=io.StringIO()
+        )
+        User.objects.filter(email__startswith=f'{PREFIX}_new_').delete()
+
+        users = list(User.objects.filter(email__startswith=f'{PREFIX}_user_', is_active=True, is_verified=True))
+        if not users:
+            raise CommandError('Пул пользователей пуст, увеличьте --users')
+        # manager: чтение всех товаров, создание и изменение своих
+        manager = Role.objects.get(name='manager')
+        UserRole.objects.bulk_create([UserRole(user=user, role=manager) for user in users], ignore_conflicts=True)
+        admin_user = users[0]
+        UserRole.objects.get_or_create(user=admin_user, role=Role.objects.get(name='admin'))
+
+        pool = [(user.email, CustomAuthentication.generate_jwt_token(user)) for user in users[1:]] or \
+            [(admin_user.email, CustomAuthentication.generate_jwt_token(admin_user))]
+        rules = AccessRolesRules.objects.filter(role__name__startswith=f'{PREFIX}_role_').count()
+        self.stdout.write(self.style.SUCCESS(f'✓ Пул: {len(users)} пользователей, правил ролей нагрузки: {rules}'))
+        return pool, CustomAuthentication.generate_jwt_token(admin_user)
+
+    def run_load(self, url, mix, pool, admin_token, options):
+        names, weights = list(mix), list(mix.values())
+        deadline = time.perf_counter() + options['duration']
+        sessions = []
+
+        def worker(index):
+            client = HTTPClient(url) if url else InProcessClient()
+            session = Session(client, pool, admin_token, random.Random(options['seed'] * 1000 + index))
+            sessions.append(session)
+            try:
+                while time.perf_counter() < deadline:
+                    session.run(session.rng.choices(names, weights)[0])
+            finally:
+                client.close()
+
+        target = url or 'в процессе'
+        self.stdout.write(self.style.WARNING(
+            f"• Нагрузка: {options['concurrency']} клиентов, {options['duration']:g} с, {target}"
+        ))
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,), name=f'loadtest-{index}')
+                   for index in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        results = {}
+        for session in sessions:
+            for name, stats in session.stats.items():
+                results.setdefault(name, ScenarioStats()).merge(stats)
+        return results, duration
+
+    def report(self, results, duration, json_path):
+        total = ScenarioStats()
+        for stats in results.values():
+            total.merge(stats)
+        summary = {name: stats.summary(duration) for name, stats in sorted(results.items())}
+        summary['total'] = total.summary(duration)
+
+        self.stdout.write(
+            f"\n{'scenario':<16}{'iter':>7}{'req':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'4xx':>6}{'err%':>7}{'SQL':>9}{'SQL/req':>9}"
+        )
+        for name, row in summary.items():
+            self.stdout.write(
+                f"{name:<16}{row['iterations']:>7}{row['requests']:>8}{row['rps']:>9.1f}"
+                f"{_ms(row['p50_ms']):>9}{_ms(row['p95_ms']):>9}{_ms(row['p99_ms']):>9}"
+                f"{row['client_errors']:>6}{row['error_rate'] * 100:>7.2f}"
+                f"{_na(row['db_queries']):>9}{_na(row['db_queries_per_request']):>9}"
+            )
+        self.stdout.write(f'Время: {duration:.1f} с, задержки в мс')
+
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as output:
+                json.dump({'duration_s': round(duration, 2), 'scenarios': summary}, output, indent=2,
+                          ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'✓ Результаты: {json_path}'))
+
+        if total.errors:
+            self.stdout.write(self.style.ERROR(f'Ошибок (5xx и сбоев соединения): {total.errors}'))
+
+
+def _ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def _na(value):
+    return '-' if value is None else value
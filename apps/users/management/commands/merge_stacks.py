@@ -0,0 +1,47 @@
+import glob
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.profiling import format_collapsed, get_profiling_settings, read_collapsed
+
+
+class Command(BaseCommand):
+    help = 'Склейка свёрнутых стеков постоянного профилировщика всех воркеров в один flamegraph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Каталог со stacks-*.collapsed (по умолчанию PROFILING["CONTINUOUS_DIR"])')
+        parser.add_argument('--since', type=int, default=0, help='Только файлы за последние N минут')
+        parser.add_argument('--output', help='Файл результата (по умолчанию stdout)')
+        parser.add_argument('--top', type=int, default=0, help='Вывести N самых горячих функций (self time)')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or str(get_profiling_settings()['CONTINUOUS_DIR'])
+        paths = sorted(glob.glob(os.path.join(directory, 'stacks-*.collapsed')))
+        if options['since']:
+            threshold = time.time() - options['since'] * 60
+            paths = [path for path in paths if os.path.getmtime(path) >= threshold]
+        if not paths:
+            raise CommandError(f'Нет файлов stacks-*.collapsed в {directory}')
+
+        counts = {}
+        for path in paths:
+            read_collapsed(path, counts)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(format_collapsed(counts))
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {len(paths)} файлов, {sum(counts.values())} сэмплов -> {options["output"]}'
+            ))
+        elif not options['top']:
+            self.stdout.write(format_collapsed(counts), ending='')
+
+        if options['top']:
+            leaves = {}
+            for stack, count in counts.items():
+                leaf = stack.rsplit(';', 1)[-1]
+                leaves[leaf] = leaves.get(leaf, 0) + count
+            total = sum(leaves.values())
+            for leaf, count in sorted(leaves.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+                self.stdout.write(f'{count * 100 / total:6.2f}% {count:>8} {leaf}')
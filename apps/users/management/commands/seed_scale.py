@@ -0,0 +1,161 @@
+import datetime
+import itertools
+import random
+import time
+
+import bcrypt
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.access.models import AccessRolesRules, BusinessElement
+from apps.access.services import PERMISSION_FIELDS, bump_permission_version
+from apps.users.models import User, Role, UserRole
+
+FIRST_NAMES = ('Александр', 'Мария', 'Иван', 'Анна', 'Дмитрий', 'Елена', 'Сергей', 'Ольга', 'Андрей', 'Наталья')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков')
+
+# Алфавит bcrypt для соли (не совпадает со стандартным base64)
+BCRYPT_ALPHABET = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+BASE_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных в масштабе продакшена (детерминированно по --seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Число пользователей')
+        parser.add_argument('--roles', type=int, default=20, help='Число ролей')
+        parser.add_argument('--elements', type=int, default=50, help='Число бизнес-элементов')
+        parser.add_argument('--rules-density', type=float, default=0.3,
+                            help='Доля пар (роль, элемент) с правилом доступа, 0..1')
+        parser.add_argument('--max-roles-per-user', type=int, default=3, help='Ролей у пользователя: от 1 до N')
+        parser.add_argument('--seed', type=int, default=42, help='Seed генератора')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Строк в одной транзакции')
+        parser.add_argument('--password', default='scalepass123', help='Пароль всех пользователей')
+        parser.add_argument('--bcrypt-rounds', type=int, default=12, help='Стоимость bcrypt (как в User.set_password)')
+        parser.add_argument('--prefix', default='scale', help='Префикс имён и email сгенерированных данных')
+        parser.add_argument('--clear', action='store_true', help='Удалить данные с этим префиксом перед генерацией')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['rules_density'] <= 1:
+            raise CommandError('--rules-density должен быть в диапазоне 0..1')
+        if options['batch_size'] < 1 or options['max_roles_per_user'] < 1:
+            raise CommandError('--batch-size и --max-roles-per-user должны быть положительными')
+
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+
+        if options['clear']:
+            self.clear()
+        elif User.objects.filter(email__startswith=f'{self.prefix}_user_').exists():
+            raise CommandError(f'Данные с префиксом "{self.prefix}" уже есть, добавьте --clear')
+
+        started = time.perf_counter()
+        password_hash = self.password_hash(options['password'], options['bcrypt_rounds'], rng)
+
+        with transaction.atomic():
+            roles = Role.objects.bulk_create([
+                Role(name=f'{self.prefix}_role_{index}', description='Сгенерировано seed_scale')
+                for index in range(options['roles'])
+            ])
+            generated_elements = BusinessElement.objects.bulk_create([
+                BusinessElement(name=f'{self.prefix}_element_{index}', description='Сгенерировано seed_scale')
+                for index in range(options['elements'])
+            ])
+        self.stdout.write(self.style.SUCCESS(f'✓ Роли: {len(roles)}, бизнес-элементы: {len(generated_elements)}'))
+
+        # Правила ссылаются и на элементы из фикстур (products, orders...), чтобы проверки прав их находили
+        elements = list(BusinessElement.objects.exclude(
+            id__in=[element.id for element in generated_elements]
+        ).order_by('name')) + generated_elements
+        rules = self.create_rules(rng, roles, elements, options['rules_density'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Правила доступа: {rules}'))
+
+        users, memberships = self.create_users(rng, roles, options['users'], options['max_roles_per_user'], password_hash)
+        bump_permission_version()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Пользователи: {users}, назначения ролей: {memberships} '
+            f'за {elapsed:.1f} с ({users / elapsed if elapsed else 0:.0f} пользователей/с)'
+        ))
+
+    def clear(self):
+        users = User.objects.filter(email__startswith=f'{self.prefix}_user_')
+        UserRole.objects.filter(assigned_by__in=users).update(assigned_by=None)
+        for relation in (UserRole, User.groups.through, User.user_permissions.through):
+            relation.objects.filter(user__in=users)._raw_delete(relation.objects.db)
+        # Связанные строки уже удалены: обычный delete() на миллионах пользователей
+        # собирал бы каскад в памяти пачками по несколько сотен id
+        users._raw_delete(users.db)
+        AccessRolesRules.objects.filter(role__name__startswith=f'{self.prefix}_role_').delete()
+        BusinessElement.objects.filter(name__startswith=f'{self.prefix}_element_').delete()
+        Role.objects.filter(name__startswith=f'{self.prefix}_role_').delete()
+        self.stdout.write(self.style.WARNING(f'• Удалены данные с префиксом "{self.prefix}"'))
+
+    @staticmethod
+    def password_hash(password, rounds, rng):
+        # Один хеш на всех: bcrypt на каждого пользователя занял бы часы.
+        # Соль берётся из генератора, чтобы хеш тоже был детерминированным
+        salt = f'$2b${rounds:02d}${"".join(rng.choice(BCRYPT_ALPHABET[:-2]) for _ in range(21))}.'
+        return bcrypt.hashpw(password.encode('utf-8'), salt.encode('ascii')).decode('utf-8')
+
+    def create_rules(self, rng, roles, elements, density):
+        rules = []
+        for role, element in itertools.product(roles, elements):
+            if rng.random() >= density:
+                continue
+            flags = {field: rng.random() < 0.5 for _, field in PERMISSION_FIELDS}
+            # Как в реальных правилах: право "на все" подразумевает право "на свои"
+            for own, everything in (('read_permission', 'read_all_permission'),
+                                    ('update_permission', 'update_all_permission'),
+                                    ('delete_permission', 'delete_all_permission')):
+                flags[own] = flags[own] or flags[everything]
+            rules.append(AccessRolesRules(role=role, element=element, **flags))
+
+        with transaction.atomic():
+            AccessRolesRules.objects.bulk_create(rules, batch_size=self.batch_size)
+        return len(rules)
+
+    def create_users(self, rng, roles, count, max_roles, password_hash):
+        # Популярность ролей по закону Ципфа: несколько массовых ролей и длинный хвост
+        role_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(roles))))
+        users_created = memberships_created = 0
+
+        for batch_start in range(0, count, self.batch_size):
+            batch = []
+            for index in range(batch_start, min(batch_start + self.batch_size, count)):
+                joined = BASE_DATE + datetime.timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                batch.append(User(
+                    email=f'{self.prefix}_user_{index}@example.com',
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    password=password_hash,
+                    is_verified=rng.random() < 0.95,
+                    is_active=rng.random() < 0.98,
+                    date_joined=joined,
+                ))
+
+            with transaction.atomic():
+                User.objects.bulk_create(batch)
+                if batch and batch[0].pk is None:
+                    # Базы без RETURNING: id берём отдельным запросом
+                    ids = dict(User.objects.filter(email__in=[user.email for user in batch]).values_list('email', 'id'))
+                    for user in batch:
+                        user.pk = ids[user.email]
+
+                user_roles = []
+                if roles:
+                    for user in batch:
+                        assigned = set(rng.choices(roles, cum_weights=role_weights, k=rng.randint(1, max_roles)))
+                        user_roles.extend(
+                            UserRole(user_id=user.pk, role_id=role.pk)
+                            for role in sorted(assigned, key=lambda role: role.pk)
+                        )
+                UserRole.objects.bulk_create(user_roles)
+
+            users_created += len(batch)
+            memberships_created += len(user_roles)
+            self.stdout.write(f'  {users_created}/{count}')
+        return users_created, memberships_created
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from apps.core.db import get_replica_settings
+
+
+class Command(BaseCommand):
+    help = 'Снимок SQLite-базы default в файлы реплик из DB_REPLICAS (локальная проверка роутера реплик)'
+
+    def handle(self, *args, **options):
+        aliases = get_replica_settings()['ALIASES']
+        if not aliases:
+            raise CommandError('Реплики не настроены: задайте DB_SQLITE_REPLICAS=N для development')
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Команда только для SQLite: реплики PostgreSQL синхронизирует репликация')
+
+        primary.ensure_connection()
+        for alias in aliases:
+            name = str(connections[alias].settings_dict['NAME'])
+            # Backup API копирует согласованный снимок, даже если в default идут записи
+            target = sqlite3.connect(name)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f'✓ {alias}: {name}'))
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_role_options_alter_user_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='idx_user_email',
+        ),
+        migrations.AddIndex(
+            model_name='userrole',
+            index=models.Index(fields=['role', 'user'], name='idx_role_user'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:09
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_emails(apps, schema_editor):
+    """
+    Приводит сохранённые email к виду normalize_email (trim + lower) одним UPDATE.
+    Адреса, совпадающие без учёта регистра, автоматически не сливаются: миграция
+    останавливается со списком, дубликаты нужно разобрать вручную.
+    """
+    User = apps.get_model('users', 'User')
+    normalized = Lower(Trim('email'))
+
+    duplicates = list(
+        User.objects.values(normalized_email=normalized)
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('normalized_email', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Email совпадают без учёта регистра, объедините или переименуйте пользователей: '
+            + ', '.join(duplicates)
+        )
+
+    User.objects.filter(~Q(email=normalized)).update(email=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='uniq_user_email_ci'),
+        ),
+    ]
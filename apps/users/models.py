@@ -1,10 +1,31 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 import bcrypt
+from apps.core.managers import HotPathManager
+from apps.core.query_cache import CachingManager
+from apps.core.metrics import BCRYPT_DURATION
+from apps.core.tracing import span
+
+
+def normalize_email(email):
+    """
+    Единая нормализация email для записи и поиска: без пробелов по краям и в нижнем регистре.
+    BaseUserManager.normalize_email приводит к нижнему регистру только домен.
+    """
+    return (email or '').strip().lower()
 
 
 class UserManager(BaseUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        return normalize_email(email)
+
+    def get_by_natural_key(self, username):
+        # Вход в админку: тот же поиск по нормализованному email, что и в API
+        return self.get(email=normalize_email(username))
+
     def create_user(self, email, first_name, last_name, password=None, **extra_fields):
         if not email:
             raise ValueError("Email обязателен")
@@ -121,6 +142,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
 
     objects = UserManager()
+    hot = HotPathManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
@@ -131,19 +153,28 @@ class User(AbstractBaseUser, PermissionsMixin):
         ordering = ['-date_joined']
         db_table = 'users'
         indexes = [
-            models.Index(fields=['email'], name='idx_user_email'),
             models.Index(fields=['is_active', 'is_verified'], name='idx_user_status'),
         ]
+        constraints = [
+            # Уникальность без учёта регистра на уровне БД; поиск идёт по unique-индексу email,
+            # так как email всегда хранится нормализованным (см. save)
+            models.UniqueConstraint(Lower('email'), name='uniq_user_email_ci'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
 
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     def set_password(self, raw_password):
         if not raw_password:
             raise ValueError("Пароль не может быть пустым")
 
         salt = bcrypt.gensalt(rounds=12)
-        hashed = bcrypt.hashpw(raw_password.encode('utf-8'), salt)
+        with span('bcrypt.hash'), BCRYPT_DURATION.time(operation='hash'):
+            hashed = bcrypt.hashpw(raw_password.encode('utf-8'), salt)
         self.password = hashed.decode('utf-8')
 
     def check_password(self, raw_password):
@@ -151,10 +182,11 @@ class User(AbstractBaseUser, PermissionsMixin):
             return False
 
         try:
-            return bcrypt.checkpw(
-                raw_password.encode('utf-8'),
-                self.password.encode('utf-8')
-            )
+            with span('bcrypt.check'), BCRYPT_DURATION.time(operation='check'):
+                return bcrypt.checkpw(
+                    raw_password.encode('utf-8'),
+                    self.password.encode('utf-8')
+                )
         except (ValueError, AttributeError):
             return False
 
@@ -193,6 +225,9 @@ class Role(models.Model):
         help_text="Автоматически устанавливается при создании"
     )
 
+    # Списки ролей в админ-API читаются через queryset.cache()
+    objects = CachingManager()
+
     class Meta:
         verbose_name = "Роль"
         verbose_name_plural = "Роли"
@@ -233,6 +268,9 @@ class UserRole(models.Model):
         help_text="Администратор, который назначил роль"
     )
 
+    objects = models.Manager()
+    hot = HotPathManager()
+
     class Meta:
         verbose_name = "Роль пользователя"
         verbose_name_plural = "Роли пользователей"
@@ -241,6 +279,8 @@ class UserRole(models.Model):
         db_table = 'user_roles'
         indexes = [
             models.Index(fields=['user', 'role'], name='idx_user_role'),
+            # Пользователи роли (список в админке, users_count) без обращения к таблице
+            models.Index(fields=['role', 'user'], name='idx_role_user'),
         ]
 
     def __str__(self):
@@ -1,12 +1,20 @@
 from rest_framework import permissions
-from apps.access.models import AccessRolesRules, BusinessElement
+from apps.access.audit import audit
+from apps.access.models import AccessDecisionLog
+from apps.access.services import permission_cache, get_user_role_ids
+from apps.core.instrumentation import query_budget, query_budget_exempt
+from apps.core.timing import phase
+from apps.core.tracing import span
 
 
 class IsAuthenticatedAndVerified(permissions.BasePermission):
     message = "Вы должны быть авторизованы и верифицированы"
 
     def has_permission(self, request, view):
-        user = request.user
+        return self.is_verified_user(request.user)
+
+    @staticmethod
+    def is_verified_user(user):
         return bool(
             user and
             user.is_authenticated and
@@ -15,6 +23,15 @@ class IsAuthenticatedAndVerified(permissions.BasePermission):
         )
 
 
+def is_admin_user(user):
+    """
+    Проверка IsAdmin вне DRF (middleware): верифицированный пользователь с ролью admin.
+    """
+    if not IsAuthenticatedAndVerified.is_verified_user(user):
+        return False
+    return user.roles.filter(role__name='admin').exists()
+
+
 class RoleBasedPermission(permissions.BasePermission):
     message = "У вас нет прав для выполнения этого действия"
 
@@ -33,23 +50,32 @@ class RoleBasedPermission(permissions.BasePermission):
         if not action_type:
             return True
 
-        try:
-            element = BusinessElement.objects.get(name=element_name)
-        except BusinessElement.DoesNotExist:
+        # Тёплый путь проверки - не больше одного запроса (роли пользователя)
+        with phase('perm'), span('permission.check', element=element_name, action=action_type) as check, \
+                query_budget('permission'):
+            allowed = self._evaluate(user, view, element_name, action_type)
+            check.set_attribute('allowed', allowed)
+        audit(
+            request,
+            AccessDecisionLog.DECISION_ALLOW if allowed else AccessDecisionLog.DECISION_DENY,
+            action_type,
+            element=element_name,
+            reason='' if allowed else self.message
+        )
+        return allowed
+
+    def _evaluate(self, user, view, element_name, action_type):
+        if element_name not in permission_cache.business_element_names():
             self.message = f"Бизнес-элемент '{element_name}' не найден"
             return False
 
-        user_role_ids = user.roles.all().values_list('role_id', flat=True)
+        user_role_ids = get_user_role_ids(user)
         if not user_role_ids:
             self.message = "У вас нет назначенных ролей"
             return False
 
-        rules = AccessRolesRules.objects.filter(
-            role_id__in=user_role_ids,
-            element_id=element.id
-        )
-
-        if not rules.exists():
+        element_permissions = permission_cache.for_roles(user_role_ids).get(element_name)
+        if element_permissions is None:
             self.message = f"Нет правил доступа для элемента '{element_name}'"
             return False
 
@@ -58,43 +84,44 @@ class RoleBasedPermission(permissions.BasePermission):
 
         if check_owner and hasattr(view, 'get_object'):
             try:
-                obj = view.get_object()
+                with query_budget_exempt():
+                    obj = view.get_object()
             except Exception:
                 obj = None
 
-        for rule in rules:
-            if self._check_rule_permission(rule, action_type, user, obj, check_owner):
-                return True
+        if self._check_permission(element_permissions['permissions'], action_type, user, obj, check_owner):
+            return True
 
         self.message = f"У вас нет прав для действия '{action_type}' на элементе '{element_name}'"
         return False
 
-    def _check_rule_permission(self, rule, action_type, user, obj, check_owner):
+    def _check_permission(self, perms, action_type, user, obj, check_owner):
+        # perms - объединённые (OR) флаги всех правил ролей пользователя для элемента
         if action_type == "read":
-            if rule.read_all_permission:
+            if perms['read_all']:
                 return True
-            if rule.read_permission and not check_owner:
+            if perms['read'] and not check_owner:
                 return True
-            if rule.read_permission and check_owner and obj and hasattr(obj, 'owner_id'):
+            if perms['read'] and check_owner and obj and hasattr(obj, 'owner_id'):
                 return obj.owner_id == user.id
 
         elif action_type == "create":
-            return rule.create_permission
+            return perms['create']
 
         elif action_type == "update":
-            if rule.update_all_permission:
+            if perms['update_all']:
                 return True
-            if rule.update_permission and not check_owner:
+            if perms['update'] and not check_owner:
                 return True
-            if rule.update_permission and check_owner and obj and hasattr(obj, 'owner_id'):
+            if perms['update'] and check_owner and obj and hasattr(obj, 'owner_id'):
                 return obj.owner_id == user.id
 
         elif action_type == "delete":
-            if rule.delete_all_permission:
+            if perms['delete_all']:
                 return True
-            if rule.delete_permission and not check_owner:
+            if perms['delete'] and not check_owner:
                 return True
-            if rule.delete_permission and check_owner and obj and hasattr(obj, 'owner_id'):
+            if perms['delete'] and check_owner and obj and hasattr(obj, 'owner_id'):
                 return obj.owner_id == user.id
 
         return False
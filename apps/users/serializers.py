@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
+from apps.core.tracing import SPAN_KIND_CLIENT, span
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
-from .models import User
+from django.db import IntegrityError, transaction
+from .models import User, normalize_email
 from .authentication import CustomAuthentication, OTPService
 import logging
 
@@ -26,12 +29,15 @@ class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['email', 'first_name', 'last_name', 'password', 'password2']
+        # Автоматический UniqueValidator проверял бы email до нормализации - лишний запрос,
+        # который к тому же пропускает адрес в другом регистре. Проверка - в validate_email
+        extra_kwargs = {'email': {'validators': []}}
 
     def validate_email(self, value):
-        email = value.lower().strip()
+        email = normalize_email(value)
 
-        if User.objects.filter(email=email).exists():
-            logger.warning(f"Registration attempt with existing email: {email}")
+        if User.hot.filter(email=email).exists():
+            logger.warning("Registration attempt with existing email: %s", email)
             raise serializers.ValidationError("Этот email уже зарегистрирован")
 
         return email
@@ -66,14 +72,19 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password2')
         password = validated_data.pop('password')
-        validated_data['email'] = validated_data['email'].lower().strip()
         user = User(**validated_data)
         user.set_password(password)
         otp_code = OTPService.generate_otp()
         user.otp_code = otp_code
         user.otp_expires_at = timezone.now() + timedelta(minutes=10)
-        user.save()
-        logger.info(f"New user registered: {user.email}")
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            # Параллельная регистрация того же email прошла validate_email раньше нас
+            logger.warning("Registration race on existing email: %s", user.email)
+            raise serializers.ValidationError({'email': ["Этот email уже зарегистрирован"]})
+        logger.info("New user registered: %s", user.email)
         self._send_otp_email(user)
 
         return user
@@ -96,16 +107,17 @@ Access Control System
         """
 
         try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[user.email],
-                fail_silently=False,
-            )
-            logger.info(f"OTP email sent successfully to {user.email}")
+            with span('email.send', kind=SPAN_KIND_CLIENT, **{'email.template': 'registration_otp'}):
+                send_mail(
+                    subject=subject,
+                    message=message,
+                    from_email=settings.EMAIL_HOST_USER,
+                    recipient_list=[user.email],
+                    fail_silently=False,
+                )
+            logger.info("OTP email sent successfully to %s", user.email)
         except Exception as e:
-            logger.error(f"Failed to send OTP email to {user.email}: {str(e)}")
+            logger.error("Failed to send OTP email to %s: %s", user.email, e)
 
 
 class VerifyOtpSerializer(serializers.Serializer):
@@ -119,17 +131,17 @@ class VerifyOtpSerializer(serializers.Serializer):
     )
 
     def validate(self, attrs):
-        email = attrs.get('email').lower().strip()
+        email = normalize_email(attrs.get('email'))
         otp_code = attrs.get('otp_code')
 
         try:
-            user = User.objects.get(email=email)
+            user = User.hot.get(email=email)
         except User.DoesNotExist:
-            logger.warning(f"OTP verification attempt for non-existent user: {email}")
+            logger.warning("OTP verification attempt for non-existent user: %s", email)
             raise serializers.ValidationError("Пользователь не найден")
 
         if user.is_verified:
-            logger.info(f"OTP verification attempt for already verified user: {email}")
+            logger.info("OTP verification attempt for already verified user: %s", email)
             raise serializers.ValidationError("Email уже подтверждён")
 
         if not OTPService.verify_otp(user, otp_code):
@@ -140,7 +152,7 @@ class VerifyOtpSerializer(serializers.Serializer):
         user.otp_expires_at = None
         user.save(update_fields=['is_verified', 'otp_code', 'otp_expires_at'])
 
-        logger.info(f"Email verified successfully for user: {email}")
+        logger.info("Email verified successfully for user: %s", email)
 
         attrs['user'] = user
         return attrs
@@ -178,7 +190,7 @@ class LoginSerializer(serializers.Serializer):
         token = CustomAuthentication.generate_jwt_token(user)
         attrs['token'] = token
         attrs['user'] = user
-        logger.info(f"User logged in successfully: {email}")
+        logger.info("User logged in successfully: %s", email)
         return attrs
 
 
@@ -186,13 +198,14 @@ class UpdateProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['first_name', 'last_name', 'email']
+        extra_kwargs = {'email': {'validators': []}}
 
     def validate_email(self, value):
         user = self.context['request'].user
-        email = value.lower().strip()
+        email = normalize_email(value)
 
-        if User.objects.exclude(id=user.id).filter(email=email).exists():
-            logger.warning(f"Profile update attempt with existing email: {email}")
+        if User.hot.filter(email=email).exclude(id=user.id).exists():
+            logger.warning("Profile update attempt with existing email: %s", email)
             raise serializers.ValidationError("Этот email уже используется")
 
         return email
@@ -208,7 +221,7 @@ class UpdateProfileSerializer(serializers.ModelSerializer):
 
             instance.save(update_fields=['is_verified', 'otp_code', 'otp_expires_at'])
 
-            logger.info(f"Email changed for user {instance.id}, verification required")
+            logger.info("Email changed for user %s, verification required", instance.id)
 
         return instance
 
@@ -223,11 +236,11 @@ class SoftDeleteSerializer(serializers.ModelSerializer):
         user.is_active = False
         user.save(update_fields=['is_active'])
 
-        logger.info(f"User account soft deleted: {user.email}")
+        logger.info("User account soft deleted: %s", user.email)
         return user
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     roles = serializers.SerializerMethodField()
 
     class Meta:
@@ -1,4 +1,9 @@
+import importlib
+
 import pytest
+from django.apps import apps as django_apps
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -176,6 +181,38 @@ class TestUserLogin:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+    def test_login_with_permissions_and_profile(self):
+        role, _ = Role.objects.get_or_create(name='user')
+        UserRole.objects.create(user=self.user, role=role)
+        data = {
+            'email': 'verified@example.com',
+            'password': 'testpass123'
+        }
+
+        response = self.client.post(f'{self.login_url}?include=permissions,profile', data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['profile']['roles'] == ['user']
+        assert isinstance(response.data['permissions'], list)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        refresh = self.client.get(
+            reverse('my-permissions'),
+            HTTP_IF_NONE_MATCH=response.data['permissions_etag']
+        )
+        assert refresh.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_login_with_unknown_include(self):
+        data = {
+            'email': 'verified@example.com',
+            'password': 'testpass123'
+        }
+
+        response = self.client.post(f'{self.login_url}?include=orders', data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 class TestOTPVerification:
 
@@ -323,3 +360,56 @@ class TestJWTAuthentication:
         response = self.client.post(reverse('logout'))
         assert response.status_code == status.HTTP_200_OK
         assert 'выход' in response.data['message'].lower()
+
+
+@pytest.mark.django_db
+class TestEmailNormalization:
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='  Mixed.Case@Example.COM ',
+            first_name='Смешанный',
+            last_name='Регистр',
+            password='pass123'
+        )
+        self.user.is_verified = True
+        self.user.save()
+
+    def test_email_is_stored_normalized(self):
+        self.user.refresh_from_db()
+        assert self.user.email == 'mixed.case@example.com'
+
+    def test_login_and_registration_ignore_case(self):
+        login = self.client.post(
+            reverse('login'), {'email': 'MIXED.case@example.com', 'password': 'pass123'}, format='json'
+        )
+        assert login.status_code == status.HTTP_200_OK
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('register'), {
+                'email': 'Mixed.Case@example.com',
+                'first_name': 'Новый',
+                'last_name': 'Пользователь',
+                'password': 'newpass123',
+                'password2': 'newpass123'
+            }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'email' in response.data['details']
+        # Одна проверка по нормализованному email вместо UniqueValidator + validate_email
+        assert len(queries) == 1
+
+    def test_database_rejects_case_duplicates(self):
+        other = User.objects.create_user(email='other@example.com', first_name='Д', last_name='Р', password='pass123')
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            User.objects.filter(pk=other.pk).update(email='MIXED.CASE@example.com')
+
+    def test_backfill_normalizes_existing_emails(self):
+        migration = importlib.import_module('apps.users.migrations.0004_email_case_insensitive')
+        User.objects.filter(pk=self.user.pk).update(email=' Legacy@Example.COM')
+
+        migration.normalize_emails(django_apps, None)
+
+        self.user.refresh_from_db()
+        assert self.user.email == 'legacy@example.com'
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from apps.users.models import User
+from apps.users.management.commands.loadtest import (
+    Command, InProcessClient, SCENARIOS, ScenarioStats, Session, parse_mix
+)
+
+
+class TestLoadtestHelpers:
+    def test_parse_mix(self):
+        assert parse_mix('login=2, products=0.5,register') == {'login': 2.0, 'products': 0.5, 'register': 1.0}
+        assert parse_mix('login=0,products=1') == {'products': 1.0}
+        with pytest.raises(CommandError):
+            parse_mix('checkout=1')
+
+    def test_refuses_remote_targets(self):
+        with pytest.raises(CommandError):
+            call_command('loadtest', url='http://example.com:8000', duration=0.1)
+
+    def test_url_mode_requires_allow_writes(self):
+        with pytest.raises(CommandError, match='--allow-writes'):
+            call_command('loadtest', url='http://127.0.0.1:8000', duration=0.1)
+
+        assert not User.objects.filter(email__startswith='loadtest_').exists()
+
+    def test_stats_summary(self):
+        stats = ScenarioStats()
+        stats.latencies = [index / 1000 for index in range(1, 101)]
+        stats.errors = 2
+        stats.queries = 300
+
+        summary = stats.summary(duration=10)
+
+        assert summary['requests'] == 100 and summary['rps'] == 10.0
+        assert (summary['p50_ms'], summary['p95_ms'], summary['p99_ms']) == (51.0, 96.0, 100.0)
+        assert summary['error_rate'] == 0.02 and summary['db_queries_per_request'] == 3.0
+
+
+@pytest.mark.django_db
+class TestLoadtestScenarios:
+    def test_every_scenario_runs_in_process(self, settings):
+        settings.QUERY_INSPECTION = {**settings.QUERY_INSPECTION, 'BUDGET_MODE': 'warn'}
+        command = Command()
+        pool, admin_token = command.prepare_data({'users': 10, 'bcrypt_rounds': 4, 'seed': 1})
+        session = Session(InProcessClient(), pool, admin_token, random.Random(1))
+
+        for name in SCENARIOS:
+            session.run(name)
+
+        for name, stats in session.stats.items():
+            assert stats.latencies, name
+            assert stats.errors == 0 and stats.client_errors == 0, name
+            assert stats.queries > 0, name
@@ -0,0 +1,143 @@
+import json
+import logging
+import queue
+
+from apps.core.logs import (
+    JSONFormatter, NonBlockingQueueHandler, RateLimitFilter, TargetedQueueListener, configure_logging,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(msg, *args, level=logging.WARNING, created=1000.0, name='apps.users.authentication'):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.created = created
+    return record
+
+
+class TestRateLimitFilter:
+    def test_limits_per_template_and_samples(self):
+        rate_filter = RateLimitFilter(rate=2, period=60, sample_every=3)
+        template = "Authentication failed: Invalid password for %s"
+
+        passed = [rate_filter.filter(make_record(template, f"u{i}@test.com")) for i in range(8)]
+        assert passed == [True, True, False, False, True, False, False, True]
+
+        # Другой шаблон считается отдельно
+        assert rate_filter.filter(make_record("Invalid JWT token: %s", "bad"))
+
+    def test_reports_suppressed_and_resets_window(self):
+        rate_filter = RateLimitFilter(rate=1, period=60, sample_every=0)
+        template = "Authentication failed: User not found for email %s"
+
+        assert rate_filter.filter(make_record(template, 'a'))
+        assert not rate_filter.filter(make_record(template, 'b'))
+        assert not rate_filter.filter(make_record(template, 'c'))
+
+        record = make_record(template, 'd', created=1061.0)
+        assert rate_filter.filter(record)
+        assert record.suppressed == 2
+
+    def test_info_records_are_not_limited(self):
+        rate_filter = RateLimitFilter(rate=0, sample_every=0)
+        assert rate_filter.filter(make_record("User logged in successfully: %s", 'a', level=logging.INFO))
+
+
+class TestQueueHandler:
+    def test_enqueue_never_blocks(self):
+        log_queue = queue.Queue(maxsize=1)
+        handler = NonBlockingQueueHandler(log_queue, [ListHandler()])
+
+        handler.handle(make_record("first"))
+        handler.handle(make_record("second"))
+
+        assert log_queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_formatting_is_deferred_for_immutable_args(self):
+        handler = NonBlockingQueueHandler(queue.Queue(), [ListHandler()])
+
+        lazy = handler.prepare(make_record("Login failed for %s", 'a@test.com'))
+        assert (lazy.msg, lazy.args) == ("Login failed for %s", ('a@test.com',))
+
+        details = {'email': ['bad']}
+        eager = handler.prepare(make_record("Login failed: %s", details))
+        details['email'].append('changed')
+        assert eager.msg == "Login failed: {'email': ['bad']}"
+        assert eager.args is None
+
+    def test_listener_dispatches_to_logger_handlers(self):
+        log_queue = queue.Queue()
+        info_handler = ListHandler()
+        error_handler = ListHandler(level=logging.ERROR)
+        handler = NonBlockingQueueHandler(log_queue, [info_handler, error_handler])
+        listener = TargetedQueueListener(log_queue, info_handler, error_handler)
+
+        listener.start()
+        handler.handle(make_record("warning", level=logging.WARNING))
+        handler.handle(make_record("error", level=logging.ERROR))
+        listener.stop()
+
+        assert [r.getMessage() for r in info_handler.records] == ['warning', 'error']
+        assert [r.getMessage() for r in error_handler.records] == ['error']
+
+
+class TestJSONFormatter:
+    def test_structured_output(self):
+        record = make_record("User authenticated successfully: %s", 'a@test.com', level=logging.INFO)
+        record.user_id = 7
+
+        payload = json.loads(JSONFormatter().format(record))
+
+        assert payload['level'] == 'INFO'
+        assert payload['logger'] == 'apps.users.authentication'
+        assert payload['message'] == 'User authenticated successfully: a@test.com'
+        assert payload['user_id'] == 7
+        assert payload['timestamp'].startswith('1970-01-01T00:16:40')
+
+
+class TestConfigureLogging:
+    def test_handlers_are_moved_behind_queue(self):
+        from django.conf import settings
+
+        sink = ListHandler()
+        try:
+            configure_logging({
+                'version': 1,
+                'disable_existing_loggers': False,
+                'queue': {'maxsize': 100},
+                'handlers': {'sink': {'()': lambda: sink}},
+                'loggers': {'test.logs': {'handlers': ['sink'], 'level': 'INFO', 'propagate': False}},
+            })
+
+            logger = logging.getLogger('test.logs')
+            assert [type(h) for h in logger.handlers] == [NonBlockingQueueHandler]
+
+            logger.info("hello %s", 'world')
+        finally:
+            configure_logging(settings.LOGGING)
+
+        assert [r.getMessage() for r in sink.records] == ['hello world']
+
+    def test_log_directory_is_created(self, tmp_path):
+        from django.conf import settings
+
+        log_path = tmp_path / 'nested' / 'info.log'
+        try:
+            configure_logging({
+                'version': 1,
+                'disable_existing_loggers': False,
+                'handlers': {'file': {'class': 'logging.FileHandler', 'filename': log_path, 'delay': True}},
+                'loggers': {'test.logs': {'handlers': ['file'], 'level': 'INFO', 'propagate': False}},
+            })
+        finally:
+            configure_logging(settings.LOGGING)
+
+        assert log_path.parent.is_dir()
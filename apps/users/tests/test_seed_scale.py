@@ -0,0 +1,66 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from apps.access.models import AccessRolesRules, BusinessElement
+from apps.users.authentication import CustomAuthentication
+from apps.users.models import User, Role, UserRole
+
+SEED_OPTIONS = {
+    'users': 120, 'roles': 4, 'elements': 3, 'rules_density': 0.5, 'batch_size': 50, 'bcrypt_rounds': 4,
+}
+
+
+def snapshot():
+    users = list(User.objects.filter(email__startswith='scale_user_').order_by('email').values_list(
+        'email', 'first_name', 'is_verified', 'is_active', 'date_joined', 'password'
+    ))
+    memberships = sorted(UserRole.objects.filter(user__email__startswith='scale_user_').values_list(
+        'user__email', 'role__name'
+    ))
+    rules = sorted(AccessRolesRules.objects.filter(role__name__startswith='scale_role_').values_list(
+        'role__name', 'element__name', 'read_permission', 'read_all_permission', 'delete_all_permission'
+    ))
+    return users, memberships, rules
+
+
+@pytest.mark.django_db
+class TestSeedScaleCommand:
+    def test_generates_requested_volume(self):
+        call_command('seed_scale', **SEED_OPTIONS)
+
+        assert User.objects.filter(email__startswith='scale_user_').count() == 120
+        assert Role.objects.filter(name__startswith='scale_role_').count() == 4
+        assert BusinessElement.objects.filter(name__startswith='scale_element_').count() == 3
+        user_role_counts = {
+            user.id: user.roles.count() for user in User.objects.filter(email__startswith='scale_user_')
+        }
+        assert all(1 <= count <= 3 for count in user_role_counts.values())
+        # Правила создаются и для элементов из фикстур
+        rule_elements = set(AccessRolesRules.objects.filter(role__name__startswith='scale_role_').values_list(
+            'element__name', flat=True
+        ))
+        assert {name for name in rule_elements if not name.startswith('scale_element_')}
+
+    def test_deterministic_by_seed(self):
+        call_command('seed_scale', **SEED_OPTIONS)
+        first = snapshot()
+
+        call_command('seed_scale', clear=True, **SEED_OPTIONS)
+
+        assert snapshot() == first
+
+        call_command('seed_scale', clear=True, seed=7, **SEED_OPTIONS)
+
+        assert snapshot()[1] != first[1]
+
+    def test_seeded_users_can_log_in(self):
+        call_command('seed_scale', password='secret-pass', **SEED_OPTIONS)
+        user = User.objects.filter(email__startswith='scale_user_', is_active=True, is_verified=True).first()
+
+        assert CustomAuthentication.authenticate_user(user.email, 'secret-pass') == user
+
+    def test_refuses_to_duplicate(self):
+        call_command('seed_scale', **SEED_OPTIONS)
+
+        with pytest.raises(CommandError):
+            call_command('seed_scale', **SEED_OPTIONS)
@@ -14,7 +14,7 @@ def validate_otp_code(value):
         raise ValidationError("OTP код должен быть 6-значным числом.")
 
 def validate_email_unique(email, user_model, user_instance=None):
-    qs = user_model.objects.filter(email=email)
+    qs = user_model.objects.filter(email=user_model.objects.normalize_email(email))
     if user_instance:
         qs = qs.exclude(id=user_instance.id)
     if qs.exists():
@@ -4,7 +4,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth import logout
-from .models import User
+from django.db.models import Prefetch, prefetch_related_objects
+from apps.access.services import build_permissions_manifest, permissions_manifest_etag
+from .models import User, UserRole
 from .serializers import (
     RegisterSerializer,
     VerifyOtpSerializer,
@@ -29,7 +31,7 @@ class RegisterView(generics.CreateAPIView):
         try:
             serializer.is_valid(raise_exception=True)
         except ValidationError as e:
-            logger.warning(f"Registration validation failed: {e.detail}")
+            logger.warning("Registration validation failed: %s", e.detail)
             return Response({
                 "error": "Ошибка валидации данных",
                 "details": e.detail
@@ -37,9 +39,9 @@ class RegisterView(generics.CreateAPIView):
 
         try:
             user = serializer.save()
-            logger.info(f"New user registered successfully: {user.email}")
+            logger.info("New user registered successfully: %s", user.email)
         except Exception as e:
-            logger.error(f"User registration failed: {str(e)}")
+            logger.error("User registration failed: %s", e)
             return Response({
                 "error": "Не удалось создать пользователя",
                 "details": str(e)
@@ -67,7 +69,7 @@ class VerifyOtpView(generics.GenericAPIView):
         try:
             serializer.is_valid(raise_exception=True)
         except ValidationError as e:
-            logger.warning(f"OTP verification failed: {e.detail}")
+            logger.warning("OTP verification failed: %s", e.detail)
             return Response({
                 "error": "Ошибка подтверждения OTP",
                 "details": e.detail
@@ -88,29 +90,68 @@ class VerifyOtpView(generics.GenericAPIView):
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    # Дополнительные блоки ответа (?include=permissions,profile)
+    allowed_includes = ('permissions', 'profile')
 
     def post(self, request):
+        includes = self._get_includes(request)
+        unknown = [name for name in includes if name not in self.allowed_includes]
+        if unknown:
+            return Response({
+                "error": "Неизвестные значения параметра include",
+                "details": unknown
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = self.get_serializer(data=request.data)
 
         try:
             serializer.is_valid(raise_exception=True)
         except ValidationError as e:
-            logger.warning(f"Login failed: {e.detail}")
+            logger.warning("Login failed: %s", e.detail)
             return Response({
                 "error": "Ошибка входа",
                 "details": e.detail
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({
+        user = serializer.validated_data['user']
+        data = {
             "message": "Успешный вход в систему",
             "token": serializer.validated_data['token'],
             "user": {
-                "id": serializer.validated_data['user'].id,
-                "email": serializer.validated_data['user'].email,
-                "first_name": serializer.validated_data['user'].first_name,
-                "last_name": serializer.validated_data['user'].last_name
+                "id": user.id,
+                "email": user.email,
+                "first_name": user.first_name,
+                "last_name": user.last_name
             }
-        }, status=status.HTTP_200_OK)
+        }
+
+        if includes:
+            data.update(self._build_includes(user, includes))
+
+        return Response(data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _get_includes(request):
+        raw = request.query_params.get('include', '')
+        return [name.strip() for name in raw.split(',') if name.strip()]
+
+    @staticmethod
+    def _build_includes(user, includes):
+        # Один запрос на роли пользователя обслуживает и профиль, и манифест прав
+        prefetch_related_objects(
+            [user],
+            Prefetch('roles', queryset=UserRole.objects.select_related('role'))
+        )
+        user_roles = list(user.roles.all())
+
+        extra = {}
+        if 'permissions' in includes:
+            manifest = build_permissions_manifest(user, user_roles)
+            extra['permissions'] = manifest['permissions']
+            extra['permissions_etag'] = permissions_manifest_etag(manifest)
+        if 'profile' in includes:
+            extra['profile'] = ProfileSerializer(user).data
+        return extra
 
 
 @api_view(['POST'])
@@ -118,7 +159,7 @@ class LoginView(generics.GenericAPIView):
 def logout_view(request):
     # FIX: проверяем, что пользователь аутентифицирован перед доступом к email
     if request.user.is_authenticated and hasattr(request.user, 'email'):
-        logger.info(f"User logged out: {request.user.email}")
+        logger.info("User logged out: %s", request.user.email)
     else:
         logger.info("Anonymous user attempted logout")
 
@@ -132,7 +173,7 @@ def logout_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedAndVerified])
 def profile_view(request):
-    serializer = ProfileSerializer(request.user)
+    serializer = ProfileSerializer(request.user, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -151,7 +192,7 @@ class UpdateProfileView(generics.UpdateAPIView):
         try:
             serializer.is_valid(raise_exception=True)
         except ValidationError as e:
-            logger.warning(f"Profile update validation failed: {e.detail}")
+            logger.warning("Profile update validation failed: %s", e.detail)
             return Response({
                 "error": "Ошибка валидации данных",
                 "details": e.detail
@@ -159,7 +200,7 @@ class UpdateProfileView(generics.UpdateAPIView):
 
         user = serializer.save()
 
-        logger.info(f"Profile updated for user: {user.email}")
+        logger.info("Profile updated for user: %s", user.email)
 
         if 'email' in request.data and request.data['email'] != instance.email:
             return Response({
@@ -186,9 +227,9 @@ class SoftDeleteView(generics.DestroyAPIView):
 
         try:
             serializer.save()
-            logger.info(f"Account soft deleted for user: {instance.email}")
+            logger.info("Account soft deleted for user: %s", instance.email)
         except Exception as e:
-            logger.error(f"Soft delete failed: {str(e)}")
+            logger.error("Soft delete failed: %s", e)
             return Response({
                 "error": "Не удалось деактивировать аккаунт"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
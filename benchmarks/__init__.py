@@ -0,0 +1,9 @@
+import os
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_ENV', 'testing')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    import django
+    django.setup()
@@ -0,0 +1,81 @@
+"""
+Пропускная способность списков: ModelSerializer против ReadModel (values_list).
+
+Запуск:
+    python -m benchmarks.bench_read_models --rows 1000 --repeat 10
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup_django
+
+
+def seed(rows):
+    from apps.users.models import Role
+    from apps.access.models import BusinessElement, AccessRolesRules
+
+    roles_count = max(1, rows // 100)
+    roles = Role.objects.bulk_create([Role(name=f'bench_role_{i}') for i in range(roles_count)])
+    elements = BusinessElement.objects.bulk_create([
+        BusinessElement(name=f'bench_element_{i}', description='Элемент для бенчмарка')
+        for i in range(100)
+    ])
+    AccessRolesRules.objects.bulk_create([
+        AccessRolesRules(role=role, element=element, read_permission=True, update_all_permission=bool(i % 2))
+        for role in roles
+        for i, element in enumerate(elements)
+    ])
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+    from apps.access.models import BusinessElement, AccessRolesRules
+    from apps.access.serializers import BusinessElementSerializer, AccessRolesRulesSerializer
+    from apps.access.read_models import BusinessElementReadModel, AccessRolesRulesReadModel
+
+    connection.creation.create_test_db(verbosity=0)
+    seed(args.rows)
+
+    cases = [
+        (
+            'AccessRolesRulesViewSet.list',
+            AccessRolesRules.objects.select_related('role', 'element')[:args.rows],
+            AccessRolesRulesSerializer,
+            AccessRolesRulesReadModel(),
+        ),
+        (
+            'BusinessElementViewSet.list',
+            BusinessElement.objects.all()[:args.rows],
+            BusinessElementSerializer,
+            BusinessElementReadModel(),
+        ),
+    ]
+
+    for name, queryset, serializer_class, read_model in cases:
+        serializer_time = timed(lambda: serializer_class(queryset.all(), many=True).data, args.repeat)
+        read_model_time = timed(lambda: read_model.serialize(queryset.all()), args.repeat)
+        print(
+            f"{name:<30} serializer {serializer_time * 1000:8.2f} ms  "
+            f"read model {read_model_time * 1000:8.2f} ms  x{serializer_time / read_model_time:.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Сравнение стоимости рендеринга ответов: JSONRenderer DRF, ORJSONRenderer и MessagePack.
+
+Запуск:
+    python -m benchmarks.bench_renderers --rows 10000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks import setup_django
+
+
+def build_rules_payload(rows):
+    from django.utils import timezone
+    from apps.users.models import Role
+    from apps.access.models import BusinessElement, AccessRolesRules
+    from apps.access.serializers import AccessRolesRulesSerializer
+
+    now = timezone.now()
+    roles = [Role(id=i, name=f'role_{i}') for i in range(1, 51)]
+    elements = [BusinessElement(id=i, name=f'element_{i}') for i in range(1, 201)]
+    rules = []
+    for i in range(rows):
+        rule = AccessRolesRules(
+            id=i + 1,
+            role=roles[i % len(roles)],
+            element=elements[i % len(elements)],
+            read_permission=True,
+            read_all_permission=bool(i % 2),
+            create_permission=bool(i % 3),
+            update_permission=True,
+            update_all_permission=bool(i % 5),
+            delete_permission=bool(i % 7),
+            delete_all_permission=False,
+        )
+        rule.created_at = now - timedelta(minutes=i)
+        rule.updated_at = now
+        rules.append(rule)
+    return AccessRolesRulesSerializer(rules, many=True).data
+
+
+def build_role_users_payload(rows):
+    from django.utils import timezone
+
+    now = timezone.now()
+    # Формат ответа RoleViewSet.users
+    return [
+        {
+            'id': i,
+            'email': f'user{i}@example.com',
+            'first_name': 'Иван',
+            'last_name': 'Иванов',
+            'assigned_at': now - timedelta(seconds=i),
+        }
+        for i in range(rows)
+    ]
+
+
+def measure(renderer, payload, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = renderer.render(payload, renderer.media_type, {})
+        timings.append(time.perf_counter() - started)
+        size = len(content)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+    from apps.core.renderers import ORJSONRenderer, MessagePackRenderer, msgpack
+
+    renderers = [('drf-json', JSONRenderer()), ('orjson', ORJSONRenderer())]
+    if msgpack is not None:
+        renderers.append(('msgpack', MessagePackRenderer()))
+
+    payloads = [
+        ('AccessRolesRulesViewSet.list', build_rules_payload(args.rows)),
+        ('RoleViewSet.users', build_role_users_payload(args.rows)),
+    ]
+
+    for payload_name, payload in payloads:
+        print(f"\n{payload_name} ({args.rows} rows)")
+        baseline = None
+        for name, renderer in renderers:
+            seconds, size = measure(renderer, payload, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:<10} {seconds * 1000:9.2f} ms  {size / 1024:9.1f} KiB  x{baseline / seconds:.1f}")
+
+
+if __name__ == '__main__':
+    main()
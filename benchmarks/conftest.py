@@ -0,0 +1,188 @@
+"""
+Микробенчмарки горячих путей под pytest (без сети и внешних сервисов).
+
+Запуск:
+    pytest benchmarks                          # замер и таблица результатов
+    pytest benchmarks --bench-compare          # упасть, если замер хуже базового на --bench-threshold
+    pytest benchmarks --bench-save             # обновить baselines/hot_paths.json
+
+Сравниваются не микросекунды, а минимальное время операции в единицах калибровочного
+бенчмарка - чистого Python, замеренного вперемежку с раундами бенчмарка. Поэтому базовый файл,
+снятый на другой машине, остаётся применим, а минимум меньше p50 зависит от фоновой нагрузки.
+"""
+import copy
+import json
+import os
+import platform
+import statistics
+import time
+from operator import itemgetter
+
+import pytest
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines', 'hot_paths.json')
+
+# Минимальная длительность одного сэмпла: быстрые операции повторяются в цикле,
+# чтобы накладные расходы perf_counter не искажали результат
+MIN_SAMPLE_TIME = 0.00002
+# Раундов замера на бенчмарк, перед каждым - калибровка
+ROUNDS = 5
+
+_results = {}
+# Минимумы калибровочного бенчмарка по каждому замеру
+_calibrations = []
+# Базовые значения до перезаписи --bench-save, для колонки "vs base"
+_previous_baseline = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('bench', 'Микробенчмарки')
+    group.addoption('--bench-save', action='store_true', help='Записать результаты в базовый файл')
+    group.addoption('--bench-compare', action='store_true', help='Сравнить с базовым файлом и упасть при регрессии')
+    group.addoption('--bench-threshold', type=float, default=0.25,
+                    help='Допустимое замедление относительно базового (0.25 = 25%%)')
+    group.addoption('--bench-baseline', default=BASELINE_PATH, help='Путь к базовому файлу')
+    group.addoption('--bench-time', type=float, default=0.3, help='Время замера одного бенчмарка, с')
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {'machine': {}, 'benchmarks': {}}
+
+
+def calibration_workload():
+    # Типичная для горячих путей работа интерпретатора: dict, форматирование строк, сортировка, JSON
+    rows = [{'id': index, 'name': f'element_{index % 17}', 'flags': [index % 2 == 0, index % 3 == 0]}
+            for index in range(50)]
+    rows.sort(key=lambda row: (row['name'], row['id']))
+    return json.dumps(rows)
+
+
+def measure(func, duration, *args, **kwargs):
+    # Прогрев: кэши, ленивые импорты, подготовленные запросы
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    single = time.perf_counter() - started
+    inner = max(1, int(MIN_SAMPLE_TIME / single)) if single > 0 else 1000
+
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline or len(samples) < 5:
+        started = time.perf_counter()
+        for _ in range(inner):
+            func(*args, **kwargs)
+        samples.append((time.perf_counter() - started) / inner)
+
+    samples.sort()
+    return {
+        'ops_per_sec': round(1 / statistics.fmean(samples), 1),
+        'min_us': round(samples[0] * 1e6, 2),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 2),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 2),
+        'rounds': len(samples) * inner,
+    }
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+
+
+class Benchmark:
+    """
+    benchmark(func, *args) - замер func; с baseline минимальное время в единицах калибровочного
+    бенчмарка сравнивается с базовым, и тест падает при замедлении больше threshold.
+    """
+
+    def __init__(self, name, duration, baseline=None, threshold=None):
+        self.name = name
+        self.duration = duration
+        self.baseline = baseline
+        self.threshold = threshold
+        self.result = None
+
+    def __call__(self, func, *args, **kwargs):
+        # Замер и калибровка чередуются раундами: фон машины (частота CPU, соседи)
+        # сокращается в отношении, а всплеск нагрузки в одном раунде не попадает в минимум
+        calibrations, results = [], []
+        for _ in range(ROUNDS):
+            calibrations.append(measure(calibration_workload, self.duration / ROUNDS / 3)['min_us'])
+            results.append(measure(func, self.duration / ROUNDS, *args, **kwargs))
+
+        self.result = min(results, key=itemgetter('min_us'))
+        self.result['rounds'] = sum(result['rounds'] for result in results)
+        calibration = min(calibrations)
+        _calibrations.append(calibration)
+        self.result['relative'] = round(self.result['min_us'] / calibration, 3)
+        _results[self.name] = self.result
+
+        if self.baseline is not None and self.result['relative'] > self.baseline['relative'] * (1 + self.threshold):
+            pytest.fail(
+                f"Регрессия {self.name}: {self.result['relative']} калибровок > "
+                f"{self.baseline['relative']} + {self.threshold:.0%} (минимум {self.result['min_us']} мкс)",
+                pytrace=False
+            )
+        return self.result
+
+
+@pytest.fixture
+def benchmark(request):
+    config = request.config
+    baseline = None
+    if config.getoption('--bench-compare'):
+        baseline = load_baseline(config.getoption('--bench-baseline'))['benchmarks'].get(request.node.name)
+        # Записи без калибровки (старый формат) в абсолютных микросекундах не сравниваем
+        if baseline is not None and 'relative' not in baseline:
+            baseline = None
+    return Benchmark(
+        request.node.name,
+        config.getoption('--bench-time'),
+        baseline=baseline,
+        threshold=config.getoption('--bench-threshold')
+    )
+
+
+def pytest_sessionfinish(session):
+    if not _results or not session.config.getoption('--bench-save'):
+        return
+
+    path = session.config.getoption('--bench-baseline')
+    baseline = load_baseline(path)
+    _previous_baseline.update(copy.deepcopy(baseline))
+    baseline['machine'] = machine_info()
+    baseline['calibration_us'] = round(statistics.median(_calibrations), 2)
+    baseline['benchmarks'].update(_results)
+    baseline['benchmarks'] = dict(sorted(baseline['benchmarks'].items()))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, ensure_ascii=False)
+        baseline_file.write('\n')
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not _results:
+        return
+
+    baseline = _previous_baseline or load_baseline(config.getoption('--bench-baseline'))
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(
+        f"Калибровка: {statistics.median(_calibrations):.2f} мкс (базовая {baseline.get('calibration_us', '-')} мкс), "
+        "vs base - по минимуму в единицах калибровки"
+    )
+    terminalreporter.write_line(
+        f"{'name':<58} {'ops/s':>12} {'p50 мкс':>10} {'p99 мкс':>10} {'мин/калибр':>10} {'vs base':>8}"
+    )
+    for name, result in sorted(_results.items()):
+        previous = baseline['benchmarks'].get(name)
+        delta = f"{result['relative'] / previous['relative'] - 1:+.0%}" if previous and 'relative' in previous else '-'
+        terminalreporter.write_line(
+            f"{name:<58} {result['ops_per_sec']:>12,.0f} {result['p50_us']:>10.2f} {result['p99_us']:>10.2f} "
+            f"{result['relative']:>10.3f} {delta:>8}"
+        )
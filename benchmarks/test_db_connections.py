@@ -0,0 +1,70 @@
+"""
+Цена установки соединения с БД в задержке запроса: соединение на запрос (CONN_MAX_AGE=0)
+против постоянного соединения с проверкой здоровья (как в production).
+
+Цикл запроса повторяет Django: close_if_unusable_or_obsolete() по request_started
+и request_finished, между ними - один запрос. Показательно на PostgreSQL:
+    DJANGO_ENV=testing TEST_DATABASE=postgres pytest benchmarks/test_db_connections.py
+На SQLite бенчмарк идёт на временном файле: in-memory база тестов не закрывается.
+"""
+import os
+import tempfile
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+
+def request_cycle(connection):
+    connection.close_if_unusable_or_obsolete()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    connection.close_if_unusable_or_obsolete()
+
+
+@pytest.fixture
+def make_connection(db):
+    settings_dict = dict(connections[DEFAULT_DB_ALIAS].settings_dict)
+    sqlite = connections[DEFAULT_DB_ALIAS].vendor == 'sqlite'
+    created = []
+    if sqlite:
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        settings_dict['NAME'] = path
+
+    def _make(**overrides):
+        backend = load_backend(settings_dict['ENGINE'])
+        connection = backend.DatabaseWrapper({**settings_dict, **overrides}, DEFAULT_DB_ALIAS)
+        created.append(connection)
+        return connection
+
+    yield _make
+
+    for connection in created:
+        connection.close()
+    if sqlite:
+        os.remove(settings_dict['NAME'])
+
+
+class TestConnectionSetup:
+    def test_connection_per_request(self, benchmark, make_connection):
+        connection = make_connection(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+
+        benchmark(request_cycle, connection)
+
+        assert connection.connection is None
+
+    def test_persistent_connection(self, benchmark, make_connection):
+        connection = make_connection(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=False)
+
+        benchmark(request_cycle, connection)
+
+        assert connection.connection is not None
+
+    def test_persistent_connection_with_health_checks(self, benchmark, make_connection):
+        connection = make_connection(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+
+        benchmark(request_cycle, connection)
+
+        assert connection.connection is not None
@@ -0,0 +1,106 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import RequestFactory
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.access.models import AccessRolesRules, BusinessElement
+from apps.access.serializers import AccessRolesRulesSerializer, BusinessElementSerializer, RoleSerializer
+from apps.access.views import my_permissions
+from apps.business.mock_views import MockView
+from apps.core.authentication import JWTAuthentication
+from apps.users.authentication import CustomAuthentication
+from apps.users.models import Role, UserRole
+from apps.users.permissions import RoleBasedPermission
+from apps.users.serializers import ProfileSerializer
+
+LIST_ROWS = 100
+
+
+def seed(**options):
+    """
+    Данные через seed_scale: тот же генератор, что и для нагрузочных стендов.
+    """
+    options = {'users': 0, 'bcrypt_rounds': 4, 'seed': 42, **options}
+    call_command('seed_scale', stdout=io.StringIO(), **options)
+    return list(Role.objects.filter(name__startswith='scale_role_'))
+
+
+@pytest.fixture
+def bench_user(sample_user):
+    UserRole.objects.create(user=sample_user, role=Role.objects.get(name='user'))
+    return sample_user
+
+
+def assign(user, roles):
+    UserRole.objects.bulk_create([UserRole(user=user, role=role) for role in roles])
+
+
+@pytest.mark.django_db
+class TestJWT:
+    def test_jwt_generate(self, benchmark, bench_user):
+        benchmark(CustomAuthentication.generate_jwt_token, bench_user)
+
+    def test_jwt_decode(self, benchmark, bench_user):
+        token = CustomAuthentication.generate_jwt_token(bench_user)
+
+        benchmark(CustomAuthentication.decode_jwt_token, token)
+
+    def test_jwt_authentication(self, benchmark, bench_user):
+        token = CustomAuthentication.generate_jwt_token(bench_user)
+        request = RequestFactory().get('/api/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        authentication = JWTAuthentication()
+
+        benchmark(authentication.authenticate, request)
+
+        assert authentication.authenticate(request)[0] == bench_user
+
+
+@pytest.mark.django_db
+class TestAuthorization:
+    @pytest.mark.parametrize('roles', [1, 5, 20], ids=lambda roles: f'roles={roles}')
+    def test_has_permission(self, benchmark, bench_user, roles):
+        assign(bench_user, seed(roles=roles - 1, elements=10, rules_density=0.5))
+        request = RequestFactory().get('/api/mock/products/')
+        request.user = bench_user
+        view = MockView(business_element_name='products', action_type='read')
+        permission = RoleBasedPermission()
+
+        benchmark(permission.has_permission, request, view)
+
+        assert permission.has_permission(request, view)
+
+    @pytest.mark.parametrize('elements', [10, 100, 1000], ids=lambda elements: f'elements={elements}')
+    def test_my_permissions(self, benchmark, bench_user, elements):
+        assign(bench_user, seed(roles=1, elements=elements, rules_density=1.0))
+        request = APIRequestFactory().get('/api/my-permissions/')
+        force_authenticate(request, user=bench_user)
+
+        benchmark(lambda: my_permissions(request).render())
+
+        assert len(my_permissions(request).data['permissions']) >= elements
+
+
+@pytest.mark.django_db
+class TestSerializers:
+    def test_profile_serializer(self, benchmark, bench_user):
+        benchmark(lambda: ProfileSerializer(bench_user).data)
+
+    def test_role_list_serializer(self, benchmark):
+        seed(roles=LIST_ROWS, elements=1, rules_density=0)
+        roles = list(Role.objects.annotate(users_count=Count('users'))[:LIST_ROWS])
+
+        benchmark(lambda: RoleSerializer(roles, many=True).data)
+
+    def test_business_element_list_serializer(self, benchmark):
+        seed(roles=1, elements=LIST_ROWS, rules_density=0)
+        elements = list(BusinessElement.objects.all()[:LIST_ROWS])
+
+        benchmark(lambda: BusinessElementSerializer(elements, many=True).data)
+
+    def test_access_rule_list_serializer(self, benchmark):
+        seed(roles=2, elements=LIST_ROWS // 2, rules_density=1.0)
+        rules = list(AccessRolesRules.objects.select_related('role', 'element')[:LIST_ROWS])
+
+        benchmark(lambda: AccessRolesRulesSerializer(rules, many=True).data)
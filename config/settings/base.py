@@ -30,6 +30,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.TracingMiddleware',
+    'apps.core.middleware.MetricsMiddleware',
+    'apps.core.middleware.ServerTimingMiddleware',
+    'apps.core.middleware.ContinuousProfilingMiddleware',
+    'apps.core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -37,6 +42,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'apps.core.middleware.JWTAuthenticationMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,11 +69,24 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'apps.core.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Общий кэш (L2 для apps.core.cache.TieredCache). locmem - свой у каждого воркера:
+# смены версий кэшей другие воркеры не видят. Для нескольких воркеров - CACHE_URL=redis://...
+# (или filecache:///var/tmp/acs_cache на одном узле); production без redis/memcached не запускается
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# Кэши со сбросом по версиям таблиц (QUERY_CACHE, RESPONSE_CACHE) по умолчанию включены только
+# с общим кэшем: с кэшем в памяти процесса запись в одном воркере не сбрасывает записи других
+CACHE_IS_SHARED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -106,11 +125,28 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+try:
+    import msgpack  # noqa: F401
+except ImportError:
+    pass
+else:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('apps.core.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('apps.core.parsers.MessagePackParser')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -121,6 +157,133 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+ACCESS_AUDIT = {
+    'ENABLED': env.bool('ACCESS_AUDIT_ENABLED', default=True),
+    'SINK': env('ACCESS_AUDIT_SINK', default='db'),
+    'FILE_PATH': BASE_DIR / 'logs' / 'access_audit.ndjson',
+    'BATCH_SIZE': env.int('ACCESS_AUDIT_BATCH_SIZE', default=500),
+    'FLUSH_INTERVAL': env.float('ACCESS_AUDIT_FLUSH_INTERVAL', default=1.0),
+    'QUEUE_SIZE': env.int('ACCESS_AUDIT_QUEUE_SIZE', default=10000),
+    'ALLOW_SAMPLE_RATE': env.float('ACCESS_AUDIT_ALLOW_SAMPLE_RATE', default=0.01),
+    'OVERFLOW': env('ACCESS_AUDIT_OVERFLOW', default='spill'),
+    'SPILL_PATH': BASE_DIR / 'logs' / 'access_audit.spill.ndjson',
+    'BACKGROUND': True,
+}
+
+METRICS = {
+    'ENABLED': env.bool('METRICS_ENABLED', default=True),
+    # Общий каталог для воркеров gunicorn (каждый пишет metrics_<pid>.json)
+    'MULTIPROC_DIR': env('METRICS_MULTIPROC_DIR', default=''),
+    'FLUSH_INTERVAL': env.float('METRICS_FLUSH_INTERVAL', default=5.0),
+}
+
+SERVER_TIMING = {
+    'ENABLED': env.bool('SERVER_TIMING_ENABLED', default=True),
+    # True на staging: заголовок Server-Timing в каждом ответе
+    'ALWAYS': env.bool('SERVER_TIMING_ALWAYS', default=False),
+    'REQUEST_HEADER': 'X-Server-Timing',
+}
+
+QUERY_INSPECTION = {
+    'ENABLED': env.bool('QUERY_INSPECTION_ENABLED', default=True),
+    'SLOW_QUERY_MS': env.int('SLOW_QUERY_MS', default=200),
+    'TOP_N': env.int('QUERY_FINGERPRINTS_TOP_N', default=20),
+    'BUDGET_MODE': 'warn',
+    # Область query_budget(), имя view (urls.py) или 'МЕТОД view' -> максимум SQL-запросов
+    'BUDGETS': {
+        'permission': 1,
+        'POST login': 3,
+        'GET profile': 4,
+        'GET my-permissions': 3,
+        'GET products-list-create': 4,
+        'GET products-detail': 3,
+        'GET orders-list-create': 4,
+        'GET stores-list': 4,
+        'GET role-list': 5,
+        'GET business-element-list': 5,
+        'GET access-rule-list': 5,
+    },
+}
+
+PROFILING = {
+    # Выключено - ProfilingMiddleware не подключается и не добавляет накладных расходов
+    'ENABLED': env.bool('PROFILING_ENABLED', default=False),
+    'HEADER': 'X-Profile',
+    'QUERY_PARAM': 'profile',
+    'SAMPLE_PER_MINUTE': env.int('PROFILING_SAMPLE_PER_MINUTE', default=0),
+    'DIR': BASE_DIR / 'logs' / 'profiles',
+    'REPORT_LINES': 60,
+    # Постоянный сэмплер стеков в каждом воркере: logs/stacks/stacks-<pid>-<время>.collapsed
+    'CONTINUOUS': env.bool('PROFILING_CONTINUOUS', default=False),
+    'SAMPLE_HZ': env.int('PROFILING_SAMPLE_HZ', default=100),
+    'CONTINUOUS_DIR': BASE_DIR / 'logs' / 'stacks',
+    'FLUSH_INTERVAL': 60,
+    # Сколько файлов хранить на воркер (при FLUSH_INTERVAL=60 - час истории)
+    'MAX_FILES': 60,
+}
+
+TRACING = {
+    # Спаны запроса в формате OTLP-JSON, trace id продолжается из traceparent шлюза
+    'ENABLED': env.bool('TRACING_ENABLED', default=False),
+    'SERVICE_NAME': env('TRACING_SERVICE_NAME', default='access-control-system'),
+    'EXPORTER': env('TRACING_EXPORTER', default='file'),
+    'FILE_PATH': BASE_DIR / 'logs' / 'traces.ndjson',
+    # Ошибки (5xx) и трассы медленнее SLOW_MS сохраняются всегда, остальные - с долей SAMPLE_RATE
+    'SLOW_MS': env.int('TRACING_SLOW_MS', default=500),
+    'SAMPLE_RATE': env.float('TRACING_SAMPLE_RATE', default=0.01),
+    'RESPECT_PARENT_SAMPLED': True,
+    'MAX_SPANS': 500,
+    'QUEUE_SIZE': 1000,
+}
+
+# Реплики для чтения: алиасы DATABASES (production - DB_REPLICA_HOSTS,
+# development - DB_SQLITE_REPLICAS). Без реплик роутер и middleware ничего не делают
+DATABASE_ROUTERS = ['apps.core.db.ReplicaRouter']
+
+DB_REPLICAS = {
+    'ALIASES': [],
+    'USER_PIN_SECONDS': env.int('DB_REPLICA_PIN_SECONDS', default=5),
+    'PIN_EXEMPT_MODELS': ['access.AccessDecisionLog'],
+}
+
+TIERED_CACHE = {
+    'ALIAS': 'default',
+    'L1_MAX_ENTRIES': env.int('TIERED_CACHE_L1_MAX_ENTRIES', default=1024),
+    'L1_TIMEOUT': env.int('TIERED_CACHE_L1_TIMEOUT', default=60),
+    'VERSION_TIMEOUT': env.int('TIERED_CACHE_VERSION_TIMEOUT', default=1),
+    'TIMEOUT': env.int('TIERED_CACHE_TIMEOUT', default=300),
+    'JITTER': 0.1,
+    'NEGATIVE_TIMEOUT': 30,
+}
+
+# Кэш ORM-запросов queryset.cache() (apps.core.query_cache) со сбросом по версиям таблиц
+QUERY_CACHE = {
+    'ENABLED': env.bool('QUERY_CACHE_ENABLED', default=CACHE_IS_SHARED),
+    'TIMEOUT': env.int('QUERY_CACHE_TIMEOUT', default=300),
+}
+
+# Готовые ответы списков-справочников (ResponseCacheMixin): байты и ETag по версиям таблиц
+RESPONSE_CACHE = {
+    'ENABLED': env.bool('RESPONSE_CACHE_ENABLED', default=CACHE_IS_SHARED),
+    'TIMEOUT': env.int('RESPONSE_CACHE_TIMEOUT', default=300),
+    'FORMATS': ['json', 'msgpack'],
+}
+
+# Прагмы SQLite (ENGINE apps.core.sqlite) для development и установок на одном узле.
+# DB_SQLITE_TUNING=False - прагмы SQLite по умолчанию, для сравнения
+SQLITE_TUNING = {
+    'ENABLED': env.bool('DB_SQLITE_TUNING', default=True),
+    'PRAGMAS': {
+        'busy_timeout': env.int('DB_SQLITE_BUSY_TIMEOUT', default=5000),
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -16000,
+        'temp_store': 'MEMORY',
+    },
+    'WRITE_LOCK': env.bool('DB_SQLITE_WRITE_LOCK', default=False),
+}
+
 from .cors import *
 
 JAZZMIN_SETTINGS = {
@@ -173,9 +336,17 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
 }
 
+# Обработчики логгеров работают за очередью в отдельном потоке (apps/core/logs.py),
+# поток запроса не ждёт записи на диск
+LOGGING_CONFIG = 'apps.core.logs.configure_logging'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'queue': {
+        'enabled': env.bool('LOG_QUEUE_ENABLED', default=True),
+        'maxsize': env.int('LOG_QUEUE_SIZE', default=10000),
+    },
     'formatters': {
         'verbose': {
             'format': '[{levelname}] {asctime} {module} {process:d} {thread:d} - {message}',
@@ -185,11 +356,22 @@ LOGGING = {
             'format': '[{levelname}] {asctime} - {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'apps.core.logs.JSONFormatter',
+        },
     },
     'filters': {
         'require_debug_true': {
             '()': 'django.utils.log.RequireDebugTrue',
         },
+        # Неудачные входы и невалидные токены: не больше 20 записей в минуту
+        # на шаблон сообщения, дальше - каждая сотая
+        'auth_failures': {
+            '()': 'apps.core.logs.RateLimitFilter',
+            'rate': env.int('LOG_AUTH_FAILURES_RATE', default=20),
+            'period': 60,
+            'sample_every': env.int('LOG_AUTH_FAILURES_SAMPLE_EVERY', default=100),
+        },
     },
     'handlers': {
         'console': {
@@ -201,13 +383,13 @@ LOGGING = {
             'level': 'ERROR',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'error.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'file_info': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'info.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
     },
     'loggers': {
@@ -221,6 +403,15 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'apps.users.authentication': {
+            'filters': ['auth_failures'],
+        },
+        'apps.users.views': {
+            'filters': ['auth_failures'],
+        },
+        'apps.users.serializers': {
+            'filters': ['auth_failures'],
+        },
         'apps.access': {
             'handlers': ['console', 'file_info', 'file_error'],
             'level': 'INFO',
@@ -231,6 +422,9 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'apps.core.middleware': {
+            'filters': ['auth_failures'],
+        },
     },
     'root': {
         'handlers': ['console', 'file_error'],
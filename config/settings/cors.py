@@ -18,6 +18,15 @@ CORS_ALLOW_HEADERS = [
     'users-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-server-timing',
+    'x-profile',
+    'traceparent',
+    'tracestate',
+]
+
+CORS_EXPOSE_HEADERS = [
+    'server-timing',
+    'x-profile-id',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -5,13 +5,27 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["*"]
 
+# Под gunicorn задайте DB_CONN_MAX_AGE=600: прагмы применяются один раз на поток воркера,
+# а файлы WAL не создаются заново на каждый запрос. runserver создаёт поток на запрос - там 0
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'apps.core.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0),
     }
 }
 
+# Локальная проверка реплик: DB_SQLITE_REPLICAS=2 подключает db.replica_N.sqlite3 как реплики.
+# Файлы - снимки db.sqlite3, обновляются командой sync_sqlite_replicas. Нужен общий кэш: CACHE_URL=filecache://...
+for index in range(1, env.int('DB_SQLITE_REPLICAS', default=0) + 1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        'ENGINE': 'apps.core.sqlite',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DB_REPLICAS = {**DB_REPLICAS, 'ALIASES': [*DB_REPLICAS['ALIASES'], alias]}
+
 INSTALLED_APPS += [
     'debug_toolbar',
 ]
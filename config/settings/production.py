@@ -1,8 +1,26 @@
+from django.core.exceptions import ImproperlyConfigured
+
 from .base import *
 
 DEBUG = False
 ALLOWED_HOSTS = ["*"]
 
+# Версии кэшей (права, кэш запросов, готовые ответы) и закрепление за default после записи
+# должны быть видны всем воркерам и узлам: нужен сетевой кэш, а не память процесса
+SHARED_CACHE_BACKENDS = (
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+)
+if CACHES["default"]["BACKEND"] not in SHARED_CACHE_BACKENDS:
+    raise ImproperlyConfigured("В production CACHE_URL должен указывать на redis или memcached: redis://... или pylibmc://...")
+
+# Подключения к PostgreSQL. По умолчанию - постоянное соединение на поток воркера
+# с проверкой перед первым запросом (CONN_HEALTH_CHECKS): запрос не платит за TCP, TLS
+# и аутентификацию. DB_PGBOUNCER - режим для PgBouncer в transaction pooling.
+# Встроенного пула psycopg (OPTIONS["pool"]) нет: он появился в Django 5.1, а проект на 5.0
+DB_PGBOUNCER = env.bool("DB_PGBOUNCER", default=False)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -11,9 +29,36 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "password"),
         "HOST": os.getenv("POSTGRES_HOST", "localhost"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=600),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "connect_timeout": env.int("DB_CONNECT_TIMEOUT", default=5),
+        },
     }
 }
 
+if env.bool("DB_POOL", default=False):
+    raise ImproperlyConfigured(
+        "DB_POOL не поддерживается на Django 5.0: используйте постоянные соединения (DB_CONN_MAX_AGE) или DB_PGBOUNCER"
+    )
+
+if DB_PGBOUNCER:
+    # В transaction pooling соединение с сервером меняется между транзакциями:
+    # серверные курсоры (iterator()) и подготовленные выражения psycopg не переживают смену
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+    DATABASES["default"]["OPTIONS"]["prepare_threshold"] = None
+
+# Реплики для чтения: те же параметры, что у default, кроме хоста. В тестах - зеркала default
+for index, host in enumerate(env.list("DB_REPLICA_HOSTS", default=[]), start=1):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+    DB_REPLICAS = {**DB_REPLICAS, "ALIASES": [*DB_REPLICAS["ALIASES"], alias]}
+
 CSRF_COOKIE_SECURE = True
 SESSION_COOKIE_SECURE = True
 SECURE_SSL_REDIRECT = True
@@ -29,14 +74,22 @@ EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "queue": LOGGING["queue"],
     "formatters": {
         "verbose": {
             "format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}",
             "style": "{",
         },
         "json": {
-            "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
-            "format": "%(asctime)s %(name)s %(levelname)s %(message)s",
+            "()": "apps.core.logs.JSONFormatter",
+        },
+    },
+    "filters": {
+        "auth_failures": {
+            "()": "apps.core.logs.RateLimitFilter",
+            "rate": env.int("LOG_AUTH_FAILURES_RATE", default=20),
+            "period": 60,
+            "sample_every": env.int("LOG_AUTH_FAILURES_SAMPLE_EVERY", default=100),
         },
     },
     "handlers": {
@@ -46,7 +99,7 @@ LOGGING = {
             "filename": "/var/log/django/error.log",
             "maxBytes": 1024 * 1024 * 10,  # 10 MB
             "backupCount": 5,
-            "formatter": "verbose",
+            "formatter": "json",
         },
         "file_warning": {
             "level": "WARNING",
@@ -54,7 +107,7 @@ LOGGING = {
             "filename": "/var/log/django/warning.log",
             "maxBytes": 1024 * 1024 * 10,  # 10 MB
             "backupCount": 5,
-            "formatter": "verbose",
+            "formatter": "json",
         },
         "file_info": {
             "level": "INFO",
@@ -62,7 +115,7 @@ LOGGING = {
             "filename": "/var/log/django/info.log",
             "maxBytes": 1024 * 1024 * 10,  # 10 MB
             "backupCount": 5,
-            "formatter": "verbose",
+            "formatter": "json",
         },
         "console": {
             "level": "INFO",
@@ -86,6 +139,28 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "apps.users.authentication": {
+            "filters": ["auth_failures"],
+        },
+        "apps.users.views": {
+            "filters": ["auth_failures"],
+        },
+        "apps.users.serializers": {
+            "filters": ["auth_failures"],
+        },
+        "apps.access": {
+            "handlers": ["file_info", "file_warning", "file_error"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "apps.core": {
+            "handlers": ["file_info", "file_warning", "file_error"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "apps.core.middleware": {
+            "filters": ["auth_failures"],
+        },
     },
     "root": {
         "handlers": ["console", "file_error"],
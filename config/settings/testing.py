@@ -5,14 +5,37 @@ DEBUG = False
 # Тестовая БД (SQLite)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'apps.core.sqlite',
         'NAME': ':memory:',
     }
 }
 
-# Отключаем кэширование
+# Прогон на PostgreSQL (например, планы запросов): TEST_DATABASE=postgres и POSTGRES_* как в production
+if env('TEST_DATABASE', default='sqlite') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env('POSTGRES_DB', default='blog_db'),
+            'USER': env('POSTGRES_USER', default='blog_user'),
+            'PASSWORD': env('POSTGRES_PASSWORD', default='password'),
+            'HOST': env('POSTGRES_HOST', default='localhost'),
+            'PORT': env('POSTGRES_PORT', default='5432'),
+        }
+    }
+
+# Кэш в памяти процесса, очищается перед каждым тестом (conftest.py)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Тесты идут в одном процессе - кэш в памяти процесса для них общий
+QUERY_CACHE = {**QUERY_CACHE, 'ENABLED': True}
+RESPONSE_CACHE = {**RESPONSE_CACHE, 'ENABLED': True}
+
+# Аудит включается только в своих тестах и пишется синхронно по flush():
+# фоновый поток не видит in-memory базу тестов
+ACCESS_AUDIT = {**ACCESS_AUDIT, 'ENABLED': False, 'BACKGROUND': False}
+
+# Превышение бюджета SQL-запросов роняет тест
+QUERY_INSPECTION = {**QUERY_INSPECTION, 'BUDGET_MODE': 'raise'}
@@ -8,6 +8,16 @@ def django_db_setup(django_db_setup, django_db_blocker):
         call_command('loaddata', 'fixtures/initial_data.json')
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+    from apps.access.services import permission_cache
+
+    for cache in caches.all():
+        cache.clear()
+    permission_cache.clear()
+
+
 @pytest.fixture
 def api_client():
     from rest_framework.test import APIClient
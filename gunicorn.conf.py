@@ -0,0 +1,10 @@
+# Конфигурация gunicorn: подхватывается автоматически при запуске из корня проекта.
+# Параметры запуска (bind, workers) по-прежнему задаются в командной строке
+
+
+def post_worker_init(worker):
+    # Приложение уже загружено воркером: открываем соединения с БД до первого запроса.
+    # Соединения Django - на поток, поэтому прогрев действует для sync-воркеров, а не для gthread
+    from apps.core.db import warm_up_connections
+
+    warm_up_connections()